@@ -1,17 +1,29 @@
 from aqt import mw
 from aqt import gui_hooks
-from aqt.qt import QMessageBox, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget, QListWidgetItem, QLineEdit, QAction, QAbstractItemView, QComboBox, QCalendarWidget, QTextEdit, QFileDialog, QGroupBox, QTimer, QProgressDialog, Qt
-import xml.etree.ElementTree as ET
+from aqt.qt import QMessageBox, QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QListWidget, QListWidgetItem, QLineEdit, QAction, QAbstractItemView, QComboBox, QCalendarWidget, QTextEdit, QFileDialog, QGroupBox, QProgressDialog, Qt
 import re
 import urllib.parse
 import urllib.request
+import requests
 import json
 import os
 import sys
 import base64
-import io
+import hashlib
+import time
+import threading
+import sqlite3
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from dataclasses import dataclass, asdict, fields, replace
+from typing import Optional
+from string import Template
 from datetime import datetime, timedelta
 
+from .kanjivg import extract_stroke_paths_from_svg
+from .markdown_render import render_markdown
+
 # Debug flag and function (defined early so it can be used during imports)
 debug = True
 
@@ -19,26 +31,61 @@ def debugPrint(message):
     if debug:
         print("DEBUG:", message)
 
-# Try to import confetti, but continue if not available
+# Fast JSON for the practice window message boundary (orjson ships with recent Anki builds)
 try:
-    from confettiJS import confettiJs
-except (ImportError, ModuleNotFoundError):
-    confettiJs = ""  # Fallback to empty string if confetti module not found
-    debugPrint("Warning: confettiJS module not found - confetti effects will be disabled")
+    import orjson
+
+    def dumps_json(obj):
+        """Serialize obj to a JSON string (UTF-8, not ASCII-escaped)."""
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+
+    loads_json = orjson.loads
+except ImportError:
+    def dumps_json(obj):
+        """Serialize obj to a JSON string (UTF-8, not ASCII-escaped)."""
+        return json.dumps(obj, ensure_ascii=False)
+
+    loads_json = json.loads
 
 KANJI_REGEX = re.compile(r"[\u4E00-\u9FFF]")
 HIRAGANA_REGEX = re.compile(r"[\u3040-\u309F]")
 KATAKANA_REGEX = re.compile(r"[\u30A0-\u30FF]")
+# Any kanji or kana; one search that can stop at the first hit before the per-script scans
+JAPANESE_CHAR_REGEX = re.compile(r"[\u3040-\u30FF\u4E00-\u9FFF]")
+
+# Single-character versions of the ranges above, without a regex call
+def is_kanji(ch):
+    """True if ch is a CJK unified ideograph (same range as KANJI_REGEX)."""
+    return '\u4E00' <= ch <= '\u9FFF'
+
+def is_kana(ch):
+    """True if ch is hiragana or katakana (HIRAGANA_REGEX and KATAKANA_REGEX ranges are adjacent)."""
+    return '\u3040' <= ch <= '\u30FF'
+# Furigana in AI output: 漢字[かんじ]
+FURIGANA_REGEX = re.compile(r'([一-龯ぁ-ゔァ-ヴー々〆〤]+)\[([ぁ-んァ-ヴー]+)\]')
+# Runs of non-word characters, collapsed when comparing feedback texts
+NON_WORD_REGEX = re.compile(r'\W+')
 
 CONFIG = mw.addonManager.getConfig(__name__)
 
+# Serve the practice window's static CSS/JS from the add-on folder so the webview can cache them
+mw.addonManager.setWebExports(__name__, r"web/.*\.(css|js)")
+WEB_BASE_URL = f"/_addons/{mw.addonManager.addonFromModule(__name__)}/web"
+
 # Cache file path in the addon directory
 CACHE_FILE = os.path.join(os.path.dirname(__file__), "kanji_cache.json")
+# One parsed stroke list per character, named by code point (user_files survives add-on updates)
+STROKE_CACHE_DIR = os.path.join(os.path.dirname(__file__), "user_files", "kvg_cache")
+# Optional prebuilt stroke database (see kanjivg.py); characters found there never hit the network
+KVG_DB_FILE = os.path.join(os.path.dirname(__file__), "user_files", "kvg_strokes.sqlite")
 STATS_FILE = os.path.join(os.path.dirname(__file__), "kanji_stats.json")
 CARD_STATS_FILE = os.path.join(os.path.dirname(__file__), "card_stats.json")
 AI_CONFIG_FILE = os.path.join(os.path.dirname(__file__), "ai_config.json")
 AI_SENTENCES_FILE = os.path.join(os.path.dirname(__file__), "ai_sentences.json")
 HANDWRITING_DATASET_FILE = os.path.join(os.path.dirname(__file__), "handwriting_dataset.json")
+# Kept in user_files like the stroke cache, so add-on updates do not wipe it
+AI_SUMMARY_CACHE_FILE = os.path.join(os.path.dirname(__file__), "user_files", "ai_summary_cache.json")
+AI_SUMMARY_CACHE_MAX_ENTRIES = 100
 
 # Global variables for custom handwriting model (deprecated - now using model server)
 CUSTOM_MODEL = None
@@ -49,7 +96,7 @@ MODEL_SERVER_PROCESS = None
 MODEL_SERVER_STARTED = False  # Track if we already attempted to start the server
 
 def load_cache():
-    """Load kanji stroke data from cache file."""
+    """Load kanji stroke data from the combined cache file (entries cached before per-character files)."""
     if os.path.exists(CACHE_FILE):
         try:
             with open(CACHE_FILE, "r", encoding="utf-8") as f:
@@ -58,13 +105,84 @@ def load_cache():
             debugPrint(f"Error loading cache: {e}")
     return {}
 
-def save_cache(cache):
-    """Save kanji stroke data to cache file."""
+# Characters whose last fetch failed: char -> (time.monotonic() of the failure, error message).
+# Successful results are memoized by KANJI_CACHE; this keeps a character that KanjiVG/Jisho
+# do not have from costing network round-trips on every card that shows it.
+STROKE_FETCH_RETRY_SECONDS = 10 * 60
+_STROKE_FETCH_FAILURES = {}
+
+def recent_stroke_fetch_failure(char):
+    """Return the error message of a failed fetch of char within the retry window, or None."""
+    failure = _STROKE_FETCH_FAILURES.get(char)
+    if failure is None:
+        return None
+    failed_at, error = failure
+    if time.monotonic() - failed_at > STROKE_FETCH_RETRY_SECONDS:
+        _STROKE_FETCH_FAILURES.pop(char, None)
+        return None
+    return error
+
+def stroke_cache_path(char):
+    """Path of the stroke cache file for a character."""
+    return os.path.join(STROKE_CACHE_DIR, f"{ord(char):05x}.json")
+
+_KVG_DB = None
+_KVG_DB_LOCK = threading.Lock()
+
+def load_bundled_strokes(char):
+    """Return stroke data for a character from the bundled KanjiVG database, or None."""
+    global _KVG_DB
+    with _KVG_DB_LOCK:
+        if _KVG_DB is None:
+            if not os.path.exists(KVG_DB_FILE):
+                return None
+            try:
+                _KVG_DB = sqlite3.connect(f"file:{KVG_DB_FILE}?mode=ro", uri=True, check_same_thread=False)
+            except sqlite3.Error as e:
+                debugPrint(f"Error opening stroke database: {e}")
+                return None
+        try:
+            row = _KVG_DB.execute("SELECT data FROM strokes WHERE cp=?", (ord(char),)).fetchone()
+        except sqlite3.Error as e:
+            debugPrint(f"Error reading {char} from stroke database: {e}")
+            return None
+    if row is None:
+        return None
+    return json.loads(row[0])
+
+def load_cached_strokes(char):
+    """Return stroke data for a character from memory, the bundled database or its cache file, or None."""
+    strokes = KANJI_CACHE.get(char)
+    if strokes is not None:
+        return strokes
+    strokes = load_bundled_strokes(char)
+    if strokes is not None:
+        KANJI_CACHE[char] = strokes
+        return strokes
+    try:
+        with open(stroke_cache_path(char), "r", encoding="utf-8") as f:
+            strokes = json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        debugPrint(f"Error loading stroke cache for {char}: {e}")
+        return None
+    KANJI_CACHE[char] = strokes
+    return strokes
+
+def save_cached_strokes(char, strokes):
+    """Remember stroke data for a character and write it to its own cache file."""
+    KANJI_CACHE[char] = strokes
+    path = stroke_cache_path(char)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
     try:
-        with open(CACHE_FILE, "w", encoding="utf-8") as f:
-            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.makedirs(STROKE_CACHE_DIR, exist_ok=True)
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(strokes, f, ensure_ascii=False)
+        # Atomic swap, so a concurrent reader never sees a half-written file
+        os.replace(tmp_path, path)
     except Exception as e:
-        debugPrint(f"Error saving cache: {e}")
+        debugPrint(f"Error saving stroke cache for {char}: {e}")
 
 def load_stats():
     """Load kanji stats from stats file."""
@@ -102,31 +220,58 @@ def save_card_stats(stats):
     except Exception as e:
         debugPrint(f"Error saving card stats: {e}")
 
+@dataclass
+class AIConfig:
+    """AI settings stored in ai_config.json."""
+    api_url: str = ''
+    api_key: str = ''
+    model: str = ''
+    ocr_model: str = ''
+    instructions: str = ''
+    feedback_instructions: str = ''
+    pdf_path: str = ''
+    use_pdf_in_sentences: bool = True
+    use_pdf_in_feedback: bool = True
+    sentence_source: str = 'fields'  # "fields" or "ai"
+    kanji_time_range: str = 'all'
+    kanji_custom_date: Optional[str] = None  # ISO date, used when kanji_time_range is "custom"
+    search_scope: str = ''  # Extra Anki search terms for the practice card list
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build from a loaded JSON dict, ignoring unknown keys."""
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+
+# Last loaded/saved AI config; the file is only read once per session
+_AI_CONFIG_CACHE = None
+
 def load_ai_config():
-    """Load AI configuration from file."""
-    if os.path.exists(AI_CONFIG_FILE):
-        try:
-            with open(AI_CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            debugPrint(f"Error loading AI config: {e}")
-    return {
-        'api_url': '',
-        'api_key': '',
-        'model': '',
-        'ocr_model': '',
-        'instructions': '',
-        'feedback_instructions': '',
-        'pdf_path': '',
-        'use_pdf_in_sentences': True,
-        'use_pdf_in_feedback': True
-    }
+    """Load AI configuration from file.
+    
+    Returns:
+        AIConfig: Saved settings, with defaults for any missing keys.
+        Each call returns a fresh copy, so callers may modify it freely.
+    """
+    global _AI_CONFIG_CACHE
+    if _AI_CONFIG_CACHE is None:
+        _AI_CONFIG_CACHE = AIConfig()
+        if os.path.exists(AI_CONFIG_FILE):
+            try:
+                with open(AI_CONFIG_FILE, "r", encoding="utf-8") as f:
+                    _AI_CONFIG_CACHE = AIConfig.from_dict(json.load(f))
+            except Exception as e:
+                debugPrint(f"Error loading AI config: {e}")
+    return replace(_AI_CONFIG_CACHE)
 
 def save_ai_config(config):
     """Save AI configuration to file."""
+    global _AI_CONFIG_CACHE
+    _AI_CONFIG_CACHE = replace(config)
     try:
         with open(AI_CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(config, f, ensure_ascii=False, indent=2)
+            json.dump(asdict(config), f, ensure_ascii=False, indent=2)
     except Exception as e:
         debugPrint(f"Error saving AI config: {e}")
 
@@ -152,6 +297,34 @@ def save_ai_sentences(sentences):
     except Exception as e:
         debugPrint(f"Error saving AI sentences: {e}")
 
+def load_ai_summaries():
+    """Load cached completion summaries from file.
+    
+    Returns:
+        dict: Feedback-set hash -> summary markdown as returned by the AI, oldest first
+    """
+    if os.path.exists(AI_SUMMARY_CACHE_FILE):
+        try:
+            with open(AI_SUMMARY_CACHE_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except Exception as e:
+            debugPrint(f"Error loading AI summaries: {e}")
+    return {}
+
+def save_ai_summary(key, summary):
+    """Add a completion summary (markdown) to the cache file, dropping the oldest entries when full."""
+    summaries = load_ai_summaries()
+    summaries.pop(key, None)
+    summaries[key] = summary
+    for old_key in list(summaries)[:-AI_SUMMARY_CACHE_MAX_ENTRIES]:
+        del summaries[old_key]
+    try:
+        os.makedirs(os.path.dirname(AI_SUMMARY_CACHE_FILE), exist_ok=True)
+        with open(AI_SUMMARY_CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(summaries, f, ensure_ascii=False)
+    except Exception as e:
+        debugPrint(f"Error saving AI summaries: {e}")
+
 def load_handwriting_dataset():
     """Load handwriting dataset from file.
     
@@ -302,12 +475,12 @@ def generate_sentence_for_kanji(kanji_chars):
     """
     try:
         ai_config = load_ai_config()
-        api_key = ai_config.get('api_key', '')
-        api_url = ai_config.get('api_url') or 'https://openrouter.ai/api/v1/chat/completions'
-        model = ai_config.get('model') or 'google/gemini-2.5-flash'
-        instructions = ai_config.get('instructions', '')
-        pdf_path = ai_config.get('pdf_path', '')
-        use_pdf = ai_config.get('use_pdf_in_sentences', True)
+        api_key = ai_config.api_key
+        api_url = ai_config.api_url or 'https://openrouter.ai/api/v1/chat/completions'
+        model = ai_config.model or 'google/gemini-2.5-flash'
+        instructions = ai_config.instructions
+        pdf_path = ai_config.pdf_path
+        use_pdf = ai_config.use_pdf_in_sentences
         
         if not api_key:
             debugPrint("Sentence generation not available - API key not configured")
@@ -329,8 +502,8 @@ def generate_sentence_for_kanji(kanji_chars):
         
         # Get learned kanji context if configured
         learned_kanji_context = None
-        kanji_time_range = ai_config.get('kanji_time_range', 'all')
-        kanji_custom_date = ai_config.get('kanji_custom_date', None)
+        kanji_time_range = ai_config.kanji_time_range
+        kanji_custom_date = ai_config.kanji_custom_date
         
         if kanji_time_range != 'all':
             # Parse time range
@@ -496,8 +669,8 @@ CARD_STATS = load_card_stats()
 
 # OpenRouter API configuration for OCR (using ai_config.json)
 AI_CONFIG = load_ai_config()
-OPENROUTER_API_KEY = AI_CONFIG.get('api_key', '')
-OPENROUTER_MODEL = AI_CONFIG.get('ocr_model') or 'google/gemini-2.0-flash-001'
+OPENROUTER_API_KEY = AI_CONFIG.api_key
+OPENROUTER_MODEL = AI_CONFIG.ocr_model or 'google/gemini-2.0-flash-001'
 OCR_AVAILABLE = bool(OPENROUTER_API_KEY)
 
 def get_latest_model_path():
@@ -590,7 +763,7 @@ def predict_with_custom_model(image_data_base64):
         # Preprocess image (same as training)
         if img.mode != 'L':
             img = img.convert('L')
-        img = img.resize((64, 64), Image.Resampling.LANCZOS)
+        img = img.resize((64, 64), Image.Resampling.LANCZOS, reducing_gap=2.0)
         img_array = np.array(img, dtype=np.float32) / 255.0
         img_array = 1.0 - img_array  # Invert colors
         img_array = np.expand_dims(img_array, axis=-1)
@@ -858,9 +1031,9 @@ def recognize_handwriting(image_data_base64):
     # Fallback to AI OCR
     # Reload config to get latest API key and settings
     ai_config = load_ai_config()
-    api_key = ai_config.get('api_key', '')
-    api_url = ai_config.get('api_url') or 'https://openrouter.ai/api/v1/chat/completions'
-    ocr_model = ai_config.get('ocr_model') or 'google/gemini-2.0-flash-001'
+    api_key = ai_config.api_key
+    api_url = ai_config.api_url or 'https://openrouter.ai/api/v1/chat/completions'
+    ocr_model = ai_config.ocr_model or 'google/gemini-2.0-flash-001'
     
     if not api_key:
         debugPrint("OCR not available - OpenRouter API key not configured")
@@ -961,12 +1134,15 @@ def recognize_handwriting(image_data_base64):
 
 def kanaRenderer(char):
     """Render hiragana or katakana stroke data from KanjiVG."""
-    global KANJI_CACHE
-    
     # Check cache first
-    if char in KANJI_CACHE:
+    cached_strokes = load_cached_strokes(char)
+    if cached_strokes is not None:
         debugPrint(f"Loading kana {char} from cache")
-        return KANJI_CACHE[char]
+        return cached_strokes
+    
+    if recent_stroke_fetch_failure(char) is not None:
+        debugPrint(f"Skipping kana {char} - fetch failed recently")
+        return []
     
     # Fetch from KanjiVG if not in cache
     debugPrint(f"Fetching kana {char} from KanjiVG")
@@ -975,15 +1151,20 @@ def kanaRenderer(char):
         strokeData = extract_stroke_paths_from_svg(svgHTML, char)
         
         # Save to cache
-        KANJI_CACHE[char] = strokeData
-        save_cache(KANJI_CACHE)
+        save_cached_strokes(char, strokeData)
         
         return strokeData
     except Exception as e:
         debugPrint(f"Error fetching kana {char} from KanjiVG: {e}")
+        _STROKE_FETCH_FAILURES[char] = (time.monotonic(), f"{type(e).__name__}: {e}")
         return []
 
 
+# Keep-alive session shared by the stroke data fetches, so repeat fetches from
+# GitHub, Jisho and its CDN reuse pooled connections instead of new TLS handshakes
+STROKE_HTTP = requests.Session()
+STROKE_FETCH_TIMEOUT = (5, 30)  # (connect, read) seconds
+
 def fetch_kanjivg_svg(char):
     """Fetch SVG from KanjiVG GitHub repository."""
     # Convert character to Unicode hex (5 digits, lowercase)
@@ -991,225 +1172,105 @@ def fetch_kanjivg_svg(char):
     url = f"https://raw.githubusercontent.com/KanjiVG/kanjivg/master/kanji/{code_point}.svg"
     
     try:
-        with urllib.request.urlopen(url) as response:
-            svg_bytes = response.read()
-        return svg_bytes.decode("utf-8", errors="ignore")
-    except urllib.error.HTTPError as e:
+        response = STROKE_HTTP.get(url, timeout=STROKE_FETCH_TIMEOUT)
+        response.raise_for_status()
+        return response.content.decode("utf-8", errors="ignore")
+    except requests.HTTPError as e:
         raise ValueError(f"Character {char} (U+{code_point.upper()}) not found in KanjiVG: {e}")
 
 
 def kanjiRenderer(char):
-    global KANJI_CACHE
-    
     # Check cache first
-    if char in KANJI_CACHE:
+    cached_strokes = load_cached_strokes(char)
+    if cached_strokes is not None:
         debugPrint(f"Loading {char} from cache")
-        return KANJI_CACHE[char]
+        return cached_strokes
+    
+    recent_failure = recent_stroke_fetch_failure(char)
+    if recent_failure is not None:
+        raise RuntimeError(f"Recent fetch of {char} failed, not retrying yet ({recent_failure})")
     
     # Fetch from internet if not in cache
     debugPrint(f"Fetching {char} from Jisho.org")
-    svgHTML = fetch_jisho_svg_html_for_kanji(char)
-    strokeData = extract_stroke_paths_from_svg(svgHTML, char)
+    try:
+        svgHTML = fetch_jisho_svg_html_for_kanji(char)
+        strokeData = extract_stroke_paths_from_svg(svgHTML, char)
+    except Exception as e:
+        _STROKE_FETCH_FAILURES[char] = (time.monotonic(), f"{type(e).__name__}: {e}")
+        raise
 
     # Save to cache
-    KANJI_CACHE[char] = strokeData
-    save_cache(KANJI_CACHE)
-
-    # Optional debug – you can comment this out if you don't need it
-    with open("output_file.txt", "w", encoding="utf-8") as f:
-        for s in strokeData:
-            f.write(
-                f"Stroke {s['index']}: d={s['d']}\n"
-                f"  label at ({s['label_x']}, {s['label_y']})\n"
-                f"  start=({s['start_x']}, {s['start_y']}), "
-                f"end=({s['end_x']}, {s['end_y']})\n"
-            )
+    save_cached_strokes(char, strokeData)
 
     return strokeData
 
 
+# Stroke order SVG link on a Jisho kanji page; the character class stops at the end of the
+# URL instead of backtracking from the last ".svg" on the line
+JISHO_SVG_URL_REGEX = re.compile(r'd1w6u4xc3l95km\.cloudfront\.net/kanji-2015-03/[^"\'<> ]+\.svg')
+
 def fetch_jisho_svg_html_for_kanji(char):
     base_url = "https://jisho.org/search/"
     query = f"{char} #kanji"
     encoded_query = urllib.parse.quote(query)
     url = base_url + encoded_query
 
-    with urllib.request.urlopen(url) as response:
-        html_bytes = response.read()
-    html_text = html_bytes.decode("utf-8", errors="ignore")
+    response = STROKE_HTTP.get(url, timeout=STROKE_FETCH_TIMEOUT)
+    response.raise_for_status()
+    html_text = response.content.decode("utf-8", errors="ignore")
 
-    svg_url = re.search(r'd1w6u4xc3l95km\.cloudfront\.net/kanji-2015-03/.*\.svg', html_text)
+    svg_url = JISHO_SVG_URL_REGEX.search(html_text)
     if not svg_url:
         raise ValueError(f"No SVG URL found for kanji {char!r}")
     svg_url = svg_url.group()
 
-    with urllib.request.urlopen("https://" + svg_url) as response:
-        html_bytes = response.read()
-    svg_html_text = html_bytes.decode("utf-8", errors="ignore")
+    response = STROKE_HTTP.get("https://" + svg_url, timeout=STROKE_FETCH_TIMEOUT)
+    response.raise_for_status()
+    svg_html_text = response.content.decode("utf-8", errors="ignore")
 
     return svg_html_text
 
 
-def extract_stroke_paths_from_svg(svg_text, char):
-    root = ET.fromstring(svg_text)
-
-    ns = {
-        'svg': "http://www.w3.org/2000/svg",
-        'kvg': "http://kanjivg.tagaini.net"
-    }
+# Worker threads for fetching stroke data of several uncached characters concurrently
+STROKE_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="kanji-strokes")
 
-    target_group = None
-    for g in root.findall('.//svg:g', ns):
-        if g.get('{http://kanjivg.tagaini.net}element') == char:
-            target_group = g
-            break
 
-    if target_group is None:
-        raise ValueError(f"No stroke group found for kanji {char!r}")
+def render_char_strokes(ch):
+    """Return stroke data for a kanji or kana character, or None if unavailable."""
+    try:
+        # Determine character type and get appropriate stroke data
+        if is_kanji(ch):
+            return kanjiRenderer(ch)
+        if is_kana(ch):
+            return kanaRenderer(ch)
+    except Exception as e:
+        debugPrint(f"Error getting strokes for {ch}: {e}")
+    return None
 
-    path_elements = target_group.findall('.//svg:path', ns)
 
-    d_strings = []
-    start_end = []
-    for path in path_elements:
-        d = path.get('d')
-        if not d:
-            continue
-        d_strings.append(d)
+# Bumped whenever the reviewer moves on, so late background loads for an old card are dropped
+_SIDE_LOAD_GENERATION = 0
 
-        # Parse SVG path to get actual start and end points
-        # Split by command letters to get segments
-        commands = re.findall(r'[MmLlHhVvCcSsQqTtAaZz][^MmLlHhVvCcSsQqTtAaZz]*', d)
-        
-        sx, sy, ex, ey = None, None, None, None
-        current_x, current_y = 0, 0
-        
-        for cmd in commands:
-            cmd_letter = cmd[0]
-            params = re.findall(r'(-?\d+(?:\.\d+)?)', cmd[1:])
-            
-            if not params:
-                continue
-                
-            # M/m = move to (absolute/relative) - this is the start
-            if cmd_letter in 'Mm':
-                if len(params) >= 2:
-                    if cmd_letter == 'M':
-                        current_x, current_y = float(params[0]), float(params[1])
-                    else:  # relative
-                        current_x += float(params[0])
-                        current_y += float(params[1])
-                    if sx is None:  # First move is the start point
-                        sx, sy = current_x, current_y
-            
-            # L/l = line to
-            elif cmd_letter in 'Ll':
-                if len(params) >= 2:
-                    if cmd_letter == 'L':
-                        current_x, current_y = float(params[-2]), float(params[-1])
-                    else:
-                        current_x += float(params[-2])
-                        current_y += float(params[-1])
-            
-            # C/c = cubic bezier (last pair is endpoint)
-            elif cmd_letter in 'Cc':
-                if len(params) >= 6:
-                    if cmd_letter == 'C':
-                        current_x, current_y = float(params[-2]), float(params[-1])
-                    else:
-                        current_x += float(params[-2])
-                        current_y += float(params[-1])
-            
-            # S/s = smooth cubic bezier
-            elif cmd_letter in 'Ss':
-                if len(params) >= 4:
-                    if cmd_letter == 'S':
-                        current_x, current_y = float(params[-2]), float(params[-1])
-                    else:
-                        current_x += float(params[-2])
-                        current_y += float(params[-1])
-            
-            # Q/q = quadratic bezier
-            elif cmd_letter in 'Qq':
-                if len(params) >= 4:
-                    if cmd_letter == 'Q':
-                        current_x, current_y = float(params[-2]), float(params[-1])
-                    else:
-                        current_x += float(params[-2])
-                        current_y += float(params[-1])
-            
-            # T/t = smooth quadratic bezier
-            elif cmd_letter in 'Tt':
-                if len(params) >= 2:
-                    if cmd_letter == 'T':
-                        current_x, current_y = float(params[-2]), float(params[-1])
-                    else:
-                        current_x += float(params[-2])
-                        current_y += float(params[-1])
-        
-        ex, ey = current_x, current_y
-        
-        if sx is not None and ex is not None:
-            start_end.append((sx, sy, ex, ey))
-        else:
-            start_end.append((None, None, None, None))
-
-    numbers_group = None
-    for g in root.findall('.//svg:g', ns):
-        gid = g.get('id', '')
-        if gid.startswith('kvg:StrokeNumbers_'):
-            numbers_group = g
-            break
-
-    label_positions = []
-    if numbers_group is not None:
-        for text_elem in numbers_group.findall('svg:text', ns):
-            transform = text_elem.get('transform', '')
-            m = re.search(r'matrix\([^)]* ([\d\.\-]+) ([\d\.\-]+)\)', transform)
-            if not m:
-                continue
-            x = float(m.group(1))
-            y = float(m.group(2))
-            try:
-                num = int((text_elem.text or '').strip())
-            except ValueError:
-                continue
-            label_positions.append((num, x, y))
-
-    stroke_data = []
-    if label_positions and len(label_positions) == len(d_strings):
-        label_positions.sort(key=lambda t: t[0])
-        for idx, d in enumerate(d_strings, start=1):
-            num, x, y = label_positions[idx - 1]
-            sx, sy, ex, ey = start_end[idx - 1]
-            stroke_data.append({
-                "index": num,
-                "d": d,
-                "label_x": x,
-                "label_y": y,
-                "start_x": sx,
-                "start_y": sy,
-                "end_x": ex,
-                "end_y": ey,
-            })
-    else:
-        for idx, d in enumerate(d_strings, start=1):
-            sx, sy, ex, ey = start_end[idx - 1]
-            stroke_data.append({
-                "index": idx,
-                "d": d,
-                "label_x": None,
-                "label_y": None,
-                "start_x": sx,
-                "start_y": sy,
-                "end_x": ex,
-                "end_y": ey,
-            })
 
-    return stroke_data
+def _show_stroke_loading_placeholder():
+    js = """
+    (function() {
+        if (document.getElementById('kanji-draw-container')) return;
+        const el = document.createElement('div');
+        el.id = 'kanji-draw-container';
+        el.style.marginTop = '20px';
+        el.style.textAlign = 'center';
+        el.style.opacity = '0.6';
+        el.textContent = 'Loading stroke data...';
+        document.body.appendChild(el);
+    })();
+    """
+    mw.reviewer.web.eval(js)
 
 
 def _clear_canvas_ui():
+    global _SIDE_LOAD_GENERATION
+    _SIDE_LOAD_GENERATION += 1
     js = """
     (function() {
         const el = document.getElementById('kanji-draw-container');
@@ -1223,7 +1284,14 @@ def _clear_canvas_ui():
 
 def _handle_side(card, use_answer: bool):
     """Common logic for front/back depending on config."""
+    global _SIDE_LOAD_GENERATION
+    _SIDE_LOAD_GENERATION += 1
     html = card.a() if use_answer else card.q()
+    debugPrint(html)
+    
+    # Cards without any Japanese text skip the three full scans below
+    if not JAPANESE_CHAR_REGEX.search(html):
+        return
     
     # Find all Japanese characters (kanji, hiragana, katakana)
     found_kanji = KANJI_REGEX.findall(html)
@@ -1231,11 +1299,6 @@ def _handle_side(card, use_answer: bool):
     found_katakana = KATAKANA_REGEX.findall(html)
     
     all_chars = found_kanji + found_hiragana + found_katakana
-    debugPrint(html)
-
-    if not all_chars:
-        return
-
     unique_chars = list(dict.fromkeys(all_chars))
     print("Detected Japanese characters on this card:", "".join(unique_chars))
     
@@ -1254,35 +1317,57 @@ def _handle_side(card, use_answer: bool):
             CARD_STATS[card_id]['lastReviewed'] = datetime.now().isoformat()
         save_card_stats(CARD_STATS)
 
+    # Detect card type: 0=new, 1=learning, 2=review, 3=relearning
+    card_type = card.type if hasattr(card, 'type') else 0
+
+    # Everything already in memory: render straight away without a round trip through a worker
+    if all(ch in KANJI_CACHE for ch in unique_chars):
+        _render_card_strokes(_collect_card_strokes(unique_chars), card_type)
+        return
+
+    # Network fetches happen off the UI thread; the canvas is injected once they finish
+    generation = _SIDE_LOAD_GENERATION
+    _show_stroke_loading_placeholder()
+    mw.taskman.run_in_background(
+        task=lambda: _collect_card_strokes(unique_chars),
+        on_done=lambda future: _on_card_strokes_done(future, card_type, generation)
+    )
+
+
+def _collect_card_strokes(unique_chars):
+    """Get stroke data for every character at once; uncached characters are fetched in parallel."""
     char_list = []
-    for ch in unique_chars:
-        try:
-            # Determine character type and get appropriate stroke data
-            if KANJI_REGEX.match(ch):
-                strokes = kanjiRenderer(ch)
-            elif HIRAGANA_REGEX.match(ch) or KATAKANA_REGEX.match(ch):
-                strokes = kanaRenderer(ch)
-            else:
-                continue
-            
-            if strokes:  # Only add if we have stroke data
-                char_list.append({
-                    "char": ch,
-                    "strokes": strokes,
-                })
-        except Exception as e:
-            debugPrint(f"Error getting strokes for {ch}: {e}")
+    for ch, strokes in zip(unique_chars, STROKE_EXECUTOR.map(render_char_strokes, unique_chars)):
+        if strokes:  # Only add if we have stroke data
+            char_list.append({
+                "char": ch,
+                "strokes": strokes,
+            })
+    return char_list
+
 
+def _on_card_strokes_done(future, card_type, generation):
+    """Inject the canvas for a background stroke load (runs on the UI thread)."""
+    if generation != _SIDE_LOAD_GENERATION:
+        return  # The reviewer has moved to another card or side since
+    try:
+        char_list = future.result()
+    except Exception as e:
+        debugPrint(f"Error loading stroke data: {e}")
+        char_list = []
+    if not char_list:
+        _clear_canvas_ui()
+        return
+    _render_card_strokes(char_list, card_type)
+
+
+def _render_card_strokes(char_list, card_type):
     if not char_list:
         return
 
-    # Detect card type: 0=new, 1=learning, 2=review, 3=relearning
-    card_type = card.type if hasattr(card, 'type') else 0
-    
     js_data = f"window.kanjiData = {json.dumps(char_list)};"
     js_card_type = f"window.kanjiCardType = {card_type};"
-    mw.reviewer.web.eval(js_data)
-    mw.reviewer.web.eval(js_card_type)
+    mw.reviewer.web.eval(js_data + js_card_type)
     inject_drawing_canvas()
 
 
@@ -1712,16 +1797,38 @@ def inject_drawing_canvas():
 
         loadCurrentKanji();
 
+        // Grid, outlines and stroke numbers only change when the stroke state does, so they
+        // are rendered once into a layer and blitted each frame instead of re-stroked at 60 Hz
+        const baseCanvas = document.createElement('canvas');
+        baseCanvas.width = canvas.width;
+        baseCanvas.height = canvas.height;
+        const basectx = baseCanvas.getContext('2d');
+        let baseLayerKey = null;
+        let baseLayerPaths = null;
+
+        function drawBaseLayer() {
+            const numCompleted = STRICT_STROKE_ORDER ? completedStrokes : completedStrokes.size;
+            const key = currentKanjiIndex + ':' + currentStrokeIndex + ':' + numCompleted + ':' + hintActive;
+            if (key !== baseLayerKey || baseLayerPaths !== strokePaths) {
+                baseLayerKey = key;
+                baseLayerPaths = strokePaths;
+                basectx.clearRect(0, 0, baseCanvas.width, baseCanvas.height);
+                drawGrid();
+                drawBase();
+            }
+            ctx.drawImage(baseCanvas, 0, 0);
+        }
+
         function drawBase() {
-            ctx.save();
-            ctx.scale(scaleX, scaleY);
+            basectx.save();
+            basectx.scale(scaleX, scaleY);
 
             const current = strokePaths[currentStrokeIndex];
 
-            ctx.lineWidth = 4;
-            ctx.lineCap = 'round';
-            ctx.lineJoin = 'round';
-            ctx.setLineDash([]);
+            basectx.lineWidth = 4;
+            basectx.lineCap = 'round';
+            basectx.lineJoin = 'round';
+            basectx.setLineDash([]);
 
             // Determine which strokes to show based on mode
             let showStroke = (s, idx) => true;
@@ -1774,29 +1881,29 @@ def inject_drawing_canvas():
                 if (!showStroke(s, idx)) continue;
                 
                 if (s === current) {
-                    ctx.strokeStyle = baseStrokeCurrentColor;
+                    basectx.strokeStyle = baseStrokeCurrentColor;
                 } else {
-                    ctx.strokeStyle = baseStrokeOtherColor;
+                    basectx.strokeStyle = baseStrokeOtherColor;
                 }
-                ctx.stroke(s.path);
+                basectx.stroke(s.path);
             }
 
             // Draw stroke numbers
-            ctx.font = '8px sans-serif';
+            basectx.font = '8px sans-serif';
             for (let idx = 0; idx < strokePaths.length; idx++) {
                 const s = strokePaths[idx];
                 if (s.label_x == null) continue;
                 if (!showNumber(s, idx)) continue;
                 
                 if (s === current) {
-                    ctx.fillStyle = 'rgba(255, 0, 0, 0.75)';
+                    basectx.fillStyle = 'rgba(255, 0, 0, 0.75)';
                 } else {
-                    ctx.fillStyle = 'rgba(255, 0, 0, 0.20)';
+                    basectx.fillStyle = 'rgba(255, 0, 0, 0.20)';
                 }
-                ctx.fillText(String(s.index), s.label_x, s.label_y);
+                basectx.fillText(String(s.index), s.label_x, s.label_y);
             }
 
-            ctx.restore();
+            basectx.restore();
         }
 
         function drawAnimatedStroke() {
@@ -1847,31 +1954,31 @@ def inject_drawing_canvas():
         }
 
         function drawGrid() {
-            ctx.save();
-            ctx.scale(scaleX, scaleY);
+            basectx.save();
+            basectx.scale(scaleX, scaleY);
 
             const W = 109, H = 109;
 
-            ctx.strokeStyle = gridColor;
-            ctx.lineWidth = 2;
-            ctx.setLineDash([]);
-            ctx.strokeRect(0, 0, W, H);
+            basectx.strokeStyle = gridColor;
+            basectx.lineWidth = 2;
+            basectx.setLineDash([]);
+            basectx.strokeRect(0, 0, W, H);
 
-            ctx.lineWidth = 1;
-            ctx.strokeStyle = gridColor;
-            ctx.setLineDash([3, 4]);
+            basectx.lineWidth = 1;
+            basectx.strokeStyle = gridColor;
+            basectx.setLineDash([3, 4]);
 
-            ctx.beginPath();
-            ctx.moveTo(W / 2, 0);
-            ctx.lineTo(W / 2, H);
-            ctx.stroke();
+            basectx.beginPath();
+            basectx.moveTo(W / 2, 0);
+            basectx.lineTo(W / 2, H);
+            basectx.stroke();
 
-            ctx.beginPath();
-            ctx.moveTo(0, H / 2);
-            ctx.lineTo(W, H / 2);
-            ctx.stroke();
+            basectx.beginPath();
+            basectx.moveTo(0, H / 2);
+            basectx.lineTo(W, H / 2);
+            basectx.stroke();
 
-            ctx.restore();
+            basectx.restore();
         }
 
         function isStrokeCloseEnough(svgPoints, canonicalPath) {
@@ -2095,8 +2202,7 @@ def inject_drawing_canvas():
 
             ctx.clearRect(0, 0, canvas.width, canvas.height);
 
-            drawGrid();
-            drawBase();
+            drawBaseLayer();
             drawAnimatedStroke();
             drawUserStrokes();
 
@@ -2417,7 +2523,7 @@ class AIConfigDialog(QDialog):
         self.setWindowTitle("AI Configuration")
         self.setMinimumSize(600, 700)
         
-        self.config = config.copy()
+        self.config = replace(config)
         self.setup_ui()
     
     def setup_ui(self):
@@ -2436,7 +2542,7 @@ class AIConfigDialog(QDialog):
         url_label = QLabel("API URL:")
         self.url_input = QLineEdit()
         self.url_input.setPlaceholderText("https://api.openai.com/v1/chat/completions")
-        self.url_input.setText(self.config.get('api_url', ''))
+        self.url_input.setText(self.config.api_url)
         url_layout.addWidget(url_label)
         url_layout.addWidget(self.url_input)
         api_layout.addLayout(url_layout)
@@ -2447,7 +2553,7 @@ class AIConfigDialog(QDialog):
         self.key_input = QLineEdit()
         self.key_input.setPlaceholderText("sk-...")
         self.key_input.setEchoMode(QLineEdit.EchoMode.Password)
-        self.key_input.setText(self.config.get('api_key', ''))
+        self.key_input.setText(self.config.api_key)
         key_layout.addWidget(key_label)
         key_layout.addWidget(self.key_input)
         api_layout.addLayout(key_layout)
@@ -2457,7 +2563,7 @@ class AIConfigDialog(QDialog):
         model_label = QLabel("Sentence Generation & Feedback Model:")
         self.model_input = QLineEdit()
         self.model_input.setPlaceholderText("google/gemini-2.5-flash")
-        self.model_input.setText(self.config.get('model', ''))
+        self.model_input.setText(self.config.model)
         model_layout.addWidget(model_label)
         model_layout.addWidget(self.model_input)
         api_layout.addLayout(model_layout)
@@ -2467,11 +2573,21 @@ class AIConfigDialog(QDialog):
         ocr_model_label = QLabel("Handwriting Recognition Model:")
         self.ocr_model_input = QLineEdit()
         self.ocr_model_input.setPlaceholderText("google/gemini-2.0-flash-001")
-        self.ocr_model_input.setText(self.config.get('ocr_model', ''))
+        self.ocr_model_input.setText(self.config.ocr_model)
         ocr_model_layout.addWidget(ocr_model_label)
         ocr_model_layout.addWidget(self.ocr_model_input)
         api_layout.addLayout(ocr_model_layout)
         
+        # Extra Anki search terms to narrow the practice card list
+        scope_layout = QHBoxLayout()
+        scope_label = QLabel("Card Search Scope (optional):")
+        self.search_scope_input = QLineEdit()
+        self.search_scope_input.setPlaceholderText('e.g. "deck:Japanese" or "note:Japanese Vocab"')
+        self.search_scope_input.setText(self.config.search_scope)
+        scope_layout.addWidget(scope_label)
+        scope_layout.addWidget(self.search_scope_input)
+        api_layout.addLayout(scope_layout)
+        
         api_group.setLayout(api_layout)
         layout.addWidget(api_group)
         
@@ -2490,7 +2606,7 @@ class AIConfigDialog(QDialog):
             "- Focus on daily conversation\n"
             "- Include formal and informal examples"
         )
-        self.instructions_input.setText(self.config.get('instructions', ''))
+        self.instructions_input.setText(self.config.instructions)
         self.instructions_input.setMinimumHeight(80)
         instr_layout.addWidget(self.instructions_input)
         
@@ -2509,7 +2625,7 @@ class AIConfigDialog(QDialog):
             "- Focus on grammar patterns\n"
             "- Explain particle usage in detail"
         )
-        self.feedback_instructions_input.setText(self.config.get('feedback_instructions', ''))
+        self.feedback_instructions_input.setText(self.config.feedback_instructions)
         self.feedback_instructions_input.setMinimumHeight(80)
         instr_layout.addWidget(self.feedback_instructions_input)
         
@@ -2546,7 +2662,7 @@ class AIConfigDialog(QDialog):
         }
         
         # Set current value
-        current_range = self.config.get('kanji_time_range', 'all')
+        current_range = self.config.kanji_time_range
         reverse_map = {v: k for k, v in time_map.items()}
         if current_range in reverse_map:
             self.kanji_time_combo.setCurrentText(reverse_map[current_range])
@@ -2562,8 +2678,8 @@ class AIConfigDialog(QDialog):
         
         # Label to show selected custom date
         self.kanji_date_label = QLabel("")
-        if current_range == 'custom' and self.config.get('kanji_custom_date'):
-            self.kanji_date_label.setText(f"From: {self.config.get('kanji_custom_date')}")
+        if current_range == 'custom' and self.config.kanji_custom_date:
+            self.kanji_date_label.setText(f"From: {self.config.kanji_custom_date}")
         self.kanji_date_label.setVisible(current_range == 'custom')
         kanji_time_layout.addWidget(self.kanji_date_label)
         
@@ -2573,8 +2689,8 @@ class AIConfigDialog(QDialog):
         # PDF attachment
         pdf_layout = QHBoxLayout()
         pdf_label = QLabel("Attach PDF (optional):")
-        self.pdf_path_label = QLabel(self.config.get('pdf_path', 'No file selected'))
-        if self.config.get('pdf_path', ''):
+        self.pdf_path_label = QLabel(self.config.pdf_path or 'No file selected')
+        if self.config.pdf_path:
             self.pdf_path_label.setStyleSheet("color: black; background-color: #f0f0f0; padding: 5px; border-radius: 3px;")
         else:
             self.pdf_path_label.setStyleSheet("color: gray; font-style: italic; background-color: #f0f0f0; padding: 5px; border-radius: 3px;")
@@ -2597,11 +2713,11 @@ class AIConfigDialog(QDialog):
         instr_layout.addWidget(pdf_usage_label)
         
         self.use_pdf_sentences_checkbox = QCheckBox("Sentence generation")
-        self.use_pdf_sentences_checkbox.setChecked(self.config.get('use_pdf_in_sentences', True))
+        self.use_pdf_sentences_checkbox.setChecked(self.config.use_pdf_in_sentences)
         instr_layout.addWidget(self.use_pdf_sentences_checkbox)
         
         self.use_pdf_feedback_checkbox = QCheckBox("Feedback generation")
-        self.use_pdf_feedback_checkbox.setChecked(self.config.get('use_pdf_in_feedback', True))
+        self.use_pdf_feedback_checkbox.setChecked(self.config.use_pdf_in_feedback)
         instr_layout.addWidget(self.use_pdf_feedback_checkbox)
         
         instr_group.setLayout(instr_layout)
@@ -2634,13 +2750,13 @@ class AIConfigDialog(QDialog):
         )
         
         if file_path:
-            self.config['pdf_path'] = file_path
+            self.config.pdf_path = file_path
             self.pdf_path_label.setText(file_path)
             self.pdf_path_label.setStyleSheet("color: black; background-color: #f0f0f0; padding: 5px; border-radius: 3px;")
     
     def clear_pdf(self):
         """Clear selected PDF."""
-        self.config['pdf_path'] = ''
+        self.config.pdf_path = ''
         self.pdf_path_label.setText('No file selected')
         self.pdf_path_label.setStyleSheet("color: gray; font-style: italic; background-color: #f0f0f0; padding: 5px; border-radius: 3px;")
     
@@ -2661,7 +2777,7 @@ class AIConfigDialog(QDialog):
             "Last 1 month": "1month",
             "Custom": "custom"
         }
-        self.config['kanji_time_range'] = time_map.get(text, 'all')
+        self.config.kanji_time_range = time_map.get(text, 'all')
     
     def select_kanji_date(self):
         """Show calendar to select custom date for kanji filtering."""
@@ -2671,10 +2787,10 @@ class AIConfigDialog(QDialog):
         
         calendar = QCalendarWidget()
         # Set to current date or saved date
-        if self.config.get('kanji_custom_date'):
+        if self.config.kanji_custom_date:
             from datetime import datetime
             try:
-                saved_date = datetime.fromisoformat(self.config['kanji_custom_date'])
+                saved_date = datetime.fromisoformat(self.config.kanji_custom_date)
                 from aqt.qt import QDate
                 calendar.setSelectedDate(QDate(saved_date.year, saved_date.month, saved_date.day))
             except:
@@ -2690,7 +2806,7 @@ class AIConfigDialog(QDialog):
             selected = calendar.selectedDate()
             from datetime import datetime
             date_obj = datetime(selected.year(), selected.month(), selected.day())
-            self.config['kanji_custom_date'] = date_obj.isoformat()
+            self.config.kanji_custom_date = date_obj.isoformat()
             self.kanji_date_label.setText(f"From: {date_obj.strftime('%Y-%m-%d')}")
             dialog.accept()
         
@@ -2706,20 +2822,25 @@ class AIConfigDialog(QDialog):
     
     def get_config(self):
         """Get the current configuration."""
-        self.config['api_url'] = self.url_input.text()
-        self.config['api_key'] = self.key_input.text()
-        self.config['model'] = self.model_input.text()
-        self.config['ocr_model'] = self.ocr_model_input.text()
-        self.config['instructions'] = self.instructions_input.toPlainText()
-        self.config['feedback_instructions'] = self.feedback_instructions_input.toPlainText()
-        self.config['use_pdf_in_sentences'] = self.use_pdf_sentences_checkbox.isChecked()
-        self.config['use_pdf_in_feedback'] = self.use_pdf_feedback_checkbox.isChecked()
+        self.config.api_url = self.url_input.text()
+        self.config.api_key = self.key_input.text()
+        self.config.model = self.model_input.text()
+        self.config.ocr_model = self.ocr_model_input.text()
+        self.config.search_scope = self.search_scope_input.text().strip()
+        self.config.instructions = self.instructions_input.toPlainText()
+        self.config.feedback_instructions = self.feedback_instructions_input.toPlainText()
+        self.config.use_pdf_in_sentences = self.use_pdf_sentences_checkbox.isChecked()
+        self.config.use_pdf_in_feedback = self.use_pdf_feedback_checkbox.isChecked()
         # kanji_time_range and kanji_custom_date are already set in callbacks
         # Save to file
         save_ai_config(self.config)
         return self.config
 
 
+# Sentence source value -> index in the practice dialog's source combo box
+_SOURCE_INDEX = {"fields": 0, "ai": 1}
+
+
 class KanjiPracticeDialog(QDialog):
     """Standalone practice interface for kanji stroke order practice."""
     
@@ -2735,17 +2856,27 @@ class KanjiPracticeDialog(QDialog):
         self.date_range_start = None
         self.date_range_end = None
         
+        # Cards returned by the last background load, and a counter used to
+        # drop results from loads that were superseded by a newer one
+        self.filtered_cards = {}
+        self._load_generation = 0
+        self._cards_loading = False
+        
+        # Calendar popup for "Custom..." range (built on first use)
+        self._calendar_dialog = None
+        self._calendar = None
+        
         # Sentence source configuration
         self.ai_config = load_ai_config()
-        self.sentence_source = self.ai_config.get('sentence_source', 'fields')  # "fields" or "ai"
+        self.sentence_source = self.ai_config.sentence_source
         
         self.setup_ui()
         
         # Restore saved sentence source selection
-        if self.sentence_source == "ai":
-            self.source_combo.setCurrentIndex(1)
-        else:
-            self.source_combo.setCurrentIndex(0)
+        self.source_combo.setCurrentIndex(_SOURCE_INDEX.get(self.sentence_source, 0))
+        
+        # Load the card list without blocking the dialog from showing
+        self.populate_card_list()
     
     def setup_ui(self):
         """Create the dialog UI."""
@@ -2821,7 +2952,6 @@ class KanjiPracticeDialog(QDialog):
         
         self.card_list = QListWidget()
         self.card_list.setSelectionMode(QAbstractItemView.SelectionMode.MultiSelection)
-        self.populate_card_list()
         layout.addWidget(self.card_list)
         
         # Buttons
@@ -2851,10 +2981,49 @@ class KanjiPracticeDialog(QDialog):
         self.setLayout(layout)
     
     def populate_card_list(self, filter_text=""):
-        """Populate the list with available cards."""
+        """Reload available cards in the background and repopulate the list.
+        
+        The search box text at the time the load finishes is used as the
+        filter, so typing while cards are loading is not lost.
+        """
+        self._load_generation += 1
+        generation = self._load_generation
+        self._cards_loading = True
+        
+        self.card_list.clear()
+        placeholder = QListWidgetItem("Loading cards...")
+        placeholder.setFlags(Qt.ItemFlag.NoItemFlags)
+        self.card_list.addItem(placeholder)
+        self.info_label.setText("Loading cards from your review history...")
+        
+        mw.taskman.run_in_background(
+            task=self._load_cards_bg,
+            on_done=lambda future: self._load_cards_done(future, generation)
+        )
+    
+    def _load_cards_bg(self):
+        """Run the card search off the UI thread."""
+        return self.get_filtered_cards_by_date()
+    
+    def _load_cards_done(self, future, generation):
+        """Show the result of a background card load (runs on the UI thread)."""
+        if generation != self._load_generation:
+            return  # A newer load has been started since
+        
+        self._cards_loading = False
+        try:
+            self.filtered_cards = future.result()
+        except Exception as e:
+            debugPrint(f"Error loading cards: {e}")
+            self.filtered_cards = self.all_cards
+        
+        self._rebuild_items(self.search_box.text())
+    
+    def _rebuild_items(self, filter_text=""):
+        """Rebuild the list widget from the last loaded cards."""
         self.card_list.clear()
         
-        filtered_cards = self.get_filtered_cards_by_date()
+        filtered_cards = self.filtered_cards
         
         # Sort cards by last reviewed date (most recent first)
         sorted_cards = sorted(
@@ -2863,6 +3032,9 @@ class KanjiPracticeDialog(QDialog):
             reverse=True
         )
         
+        now = datetime.now()
+        now_ms = int(now.timestamp() * 1000)
+        
         for card_id, card_data in sorted_cards:
             front_text = card_data.get('frontText', '')
             
@@ -2870,14 +3042,17 @@ class KanjiPracticeDialog(QDialog):
             if filter_text and filter_text not in front_text:
                 continue
             
-            # Get last reviewed date
+            # Get last reviewed date (raw revlog milliseconds when available)
+            last_reviewed_ms = card_data.get('lastReviewedMs')
             last_reviewed = card_data.get('lastReviewed', None)
             review_text = ""
             
-            if last_reviewed:
+            if last_reviewed_ms is not None or last_reviewed:
                 try:
-                    review_date = datetime.fromisoformat(last_reviewed)
-                    days_ago = (datetime.now() - review_date).days
+                    if last_reviewed_ms is not None:
+                        days_ago = (now_ms - last_reviewed_ms) // 86_400_000
+                    else:
+                        days_ago = (now - datetime.fromisoformat(last_reviewed)).days
                     if days_ago == 0:
                         review_text = " - reviewed today"
                     elif days_ago == 1:
@@ -2912,8 +3087,10 @@ class KanjiPracticeDialog(QDialog):
             if days < 1:
                 days = 1
         
-        # Search for cards rated in the last N days
-        search_query = f"rated:{days} prop:reps>0"
+        # Search for cards rated in the last N days, optionally narrowed by a
+        # user-configured scope (deck/note type) so fewer cards are processed
+        scope = self.ai_config.search_scope.strip()
+        search_query = f"rated:{days} prop:reps>0 {scope}".strip()
         
         try:
             debugPrint(f"Searching with query: {search_query}")
@@ -2921,62 +3098,70 @@ class KanjiPracticeDialog(QDialog):
             card_ids = col.find_cards(search_query)
             debugPrint(f"Found {len(card_ids)} cards from rated search")
             
+            if not card_ids:
+                return {}
+            
             # Build filtered dict by getting card data directly from Anki
             filtered = {}
+            
+            # Bind hot-loop lookups to locals once
+            get_card = col.get_card
+            find_kanji = KANJI_REGEX.findall
+            find_hiragana = HIRAGANA_REGEX.findall
+            find_katakana = KATAKANA_REGEX.findall
+            debug = debugPrint
+            
+            # Pass 1: keep only cards whose question has Japanese characters
+            kept = []
             for card_id in card_ids:
                 try:
-                    card = col.get_card(card_id)
-                    note = card.note()
+                    card = get_card(card_id)
                     
                     # Get the question (front) of the card
                     question_html = card.question()
                     
                     # Extract Japanese characters
-                    found_kanji = KANJI_REGEX.findall(question_html)
-                    found_hiragana = HIRAGANA_REGEX.findall(question_html)
-                    found_katakana = KATAKANA_REGEX.findall(question_html)
+                    found_kanji = find_kanji(question_html)
+                    found_hiragana = find_hiragana(question_html)
+                    found_katakana = find_katakana(question_html)
                     
                     all_chars = found_kanji + found_hiragana + found_katakana
+                    if not all_chars:
+                        continue
                     
-                    if all_chars:
-                        unique_chars = list(dict.fromkeys(all_chars))
-                        front_text = "".join(unique_chars)
-                        
-                        card_id_str = str(card_id)
-                        
-                        # Get the actual last review date from the card's review history
-                        # card.id is in milliseconds, card.mod is last modified timestamp
-                        # We need to get from revlog
-                        revlog_entries = col.db.all(
-                            "SELECT id FROM revlog WHERE cid = ? ORDER BY id DESC LIMIT 1",
-                            card_id
-                        )
-                        
-                        if revlog_entries:
-                            # revlog.id is timestamp in milliseconds
-                            last_review_ms = revlog_entries[0][0]
-                            last_review_date = datetime.fromtimestamp(last_review_ms / 1000.0)
-                            last_reviewed = last_review_date.isoformat()
-                        else:
-                            last_reviewed = datetime.now().isoformat()
-                        
-                        # Check if we have it in CARD_STATS, otherwise create entry
-                        if card_id_str in self.all_cards:
-                            # Update with actual review date
-                            filtered[card_id_str] = {
-                                'frontText': front_text,
-                                'lastReviewed': last_reviewed
-                            }
-                        else:
-                            # Create new entry with card data from Anki
-                            filtered[card_id_str] = {
-                                'frontText': front_text,
-                                'lastReviewed': last_reviewed
-                            }
+                    unique_chars = list(dict.fromkeys(all_chars))
+                    kept.append((card_id, "".join(unique_chars)))
                 except Exception as e:
-                    debugPrint(f"Error processing card {card_id}: {e}")
+                    debug(f"Error processing card {card_id}: {e}")
                     continue
             
+            if not kept:
+                debugPrint("Filtered to 0 cards with Japanese characters")
+                return {}
+            
+            # Pass 2: fetch the last review time for all kept cards in one query
+            # (revlog.id is the review timestamp in milliseconds)
+            from anki.utils import ids2str
+            last_review_by_cid = dict(col.db.all(
+                f"SELECT cid, MAX(id) FROM revlog WHERE cid IN {ids2str(cid for cid, _ in kept)} GROUP BY cid"
+            ))
+            
+            now = datetime.now()
+            now_ms = int(now.timestamp() * 1000)
+            for card_id, front_text in kept:
+                last_review_ms = last_review_by_cid.get(card_id)
+                if last_review_ms is not None:
+                    last_reviewed = datetime.fromtimestamp(last_review_ms / 1000.0).isoformat()
+                else:
+                    last_review_ms = now_ms
+                    last_reviewed = now.isoformat()
+                
+                filtered[str(card_id)] = {
+                    'frontText': front_text,
+                    'lastReviewed': last_reviewed,
+                    'lastReviewedMs': last_review_ms
+                }
+            
             debugPrint(f"Filtered to {len(filtered)} cards with Japanese characters")
             return filtered
         except Exception as e:
@@ -3023,6 +3208,19 @@ class KanjiPracticeDialog(QDialog):
     
     def show_calendar_popup(self):
         """Show a popup calendar dialog for selecting a single date."""
+        if self._calendar_dialog is None:
+            self._calendar_dialog = self._build_calendar_dialog()
+        
+        # Start from today on every open
+        from aqt.qt import QDate
+        today = QDate.currentDate()
+        self._calendar.setMaximumDate(today)  # Can't select future dates
+        self._calendar.setSelectedDate(today)
+        
+        self._calendar_dialog.exec()
+    
+    def _build_calendar_dialog(self):
+        """Create the calendar popup dialog once; it is reused on later opens."""
         dialog = QDialog(self)
         dialog.setWindowTitle("Select Date")
         dialog.setModal(True)
@@ -3033,9 +3231,8 @@ class KanjiPracticeDialog(QDialog):
         info.setStyleSheet("padding: 10px; background-color: #4CAF50; border-radius: 3px;")
         layout.addWidget(info)
         
-        calendar = QCalendarWidget()
-        calendar.setMaximumDate(calendar.selectedDate())  # Can't select future dates
-        layout.addWidget(calendar)
+        self._calendar = QCalendarWidget()
+        layout.addWidget(self._calendar)
         
         btn_layout = QHBoxLayout()
         ok_btn = QPushButton("OK")
@@ -3047,46 +3244,49 @@ class KanjiPracticeDialog(QDialog):
         
         dialog.setLayout(layout)
         
-        def on_ok():
-            selected_date = calendar.selectedDate()
-            self.date_range_start = datetime(selected_date.year(), selected_date.month(), selected_date.day())
-            days_ago = (datetime.now() - self.date_range_start).days
-            day_text = "day" if days_ago == 1 else "days"
-            self.date_range_label.setText(f"Showing cards reviewed from {self.date_range_start.strftime('%Y-%m-%d')} to today ({days_ago} {day_text})")
-            self.date_range_label.setVisible(True)
-            self.populate_card_list(self.search_box.text())
-            dialog.accept()
-        
-        def on_cancel():
-            # Reset to "All time"
-            self.time_range_combo.setCurrentText("All time")
-            dialog.reject()
-        
-        ok_btn.clicked.connect(on_ok)
-        cancel_btn.clicked.connect(on_cancel)
+        ok_btn.clicked.connect(self._on_calendar_ok)
+        cancel_btn.clicked.connect(self._on_calendar_cancel)
         
-        dialog.exec()
+        return dialog
+    
+    def _on_calendar_ok(self):
+        """Apply the date picked in the calendar popup."""
+        selected_date = self._calendar.selectedDate()
+        self.date_range_start = datetime(selected_date.year(), selected_date.month(), selected_date.day())
+        days_ago = (datetime.now() - self.date_range_start).days
+        day_text = "day" if days_ago == 1 else "days"
+        self.date_range_label.setText(f"Showing cards reviewed from {self.date_range_start.strftime('%Y-%m-%d')} to today ({days_ago} {day_text})")
+        self.date_range_label.setVisible(True)
+        self.populate_card_list(self.search_box.text())
+        self._calendar_dialog.accept()
+    
+    def _on_calendar_cancel(self):
+        """Dismiss the calendar popup and fall back to "All time"."""
+        self.time_range_combo.setCurrentText("All time")
+        self._calendar_dialog.reject()
     
     def on_source_changed(self, index):
         """Handle sentence source selection change."""
-        if index == 0:
-            self.sentence_source = "fields"
-        else:
-            self.sentence_source = "ai"
+        self.sentence_source = "ai" if index == _SOURCE_INDEX["ai"] else "fields"
         
         # Save selection to config
-        self.ai_config['sentence_source'] = self.sentence_source
+        self.ai_config.sentence_source = self.sentence_source
         save_ai_config(self.ai_config)
     
     def open_ai_config(self):
         """Open AI configuration dialog."""
         dialog = AIConfigDialog(self.ai_config, self)
         if dialog.exec():
+            old_scope = self.ai_config.search_scope
             self.ai_config = dialog.get_config()
+            if self.ai_config.search_scope != old_scope:
+                self.populate_card_list(self.search_box.text())
     
     def filter_cards(self, text):
         """Filter card list based on search text."""
-        self.populate_card_list(text)
+        if self._cards_loading:
+            return  # Applied when the current load finishes
+        self._rebuild_items(text)
     
     def select_all(self):
         """Select all visible items."""
@@ -3332,6 +3532,176 @@ def inject_drawing_canvas_to_webview(webview):
     webview.eval(js)
 
 
+# AI feedback cache: (api_url, model, instructions, (pdf_path, pdf_mtime) or None, english, accepted,
+# submitted, original_kanji) -> (timestamp, feedback)
+FEEDBACK_CACHE_MAX_ENTRIES = 512
+FEEDBACK_CACHE_TTL = 24 * 60 * 60  # Seconds before a cached feedback is fetched again
+_FEEDBACK_CACHE = OrderedDict()
+_FEEDBACK_CACHE_LOCK = threading.Lock()
+
+def get_cached_feedback(key):
+    """Return cached feedback for key, or None if missing or expired."""
+    with _FEEDBACK_CACHE_LOCK:
+        entry = _FEEDBACK_CACHE.get(key)
+        if entry is None:
+            return None
+        timestamp, feedback = entry
+        if time.monotonic() - timestamp > FEEDBACK_CACHE_TTL:
+            del _FEEDBACK_CACHE[key]
+            return None
+        _FEEDBACK_CACHE.move_to_end(key)
+        return feedback
+
+def store_cached_feedback(key, feedback):
+    """Store feedback for key, evicting the least recently used entry when full."""
+    with _FEEDBACK_CACHE_LOCK:
+        _FEEDBACK_CACHE[key] = (time.monotonic(), feedback)
+        _FEEDBACK_CACHE.move_to_end(key)
+        while len(_FEEDBACK_CACHE) > FEEDBACK_CACHE_MAX_ENTRIES:
+            _FEEDBACK_CACHE.popitem(last=False)
+
+
+@lru_cache(maxsize=256)
+def get_highlight_patterns(original_kanji):
+    """Compile the ruby-tag and plain-text highlight patterns for a vocabulary word."""
+    escaped_kanji = re.escape(original_kanji)
+    ruby_pattern = re.compile(f'(<ruby>)({escaped_kanji})(<rt>[^<]+</rt></ruby>)')
+    plain_pattern = re.compile(f'(?<!>)(?<!<rt>)({escaped_kanji})(?!<)(?!</rt>)')
+    return ruby_pattern, plain_pattern
+
+
+# Completion screen markup; only the score, message, summary and confetti are filled in per session
+COMPLETION_HTML_TEMPLATE = Template("""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <style>
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", system-ui, sans-serif;
+            padding: 40px;
+            text-align: center;
+            max-width: 800px;
+            margin: 0 auto;
+        }
+        h1 {
+            font-size: 48px;
+            margin-bottom: 20px;
+            color: $title_color;
+        }
+        .score {
+            font-size: 64px;
+            font-weight: bold;
+            margin: 30px 0;
+            color: $score_color;
+        }
+        .message {
+            font-size: 24px;
+            margin: 20px 0;
+            color: #666;
+        }
+        .summary {
+            background-color: #2196F3;
+            border-left: 4px solid #1976D2;
+            padding: 20px;
+            margin: 30px 0;
+            text-align: left;
+            border-radius: 4px;
+            color: #ffffff;
+        }
+        .summary h2 {
+            margin-top: 0;
+            color: #ffffff;
+        }
+        .summary strong {
+            color: #00f5d5;
+        }
+        .buttons {
+            margin-top: 40px;
+        }
+        button {
+            background-color: #4CAF50;
+            color: white;
+            padding: 15px 30px;
+            font-size: 18px;
+            border: none;
+            border-radius: 5px;
+            cursor: pointer;
+            margin: 0 10px;
+        }
+        button:hover {
+            background-color: #45a049;
+        }
+        ruby {
+            font-size: 18px;
+        }
+        rt {
+            font-size: 12px;
+        }
+    </style>
+</head>
+<body>
+    <h1>$heading</h1>
+    <div class="score">$correct/$total</div>
+    <div class="message">
+        $message
+    </div>
+    
+    $summary_block
+    
+    <div class="buttons">
+        <button onclick="pycmd('prevCard')">← Back to Cards</button>
+        <button onclick="pycmd('closePractice')">Close</button>
+    </div>
+    
+    <canvas id="confetti-canvas" style="position: fixed; top: 0; left: 0; width: 100%; height: 100%; pointer-events: none; z-index: 9999;"></canvas>
+    
+    $confetti_block
+</body>
+</html>
+""")
+
+COMPLETION_SUMMARY_TEMPLATE = Template("""
+    <div class="summary">
+        <h2>📚 Areas to Focus On</h2>
+        <div id="summary-content">$summary</div>
+    </div>
+""")
+
+# Confetti library (web/confetti.js, cached by the web view) plus its start-up script,
+# only added to perfect-score screens
+COMPLETION_CONFETTI_HTML = f'<script src="{WEB_BASE_URL}/confetti.js"></script>\n' + """
+<script>
+// Trigger confetti animation
+console.log('Initializing confetti for perfect score');
+setTimeout(function() {
+    try {
+        const canvas = document.getElementById('confetti-canvas');
+        console.log('Canvas element:', canvas);
+        const jsConfetti = new JSConfetti({canvas: canvas});
+        console.log('JSConfetti initialized:', jsConfetti);
+        
+        jsConfetti.addConfetti({
+            emojis: ['🎉', '✨', '🎊', '🌟'],
+            emojiSize: 50,
+            confettiNumber: 100,
+        });
+        
+        // Add more confetti bursts
+        setTimeout(function() {
+            jsConfetti.addConfetti({
+                confettiColors: ['#4CAF50', '#45a049', '#66BB6A', '#81C784'],
+                confettiNumber: 150,
+            });
+        }, 300);
+    } catch(e) {
+        console.error('Confetti error:', e);
+    }
+}, 100);
+</script>
+"""
+
+
 class KanjiPracticeWindow(QDialog):
     """Separate window for kanji practice."""
     
@@ -3357,6 +3727,32 @@ class KanjiPracticeWindow(QDialog):
         self.correct_cards = set()   # Set of card indices that were correct
         self.on_completion_screen = False  # Track if we're showing completion screen
         self.completion_summary = None  # Cache AI summary for the session
+        self._summary_pending = False  # AI summary request running in the background
+        
+        # Page markup and sentences per card index, so revisiting a card skips the rebuild
+        self._card_page_cache = {}
+        # True while the web view shows the practice page, so card changes can update it in place
+        self._practice_page_loaded = False
+        # Stroke count per character whose ghost strokes the current page has cached
+        self._ghost_stroke_counts = {}
+        self._closed = False  # Set in closeEvent so background results are dropped
+        self._ocr_generation = 0  # Incremented per drawing submission to drop superseded results
+        self._http = requests.Session()  # Keep-alive connection reused across AI requests
+        
+        # JS -> Python message dispatch: exact messages, then "prefix:payload" messages
+        self._message_actions = {
+            "nextCard": self.next_card,
+            "prevCard": self.prev_card,
+            "closePractice": self.close,
+            "finishPractice": self.show_completion_screen,
+        }
+        self._message_handlers = {
+            "charRecognized": self.on_char_recognized,
+            "recognizeDrawing": self.on_recognize_drawing,
+            "lookupKanji": self.on_lookup_kanji,
+            "saveCache": self.on_save_cache,
+            "getFeedback": self.on_get_feedback,
+        }
         
         self.setWindowTitle("Kanji Practice")
         self.setMinimumSize(900, 700)
@@ -3391,101 +3787,18 @@ class KanjiPracticeWindow(QDialog):
         try:
             # print(f"[KanjiPracticeWindow] Received message: {message}")
             
-            if message.startswith("charRecognized:"):
-                char = message.split(":", 1)[1]
-                print(f"[KanjiPracticeWindow] Character recognized: {char}")
-                return (True, None)
-            
-            elif message.startswith("recognizeDrawing:"):
-                # Format: recognizeDrawing:<base64_image_data>
-                image_data = message.split(":", 1)[1]
-                print(f"[KanjiPracticeWindow] Recognizing drawing...")
-                
-                text, confidence, all_results = recognize_handwriting(image_data)
-                
-                if text:
-                    # Send results back to JavaScript
-                    result_data = {
-                        'text': text,
-                        'confidence': confidence,
-                        'alternatives': [{'text': t, 'conf': c} for t, c in all_results[:5]]
-                    }
-                    result_json = json.dumps(result_data, ensure_ascii=False)
-                    self.web.eval(f"window.handleOCRResult({result_json});")
-                else:
-                    self.web.eval("window.handleOCRResult(null);")
-                
-                return (True, None)
-            
-            elif message.startswith("lookupKanji:"):
-                char = message.split(":", 1)[1]
-                print(f"[KanjiPracticeWindow] Looking up kanji: {char}")
-                self.inject_kanji_strokes(char)
-                return (True, None)
-            
-            elif message == "nextCard":
-                self.next_card()
-                return (True, None)
-            
-            elif message == "prevCard":
-                self.prev_card()
-                return (True, None)
-            
-            elif message == "closePractice":
-                self.close()
-                return (True, None)
-            
-            elif message == "finishPractice":
-                self.show_completion_screen()
+            # Messages without a payload, e.g. "nextCard"
+            action = self._message_actions.get(message)
+            if action is not None:
+                action()
                 return (True, None)
             
-            elif message.startswith('saveCache:'):
-                try:
-                    cache_data = json.loads(message.split(':', 1)[1])
-                    card_idx = cache_data.get('cardIndex')
-                    if card_idx is not None:
-                        self.card_cache[card_idx] = {
-                            'answer': cache_data.get('answer', ''),
-                            'feedback': cache_data.get('feedback', ''),
-                            'feedbackClass': cache_data.get('feedbackClass', '')
-                        }
-                        debugPrint(f"Cached data for card {card_idx}")
-                        
-                        # Track answered and correct cards
-                        if cache_data.get('feedback'):
-                            self.answered_cards.add(card_idx)
-                            if cache_data.get('feedbackClass') == 'result correct':
-                                self.correct_cards.add(card_idx)
-                except Exception as e:
-                    debugPrint(f"Error saving cache: {e}")
+            # Messages of the form "prefix:payload"
+            prefix, _, payload = message.partition(":")
+            handler = self._message_handlers.get(prefix)
+            if handler is not None:
+                handler(payload)
                 return (True, None)
-            
-            elif message.startswith("getFeedback:"):
-                # Format: getFeedback:{"english":"...","accepted":"...","submitted":"...","originalKanji":"..."}
-                try:
-                    feedback_data = json.loads(message.split(":", 1)[1])
-                    english = feedback_data.get('english', '')
-                    accepted = feedback_data.get('accepted', '')
-                    submitted = feedback_data.get('submitted', '')
-                    original_kanji = feedback_data.get('originalKanji', '')
-                    
-                    print(f"[KanjiPracticeWindow] Getting feedback for: '{submitted}' vs '{accepted}'")
-                    
-                    # Get AI feedback
-                    feedback = self.get_ai_feedback(english, accepted, submitted, original_kanji)
-                    
-                    if feedback:
-                        # Send feedback back to JavaScript
-                        feedback_json = json.dumps(feedback, ensure_ascii=False)
-                        self.web.eval(f"window.handleFeedback({feedback_json});")
-                    else:
-                        self.web.eval("window.handleFeedback(null);")
-                    
-                    return (True, None)
-                except Exception as e:
-                    print(f"[KanjiPracticeWindow] Error processing feedback request: {e}")
-                    self.web.eval("window.handleFeedback(null);")
-                    return (True, None)
                 
         except Exception as e:
             print(f"[KanjiPracticeWindow] Error handling message: {e}")
@@ -3509,25 +3822,160 @@ class KanjiPracticeWindow(QDialog):
         
         return (handled, None)
     
-    def get_ai_feedback(self, english, accepted, submitted, original_kanji=''):
-        """Get AI feedback on the submitted answer."""
+    def on_char_recognized(self, char):
+        """Handle charRecognized:<char>."""
+        print(f"[KanjiPracticeWindow] Character recognized: {char}")
+    
+    def on_recognize_drawing(self, image_data):
+        """Handle recognizeDrawing:<base64_image_data>."""
+        print(f"[KanjiPracticeWindow] Recognizing drawing...")
+        
+        # Recognize off the UI thread; only the latest submission's result is shown
+        self._ocr_generation += 1
+        generation = self._ocr_generation
+        mw.taskman.run_in_background(
+            task=lambda: recognize_handwriting(image_data),
+            on_done=lambda future: self._on_recognize_done(future, generation)
+        )
+    
+    def _on_recognize_done(self, future, generation):
+        """Send handwriting recognition results from the background task to JavaScript."""
+        if self._closed or generation != self._ocr_generation:
+            # Window closed or a newer drawing was submitted meanwhile
+            return
+        
         try:
-            # Load AI config
-            ai_config = load_ai_config()
-            api_key = ai_config.get('api_key', '')
-            api_url = ai_config.get('api_url') or 'https://openrouter.ai/api/v1/chat/completions'
-            model = ai_config.get('model') or 'google/gemini-2.5-flash'
-            feedback_instructions = ai_config.get('feedback_instructions', '')
-            pdf_path = ai_config.get('pdf_path', '')
-            use_pdf = ai_config.get('use_pdf_in_feedback', True)
-            
-            if not api_key:
-                debugPrint("AI feedback not available - API key not configured")
-                return None
-            
-            debugPrint(f"Using API key: {api_key[:10]}... (length: {len(api_key)})")
-            debugPrint(f"API URL: {api_url}")
-            debugPrint(f"Model: {model}")
+            text, confidence, all_results = future.result()
+        except Exception as e:
+            print(f"[KanjiPracticeWindow] Error recognizing drawing: {e}")
+            text, confidence, all_results = None, 0, []
+        
+        if text:
+            # Send results back to JavaScript
+            result_data = {
+                'text': text,
+                'confidence': confidence,
+                'alternatives': [{'text': t, 'conf': c} for t, c in all_results[:5]]
+            }
+            result_json = dumps_json(result_data)
+            self.web.eval(f"window.handleOCRResult({result_json});")
+        else:
+            self.web.eval("window.handleOCRResult(null);")
+    
+    def on_lookup_kanji(self, char):
+        """Handle lookupKanji:<char>."""
+        print(f"[KanjiPracticeWindow] Looking up kanji: {char}")
+        self.inject_kanji_strokes(char)
+    
+    def on_save_cache(self, payload):
+        """Handle saveCache:{"cardIndex":...,"answer":"...","feedback":"...","feedbackClass":"..."}."""
+        try:
+            cache_data = loads_json(payload)
+            card_idx = cache_data.get('cardIndex')
+            if card_idx is not None:
+                entry = {
+                    'answer': cache_data.get('answer', ''),
+                    'feedback': cache_data.get('feedback', ''),
+                    'feedbackClass': cache_data.get('feedbackClass', '')
+                }
+                if self.card_cache.get(card_idx) == entry:
+                    return  # Same answer and feedback resubmitted - nothing changed
+                self.card_cache[card_idx] = entry
+                debugPrint(f"Cached data for card {card_idx}")
+                
+                # Track answered and correct cards
+                if entry['feedback']:
+                    self.answered_cards.add(card_idx)
+                    if entry['feedbackClass'] == 'result correct':
+                        self.correct_cards.add(card_idx)
+        except Exception as e:
+            debugPrint(f"Error saving cache: {e}")
+    
+    def on_get_feedback(self, payload):
+        """Handle getFeedback:{"english":"...","accepted":"...","submitted":"...","originalKanji":"..."}."""
+        try:
+            feedback_data = loads_json(payload)
+            english = feedback_data.get('english', '')
+            accepted = feedback_data.get('accepted', '')
+            submitted = feedback_data.get('submitted', '')
+            original_kanji = feedback_data.get('originalKanji', '')
+            
+            print(f"[KanjiPracticeWindow] Getting feedback for: '{submitted}' vs '{accepted}'")
+            
+            # Get AI feedback off the UI thread so drawing and navigation stay responsive,
+            # streaming partial text to the page as it arrives
+            card_index = self.current_index
+            
+            def on_delta(text):
+                mw.taskman.run_on_main(lambda: self._on_feedback_delta(text, card_index))
+            
+            mw.taskman.run_in_background(
+                task=lambda: self.get_ai_feedback(english, accepted, submitted, original_kanji, on_delta=on_delta),
+                on_done=lambda future: self._on_feedback_done(future, card_index)
+            )
+        except Exception as e:
+            print(f"[KanjiPracticeWindow] Error processing feedback request: {e}")
+            self.web.eval("window.handleFeedback(null);")
+    
+    def _on_feedback_delta(self, text, card_index):
+        """Append a streamed piece of AI feedback to the page."""
+        if self._closed or card_index != self.current_index:
+            return
+        self.web.eval(f"window.appendFeedback({dumps_json(text)});")
+    
+    def _on_feedback_done(self, future, card_index):
+        """Send AI feedback from the background request back to JavaScript."""
+        if self._closed or card_index != self.current_index:
+            # Window closed or user moved to another card while waiting
+            return
+        
+        try:
+            feedback = future.result()
+        except Exception as e:
+            print(f"[KanjiPracticeWindow] Error processing feedback request: {e}")
+            feedback = None
+        
+        if feedback:
+            feedback_json = dumps_json(feedback)
+            self.web.eval(f"window.handleFeedback({feedback_json});")
+        else:
+            self.web.eval("window.handleFeedback(null);")
+    
+    def get_ai_feedback(self, english, accepted, submitted, original_kanji='', on_delta=None):
+        """Get AI feedback on the submitted answer.
+        
+        If on_delta is given, the response is streamed and on_delta is called
+        with each piece of text as it arrives (from the calling thread).
+        """
+        try:
+            # Load AI config
+            ai_config = load_ai_config()
+            api_key = ai_config.api_key
+            api_url = ai_config.api_url or 'https://openrouter.ai/api/v1/chat/completions'
+            model = ai_config.model or 'google/gemini-2.5-flash'
+            feedback_instructions = ai_config.feedback_instructions
+            pdf_path = ai_config.pdf_path
+            use_pdf = ai_config.use_pdf_in_feedback
+            
+            if not api_key:
+                debugPrint("AI feedback not available - API key not configured")
+                return None
+            
+            # Reuse feedback for an identical retry instead of calling the API again. The key holds
+            # every prompt input and the endpoint; the reference PDF counts by path and mtime.
+            pdf_reference = None
+            if use_pdf and pdf_path and os.path.exists(pdf_path):
+                pdf_reference = (pdf_path, os.path.getmtime(pdf_path))
+            cache_key = (api_url, model, feedback_instructions, pdf_reference,
+                         english, accepted, submitted, original_kanji)
+            cached_feedback = get_cached_feedback(cache_key)
+            if cached_feedback is not None:
+                debugPrint(f"Using cached AI feedback for: '{submitted}' vs '{accepted}'")
+                return cached_feedback
+            
+            debugPrint(f"Using API key: {api_key[:10]}... (length: {len(api_key)})")
+            debugPrint(f"API URL: {api_url}")
+            debugPrint(f"Model: {model}")
             
             # Build prompt
             prompt = f"""English: {english}
@@ -3545,7 +3993,7 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
                 prompt += f"\n\nAdditional instructions:\n{feedback_instructions}"
             
             # Read PDF content if provided and enabled
-            if use_pdf and pdf_path and os.path.exists(pdf_path):
+            if pdf_reference:
                 try:
                     import PyPDF2
                     with open(pdf_path, 'rb') as pdf_file:
@@ -3574,67 +4022,73 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
                     }
                 ]
             }
+            if on_delta:
+                payload["stream"] = True
             
             debugPrint(f"Requesting AI feedback for: '{submitted}' vs '{accepted}'")
             
-            # Make API request
-            request = urllib.request.Request(
-                api_url,
-                data=json.dumps(payload).encode('utf-8'),
-                headers=headers
-            )
-            
-            with urllib.request.urlopen(request, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
+            # Make API request over the window's keep-alive session
+            feedback = None
+            with self._http.post(api_url, json=payload, headers=headers, timeout=30, stream=bool(on_delta)) as response:
+                response.raise_for_status()
+                if on_delta:
+                    # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+                    parts = []
+                    for raw_line in response.iter_lines(chunk_size=None):
+                        line = raw_line.decode('utf-8').strip()
+                        if not line.startswith('data:'):
+                            continue  # Blank separators and keep-alive comments
+                        data = line[5:].strip()
+                        if data == '[DONE]':
+                            break
+                        chunk = json.loads(data)
+                        if not chunk.get('choices'):
+                            continue
+                        delta = chunk['choices'][0].get('delta', {}).get('content')
+                        if delta:
+                            parts.append(delta)
+                            on_delta(delta)
+                    if parts:
+                        feedback = ''.join(parts).strip()
+                else:
+                    result = response.json()
+                    if result.get('choices') and len(result['choices']) > 0:
+                        feedback = result['choices'][0]['message']['content'].strip()
             
             # Extract feedback
-            if result.get('choices') and len(result['choices']) > 0:
-                feedback = result['choices'][0]['message']['content'].strip()
+            if feedback:
                 debugPrint(f"AI feedback: {feedback[:100]}...")
                 
                 # Highlight the original card kanji with color #00f5d5 in the feedback
                 if original_kanji:
-                    import re
-                    
                     # First convert furigana format to HTML ruby tags
                     # Pattern: 漢字[かんじ] -> <ruby>漢字<rt>かんじ</rt></ruby>
-                    feedback = re.sub(
-                        r'([一-龯ぁ-ゔァ-ヴー々〆〤]+)\[([ぁ-んァ-ヴー]+)\]',
-                        r'<ruby>\1<rt>\2</rt></ruby>',
-                        feedback
-                    )
+                    feedback = FURIGANA_REGEX.sub(r'<ruby>\1<rt>\2</rt></ruby>', feedback)
                     
                     # Now highlight kanji within ruby tags
                     # Pattern: <ruby>漢字<rt>reading</rt></ruby> -> <span style="color: #00f5d5"><ruby>漢字<rt>reading</rt></ruby></span>
-                    escaped_kanji = re.escape(original_kanji)
+                    ruby_pattern, plain_pattern = get_highlight_patterns(original_kanji)
                     
                     # Replace entire ruby tag containing the kanji
-                    feedback = re.sub(
-                        f'(<ruby>)({escaped_kanji})(<rt>[^<]+</rt></ruby>)',
-                        r'<span style="color: #00f5d5">\1\2\3</span>',
-                        feedback
-                    )
+                    feedback = ruby_pattern.sub(r'<span style="color: #00f5d5">\1\2\3</span>', feedback)
                     
                     # Also handle plain kanji (not in ruby tags) - use span with color instead of bold
                     # Avoid kanji already in span tags
-                    feedback = re.sub(
-                        f'(?<!>)(?<!<rt>)({escaped_kanji})(?!<)(?!</rt>)',
-                        r'<span style="color: #00f5d5">\1</span>',
-                        feedback
-                    )
+                    feedback = plain_pattern.sub(r'<span style="color: #00f5d5">\1</span>', feedback)
                 
+                store_cached_feedback(cache_key, feedback)
                 return feedback
             
             return None
             
-        except urllib.error.HTTPError as e:
-            if e.code == 401:
+        except requests.HTTPError as e:
+            if e.response.status_code == 401:
                 debugPrint(f"Error getting AI feedback: HTTP 401 Unauthorized")
                 debugPrint(f"Your API key may be invalid or expired. Please check your configuration.")
                 debugPrint(f"API URL: {api_url}")
                 return "⚠️ **API Authentication Error**: Your API key appears to be invalid or expired. Please check your AI configuration settings."
             else:
-                debugPrint(f"Error getting AI feedback: HTTP Error {e.code}: {e.reason}")
+                debugPrint(f"Error getting AI feedback: HTTP Error {e.response.status_code}: {e.response.reason}")
                 import traceback
                 traceback.print_exc()
                 return None
@@ -3646,6 +4100,103 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
     
     def load_current_card(self):
         """Load the current card into the web view."""
+        # Reuse the sentence and page markup from an earlier visit to this card
+        page = self._card_page_cache.get(self.current_index)
+        if page is None:
+            page = self.build_card_page()
+            self._card_page_cache[self.current_index] = page
+        html, english, japanese, original_kanji = page
+        
+        # Get cached data for this card from Python
+        cached = self.card_cache.get(self.current_index, {})
+        
+        # The practice page is already showing: swap the card in place instead of reloading it
+        if self._practice_page_loaded:
+            card = {
+                'index': self.current_index,
+                'total': len(self.card_data_list),
+                'english': english,
+                'japanese': japanese,
+                'originalKanji': original_kanji,
+                'answeredCards': list(self.answered_cards),
+                'cache': cached
+            }
+            self.web.eval(f"window.showCard({dumps_json(card)});")
+            return
+        
+        # Inject card data into JavaScript
+        card_data_js = f"""
+        <script>
+        window.cardEnglish = {dumps_json(english)};
+        window.cardJapanese = {dumps_json(japanese)};
+        window.cardOriginalKanji = {dumps_json(original_kanji)};
+        window.currentCardIndex = {self.current_index};
+        window.totalCards = {len(self.card_data_list)};
+        window.answeredCards = {dumps_json(list(self.answered_cards))};
+        
+        // Function to update Next button to Finish button when appropriate
+        window.updateNextButton = function() {{
+            var nextButton = document.getElementById('next-button');
+            if (!nextButton) return;
+            
+            // Check if we're on last card and all cards are answered
+            var isLastCard = window.currentCardIndex >= window.totalCards - 1;
+            var allAnswered = window.answeredCards.length >= window.totalCards;
+            
+            if (isLastCard && allAnswered) {{
+                // Convert to Finish button
+                nextButton.textContent = 'Finish';
+                nextButton.className = 'btn-primary';
+                nextButton.onclick = function() {{ pycmd('finishPractice'); }};
+                nextButton.disabled = false;
+            }} else if (isLastCard) {{
+                // On last card but not all answered - keep disabled
+                nextButton.disabled = true;
+            }} else {{
+                // Not on last card - keep as Next Card, enabled
+                nextButton.textContent = 'Next Card';
+                nextButton.className = '';
+                nextButton.onclick = function() {{ pycmd('nextCard'); }};
+                nextButton.disabled = false;
+            }}
+        }};
+        
+        // Restore cached answer and feedback for this card from Python cache
+        setTimeout(function() {{
+            var cache = {dumps_json(cached)};
+            if (cache && Object.keys(cache).length > 0) {{
+                var input = document.getElementById('japanese-input');
+                var result = document.getElementById('result');
+                if (input && cache.answer !== undefined && cache.answer !== '') {{
+                    input.value = cache.answer;
+                }}
+                if (result && cache.feedback !== undefined && cache.feedback !== '') {{
+                    result.innerHTML = cache.feedback;
+                    result.className = cache.feedbackClass || 'result';
+                    result.style.display = 'block';
+                }}
+            }}
+            
+            // Update button state on page load
+            window.updateNextButton();
+        }}, 100);
+        </script>
+        """
+        
+        full_html = html + card_data_js + f'<script src="{WEB_BASE_URL}/practice.js"></script>'
+        
+        # New page, so its ghost stroke cache starts empty (a fresh dict, so callbacks
+        # still pending from the old page cannot mark characters on this one)
+        self._ghost_stroke_counts = {}
+        self.web.stdHtml(full_html, css=[], js=[])
+        self._practice_page_loaded = True
+    
+    def build_card_page(self):
+        """Build the sentence and static page markup for the current card.
+        
+        Returns:
+            Tuple of (html, english, japanese, original_kanji)
+        """
         current_card = self.card_data_list[self.current_index]
         fields = current_card['fields']
         
@@ -3713,1354 +4264,109 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
                     english = "(No kanji found for AI generation)"
         else:
             # Use field-based sentences
-            japanese = fields.get('Expression', fields.get('Sentence-Japanese', fields.get('Japanese', '')))
-            if not japanese:
-                for key in fields:
-                    if 'japanese' in key.lower() or 'expression' in key.lower():
-                        japanese = fields[key]
-                        break
-            if not japanese:
-                japanese = ''
-            
-            # Get English from field
-            english = fields.get('Sentence-English', fields.get('English', ''))
-            if not english:
-                for key in fields:
-                    if 'english' in key.lower():
-                        english = fields[key]
-                        break
-            if not english:
-                english = "(No English sentence found in card)"
-        
-        # Trim whitespace from accepted answer
-        japanese = japanese.strip()
-        
-        # Build HTML for practice interface
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{
-                    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", system-ui, sans-serif;
-                    padding: 20px;
-                    max-width: 900px;
-                    margin: 0 auto;
-                }}
-                .progress {{
-                    padding: 10px;
-                    background-color: #2196F3;
-                    color: white;
-                    font-weight: bold;
-                    border-radius: 5px;
-                    margin-bottom: 15px;
-                }}
-                .english {{
-                    padding: 15px;
-                    font-size: 16px;
-                    background-color: #e8e8e8;
-                    border-radius: 5px;
-                    margin: 10px 0;
-                    color: #000;
-                }}
-                .input-group {{
-                    border: 1px solid #ddd;
-                    padding: 15px;
-                    border-radius: 5px;
-                    margin: 10px 0 25px 0;
-                }}
-                input[type="text"] {{
-                    width: 100%;
-                    font-size: 14px;
-                    padding: 6px 10px;
-                    border: 1px solid #ccc;
-                    border-radius: 3px;
-                    font-family: 'Yu Gothic', 'MS Gothic', sans-serif;
-                    line-height: 1.4;
-                    height: auto;
-                    box-sizing: border-box;
-                }}
-                .dict-group {{
-                    border: 1px solid #ddd;
-                    padding: 15px;
-                    border-radius: 5px;
-                    margin: 10px 0;
-                }}
-                .dict-search {{
-                    display: flex;
-                    gap: 10px;
-                    align-items: center;
-                    margin-bottom: 10px;
-                }}
-                .dict-search input {{
-                    flex: 1;
-                    font-family: 'Yu Gothic', 'MS Gothic', sans-serif;
-                    font-size: 14px;
-                    padding: 6px 10px;
-                }}
-                .status {{
-                    padding: 8px;
-                    font-weight: bold;
-                    border-radius: 3px;
-                    margin: 10px 0;
-                    display: none;
-                }}
-                .canvas-group {{
-                    border: 1px solid #ddd;
-                    padding: 15px;
-                    border-radius: 5px;
-                    margin: 10px 0;
-                    text-align: center;
-                }}
-                .canvas-info {{
-                    color: #666;
-                    font-style: italic;
-                    padding: 5px;
-                    margin-bottom: 10px;
-                }}
-                .controls {{
-                    display: flex;
-                    gap: 10px;
-                    justify-content: center;
-                    margin: 10px 0;
-                }}
-                .btn-primary {{
-                    background-color: #4CAF50;
-                    color: white;
-                    padding: 8px 16px;
-                    border: none;
-                    border-radius: 3px;
-                    cursor: pointer;
-                    font-weight: bold;
-                }}
-                .btn-primary:hover {{
-                    background-color: #45a049;
-                }}
-                .result {{
-                    padding: 15px;
-                    font-size: 14px;
-                    border-radius: 5px;
-                    margin: 10px 0;
-                    display: none;
-                    line-height: 1.6;
-                }}
-                .result.correct {{
-                    background-color: #4CAF50;
-                    color: white;
-                    border: 2px solid #45a049;
-                }}
-                .result.incorrect {{
-                    background-color: #2196F3;
-                    color: white;
-                    border: 2px solid #1976D2;
-                }}
-                .result h1, .result h2, .result h3 {{
-                    margin-top: 0.5em;
-                    margin-bottom: 0.5em;
-                }}
-                .result ul, .result ol {{
-                    margin-left: 20px;
-                }}
-                .result code {{
-                    background-color: rgba(0,0,0,0.05);
-                    padding: 2px 4px;
-                    border-radius: 3px;
-                    font-family: 'Courier New', monospace;
-                }}
-                .result strong {{
-                    color: #00f5d5;
-                    font-weight: bold;
-                }}
-                .nav-controls {{
-                    display: flex;
-                    gap: 10px;
-                    justify-content: center;
-                    margin-top: 20px;
-                    padding-top: 15px;
-                    border-top: 1px solid #ddd;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="progress">Card {self.current_index + 1} of {len(self.card_data_list)}</div>
-            <div class="english">{english}</div>
-            
-            <div class="input-group">
-                <label><b>Your Answer</b></label>
-                <input type="text" id="japanese-input" placeholder="Type or draw Japanese characters...">
-            </div>
-            
-            <div class="dict-group">
-                <label><b>Dictionary Lookup</b></label>
-                <div class="dict-search">
-                    <span>Search kanji:</span>
-                    <input type="text" id="dict-search" placeholder="Enter word/kanji to practice...">
-                    <button onclick="lookupDictionary()">Look Up</button>
-                </div>
-            </div>
-            
-            <div class="status" id="status"></div>
-            
-            <div class="canvas-group">
-                <div class="canvas-info" id="canvas-info">Free drawing mode - draw any character</div>
-                <div id="canvas-container"></div>
-                <div class="controls">
-                    <button onclick="window.undoStroke()" id="undo-btn" disabled>← Undo</button>
-                    <button onclick="window.redoStroke()" id="redo-btn" disabled>→ Redo</button>
-                    <button onclick="window.submitDrawing()">Submit Drawing</button>
-                    <button onclick="window.clearCanvas()">Clear Canvas</button>
-                </div>
-            </div>
-            
-            <div class="controls">
-                <button class="btn-primary" onclick="submitAnswer()">Submit Answer</button>
-                <button onclick="skipCard()">Skip</button>
-            </div>
-            
-            <div class="result" id="result"></div>
-            
-            <div class="nav-controls">
-                <button onclick="pycmd('prevCard')" {"disabled" if self.current_index == 0 else ""}>Previous Card</button>
-                <button id="next-button" onclick="pycmd('nextCard')" {"disabled" if self.current_index >= len(self.card_data_list) - 1 else ""}>Next Card</button>
-                <button onclick="pycmd('closePractice')">Close Practice</button>
-            </div>
-        </body>
-        </html>
-        """
-        
-        # Add JavaScript for drawing and interaction
-        js_code = self.get_practice_js()
-        
-        # Get cached data for this card from Python
-        cached = self.card_cache.get(self.current_index, {})
-        
-        # Inject card data into JavaScript
-        card_data_js = f"""
-        <script>
-        window.cardEnglish = {json.dumps(english)};
-        window.cardJapanese = {json.dumps(japanese)};
-        window.cardOriginalKanji = {json.dumps(original_kanji)};
-        window.currentCardIndex = {self.current_index};
-        window.totalCards = {len(self.card_data_list)};
-        window.answeredCards = {json.dumps(list(self.answered_cards))};
-        
-        // Function to update Next button to Finish button when appropriate
-        window.updateNextButton = function() {{
-            var nextButton = document.getElementById('next-button');
-            if (!nextButton) return;
-            
-            // Check if we're on last card and all cards are answered
-            var isLastCard = window.currentCardIndex >= window.totalCards - 1;
-            var allAnswered = window.answeredCards.length >= window.totalCards;
-            
-            if (isLastCard && allAnswered) {{
-                // Convert to Finish button
-                nextButton.textContent = 'Finish';
-                nextButton.className = 'btn-primary';
-                nextButton.onclick = function() {{ pycmd('finishPractice'); }};
-                nextButton.disabled = false;
-            }} else if (isLastCard) {{
-                // On last card but not all answered - keep disabled
-                nextButton.disabled = true;
-            }} else {{
-                // Not on last card - keep as Next Card, enabled
-                nextButton.textContent = 'Next Card';
-                nextButton.className = '';
-                nextButton.onclick = function() {{ pycmd('nextCard'); }};
-                nextButton.disabled = false;
-            }}
-        }};
-        
-        // Restore cached answer and feedback for this card from Python cache
-        setTimeout(function() {{
-            var cache = {json.dumps(cached)};
-            if (cache && Object.keys(cache).length > 0) {{
-                var input = document.getElementById('japanese-input');
-                var result = document.getElementById('result');
-                if (input && cache.answer !== undefined && cache.answer !== '') {{
-                    input.value = cache.answer;
-                }}
-                if (result && cache.feedback !== undefined && cache.feedback !== '') {{
-                    result.innerHTML = cache.feedback;
-                    result.className = cache.feedbackClass || 'result';
-                    result.style.display = 'block';
-                }}
-            }}
-            
-            // Update button state on page load
-            window.updateNextButton();
-        }}, 100);
-        </script>
-        """
-        
-        full_html = html + card_data_js + "<script>" + js_code + "</script>"
-        
-        self.web.stdHtml(full_html, css=[], js=[])
-    
-    def next_card(self):
-        """Move to next card or show completion screen."""
-        if self.on_completion_screen:
-            # Already on completion, do nothing or could cycle back to first card
-            return
-        
-        if self.current_index < len(self.card_data_list) - 1:
-            self.current_index += 1
-            self.load_current_card()
-    
-    def prev_card(self):
-        """Move to previous card."""
-        if self.on_completion_screen:
-            # Go back to last card from completion screen
-            self.on_completion_screen = False
-            self.current_index = len(self.card_data_list) - 1
-            self.load_current_card()
-        elif self.current_index > 0:
-            self.current_index -= 1
-            self.load_current_card()
-    
-    def get_practice_js(self):
-        """Get JavaScript code for practice interface."""
-        return """
-        // Initialize undo/redo functionality
-        window.undoHistory = [];
-        window.updateUndoRedoButtons = function() {
-            var undoBtn = document.getElementById('undo-btn');
-            var redoBtn = document.getElementById('redo-btn');
-            if (undoBtn) undoBtn.disabled = !window.currentStrokes || window.currentStrokes.length === 0;
-            if (redoBtn) redoBtn.disabled = !window.undoHistory || window.undoHistory.length === 0;
-        };
-        
-        window.undoStroke = function() {
-            if (!window.currentStrokes || window.currentStrokes.length === 0) return;
-            
-            // Remove last stroke and add to redo history
-            var lastStroke = window.currentStrokes.pop();
-            window.undoHistory.push(lastStroke);
-            
-            // Update stroke index if in dictionary mode
-            if (window.dictionaryMode && window.currentStrokeIndex > 0) {
-                window.currentStrokeIndex--;
-            }
-            
-            window.updateUndoRedoButtons();
-            if (window.redrawCanvas) window.redrawCanvas();
-        };
-        
-        window.redoStroke = function() {
-            if (window.undoHistory.length === 0) return;
-            
-            // Restore last undone stroke
-            var stroke = window.undoHistory.pop();
-            window.currentStrokes.push(stroke);
-            
-            // Update stroke index if in dictionary mode
-            if (window.dictionaryMode && window.currentStrokeIndex < window.ghostStrokes.length) {
-                window.currentStrokeIndex++;
-            }
-            
-            window.updateUndoRedoButtons();
-            if (window.redrawCanvas) window.redrawCanvas();
-        };
-        
-        // Initialize canvas on page load
-        (function() {
-            function initCanvas() {
-                var container = document.getElementById('canvas-container');
-                if (!container) {
-                    console.error('Canvas container not found');
-                    return;
-                }
-                
-                // Create canvas
-                var canvas = document.createElement('canvas');
-                canvas.id = 'drawing-canvas';
-                canvas.width = 300;
-                canvas.height = 300;
-                canvas.style.border = '2px solid #333';
-                canvas.style.cursor = 'crosshair';
-                canvas.style.touchAction = 'none';
-                container.appendChild(canvas);
-                
-                window.ctx = canvas.getContext('2d');
-                window.isDrawing = false;
-                window.currentStrokes = [];
-                window.currentStroke = null;
-                window.currentStrokeIndex = 0;
-                window.ghostStrokes = [];
-                window.dictionaryMode = false;
-                
-                // Animation variables (copied from card view)
-                window.drawProgress = 0;
-                window.repeatProgress = 0;
-                window.previousStrokeIndex = 0;
-                window.lastAnimTime = null;
-                window.drawDuration = 12000;
-                window.repeatDuration = 1600;
-                window.dashLength = 1000;
-                
-                // Set up event listeners for drawing
-                canvas.addEventListener('pointerdown', window.startDrawing);
-                canvas.addEventListener('pointermove', window.draw);
-                canvas.addEventListener('pointerup', window.endDrawing);
-                canvas.addEventListener('pointercancel', window.endDrawing);
-                
-                // Draw initial grid
-                window.drawGrid();
-                
-                // Initialize undo/redo button states
-                window.updateUndoRedoButtons();
-                
-                // Start animation loop for dictionary mode (copied from card view)
-                function animate(timestamp) {
-                    if (!window.lastAnimTime) window.lastAnimTime = timestamp;
-                    var dt = timestamp - window.lastAnimTime;
-                    window.lastAnimTime = timestamp;
-                    
-                    if (window.dictionaryMode && window.ghostStrokes && window.ghostStrokes.length > 0) {
-                        // Reset animation if current stroke changed
-                        if (window.currentStrokeIndex !== window.previousStrokeIndex) {
-                            window.drawProgress = 0;
-                            window.repeatProgress = 0;
-                            window.previousStrokeIndex = window.currentStrokeIndex;
-                        }
-                        
-                        // Update animation progress
-                        window.drawProgress += dt / window.drawDuration;
-                        if (window.drawProgress > 1) window.drawProgress = 1;
-                        
-                        window.repeatProgress += dt / window.repeatDuration;
-                        if (window.repeatProgress >= 1) {
-                            window.repeatProgress = 0;
-                            window.drawProgress = 0;
-                        }
-                        
-                        window.redrawCanvas();
-                    }
-                    requestAnimationFrame(animate);
-                }
-                requestAnimationFrame(animate);
-                
-                console.log('Canvas initialized');
-            }
-            
-            // Drawing helper functions
-            function getPos(evt) {
-                var canvas = document.getElementById('drawing-canvas');
-                if (!canvas) return {x: 0, y: 0};
-                var rect = canvas.getBoundingClientRect();
-                var cx, cy;
-                if (evt.touches && evt.touches.length > 0) {
-                    cx = evt.touches[0].clientX;
-                    cy = evt.touches[0].clientY;
-                } else {
-                    cx = evt.clientX;
-                    cy = evt.clientY;
-                }
-                return { x: cx - rect.left, y: cy - rect.top };
-            }
-            
-            // Offscreen canvas for stroke validation
-            var offscreenCanvas = document.createElement('canvas');
-            offscreenCanvas.width = 109;
-            offscreenCanvas.height = 109;
-            var offctx = offscreenCanvas.getContext('2d');
-            
-            window.isStrokeCloseEnough = function(svgPoints, canonicalPath) {
-                if (!canonicalPath || !svgPoints || svgPoints.length < 5) {
-                    return false;
-                }
-                
-                var W = 109, H = 109;
-                var HIT_RATIO = 0.6;
-                var CORRIDOR_WIDTH = 10;
-                
-                // Render canonical stroke
-                offctx.clearRect(0, 0, W, H);
-                offctx.save();
-                offctx.lineWidth = CORRIDOR_WIDTH;
-                offctx.lineCap = 'round';
-                offctx.strokeStyle = '#ffffff';
-                offctx.setLineDash([]);
-                offctx.stroke(canonicalPath);
-                offctx.restore();
-                
-                var img = offctx.getImageData(0, 0, W, H);
-                var data = img.data;
-                
-                // Get canonical bounding box
-                var minCX = W, maxCX = -1, minCY = H, maxCY = -1;
-                for (var y = 0; y < H; y++) {
-                    for (var x = 0; x < W; x++) {
-                        var idx = (y * W + x) * 4;
-                        if (data[idx + 3] > 0) {
-                            if (x < minCX) minCX = x;
-                            if (x > maxCX) maxCX = x;
-                            if (y < minCY) minCY = y;
-                            if (y > maxCY) maxCY = y;
-                        }
-                    }
-                }
-                if (maxCX < minCX || maxCY < minCY) return false;
-                
-                var canonW = maxCX - minCX + 1;
-                var canonH = maxCY - minCY + 1;
-                var canonDiag = Math.hypot(canonW, canonH);
-                
-                // Get user stroke metrics
-                var userLen = 0;
-                var minUX = Infinity, maxUX = -Infinity, minUY = Infinity, maxUY = -Infinity;
-                for (var i = 0; i < svgPoints.length; i++) {
-                    var p = svgPoints[i];
-                    if (i > 0) {
-                        var prev = svgPoints[i - 1];
-                        userLen += Math.hypot(p.x - prev.x, p.y - prev.y);
-                    }
-                    if (p.x < minUX) minUX = p.x;
-                    if (p.x > maxUX) maxUX = p.x;
-                    if (p.y < minUY) minUY = p.y;
-                    if (p.y > maxUY) maxUY = p.y;
-                }
-                if (!isFinite(minUX) || !isFinite(minUY)) return false;
-                
-                var userW = maxUX - minUX;
-                var userH = maxUY - minUY;
-                
-                // Check corridor hit ratio
-                var hits = 0, total = 0;
-                var step = Math.max(1, Math.floor(svgPoints.length / 40));
-                for (var i = 0; i < svgPoints.length; i += step) {
-                    var p = svgPoints[i];
-                    var x = Math.round(p.x);
-                    var y = Math.round(p.y);
-                    if (x < 0 || x >= W || y < 0 || y >= H) continue;
-                    total++;
-                    var idx = (y * W + x) * 4;
-                    if (data[idx + 3] > 0) hits++;
-                }
-                if (total === 0) return false;
-                var ratio = hits / total;
-                
-                // Size-dependent thresholds
-                var SMALL_DIAG = 20, LARGE_DIAG = 80;
-                var t = canonDiag <= SMALL_DIAG ? 0 : (canonDiag >= LARGE_DIAG ? 1 : (canonDiag - SMALL_DIAG) / (LARGE_DIAG - SMALL_DIAG));
-                var MIN_LENGTH_FRAC = 0.50 + t * (0.85 - 0.50);
-                var MIN_MAIN_FRAC = 0.50 + t * (0.80 - 0.50);
-                var MIN_ABS_LENGTH = 5 + t * (10 - 5);
-                
-                var hasEnoughLength = userLen >= MIN_ABS_LENGTH && (canonDiag <= 0 || userLen / canonDiag >= MIN_LENGTH_FRAC);
-                var canonMain = canonW >= canonH ? canonW : canonH;
-                var userMain = canonW >= canonH ? userW : userH;
-                var mainFrac = canonMain > 0 ? userMain / canonMain : 1;
-                var hasEnoughExtent = mainFrac >= MIN_MAIN_FRAC;
-                
-                return hasEnoughLength && hasEnoughExtent && ratio >= HIT_RATIO;
-            };
-            
-            window.isDirectionCorrect = function(svgPoints, strokeMeta) {
-                if (!strokeMeta || !svgPoints || svgPoints.length < 2) return true;
-                var sx = strokeMeta.start_x, sy = strokeMeta.start_y;
-                var ex = strokeMeta.end_x, ey = strokeMeta.end_y;
-                if (sx == null || sy == null || ex == null || ey == null) return true;
-                
-                var first = svgPoints[0];
-                var last = svgPoints[svgPoints.length - 1];
-                var ux = last.x - first.x, uy = last.y - first.y;
-                var ulen = Math.hypot(ux, uy);
-                if (ulen < 5) return true;
-                
-                var cx = ex - sx, cy = ey - sy;
-                var clen = Math.hypot(cx, cy);
-                if (clen < 1) return true;
-                
-                var dot = (ux * cx + uy * cy) / (ulen * clen);
-                return dot >= 0.3;
-            };
-            
-            window.drawGrid = function() {
-                if (!window.ctx) return;
-                var ctx = window.ctx;
-                
-                ctx.save();
-                ctx.scale(300 / 109, 300 / 109);
-                
-                var W = 109, H = 109;
-                
-                ctx.strokeStyle = 'rgba(0, 0, 0, 0.15)';
-                ctx.lineWidth = 2;
-                ctx.setLineDash([]);
-                ctx.strokeRect(0, 0, W, H);
-                
-                ctx.lineWidth = 1;
-                ctx.strokeStyle = 'rgba(0, 0, 0, 0.15)';
-                ctx.setLineDash([3, 4]);
-                
-                ctx.beginPath();
-                ctx.moveTo(W / 2, 0);
-                ctx.lineTo(W / 2, H);
-                ctx.stroke();
-                
-                ctx.beginPath();
-                ctx.moveTo(0, H / 2);
-                ctx.lineTo(W, H / 2);
-                ctx.stroke();
-                
-                ctx.restore();
-            }
-            
-            window.redrawCanvas = function() {
-                if (!window.ctx) return;
-                var ctx = window.ctx;
-                
-                ctx.clearRect(0, 0, 300, 300);
-                window.drawGrid();
-                
-                // Draw ghost strokes if in dictionary mode
-                if (window.dictionaryMode && window.ghostStrokes && window.ghostStrokes.length > 0) {
-                    window.drawGhostStrokes();
-                }
-                
-                // Draw user strokes
-                ctx.save();
-                ctx.strokeStyle = '#000';
-                ctx.lineWidth = 3;
-                ctx.lineCap = 'round';
-                ctx.lineJoin = 'round';
-                ctx.setLineDash([]);
-                
-                for (var i = 0; i < window.currentStrokes.length; i++) {
-                    var stroke = window.currentStrokes[i];
-                    if (!stroke || stroke.length < 2) continue;
-                    ctx.beginPath();
-                    ctx.moveTo(stroke[0].x, stroke[0].y);
-                    for (var j = 1; j < stroke.length; j++) {
-                        ctx.lineTo(stroke[j].x, stroke[j].y);
-                    }
-                    ctx.stroke();
-                }
-                
-                // Draw current stroke being drawn
-                if (window.currentStroke && window.currentStroke.length > 1) {
-                    ctx.beginPath();
-                    ctx.moveTo(window.currentStroke[0].x, window.currentStroke[0].y);
-                    for (var j = 1; j < window.currentStroke.length; j++) {
-                        ctx.lineTo(window.currentStroke[j].x, window.currentStroke[j].y);
-                    }
-                    ctx.stroke();
-                }
-                
-                ctx.restore();
-            }
-            
-            window.drawGhostStrokes = function() {
-                // Draw ghost strokes for dictionary mode
-                if (!window.ghostStrokes || window.ghostStrokes.length === 0) return;
-                
-                var ctx = window.ctx;
-                
-                ctx.save();
-                ctx.scale(300 / 109, 300 / 109);
-                
-                ctx.lineWidth = 4;
-                ctx.lineCap = 'round';
-                ctx.lineJoin = 'round';
-                ctx.setLineDash([]);
-                
-                // Draw all ghost strokes
-                for (var i = 0; i < window.ghostStrokes.length; i++) {
-                    var s = window.ghostStrokes[i];
-                    
-                    // Current stroke is less transparent
-                    if (i === window.currentStrokeIndex) {
-                        ctx.strokeStyle = 'rgba(255, 255, 255, 0.18)';
-                    } else {
-                        ctx.strokeStyle = 'rgba(255, 255, 255, 0.05)';
-                    }
-                    
-                    ctx.stroke(s.path);
-                    
-                    // Draw stroke numbers
-                    if (s.label_x != null) {
-                        if (i === window.currentStrokeIndex) {
-                            ctx.fillStyle = 'rgba(255, 0, 0, 0.75)';
-                        } else {
-                            ctx.fillStyle = 'rgba(255, 0, 0, 0.20)';
-                        }
-                        ctx.font = '8px sans-serif';
-                        ctx.fillText(String(s.index), s.label_x, s.label_y);
-                    }
-                }
-                
-                // Draw animated stroke for current expected stroke (copied from card view)
-                if (window.currentStrokeIndex < window.ghostStrokes.length) {
-                    var currentStroke = window.ghostStrokes[window.currentStrokeIndex];
-                    if (currentStroke && currentStroke.path) {
-                        ctx.lineWidth = 5;
-                        ctx.lineCap = 'round';
-                        ctx.lineJoin = 'round';
-                        ctx.strokeStyle = 'rgba(0, 0, 0, 0.25)';
-                        
-                        // Use the same dash animation as card view
-                        ctx.setLineDash([window.dashLength, window.dashLength]);
-                        ctx.lineDashOffset = -window.dashLength * window.drawProgress;
-                        
-                        ctx.stroke(currentStroke.path);
-                    }
-                }
-                
-                ctx.restore();
-            };
-            
-            window.startDrawing = function(evt) {
-                evt.preventDefault();
-                var pos = getPos(evt);
-                window.isDrawing = true;
-                window.currentStroke = [{ x: pos.x, y: pos.y }];
-            };
-            
-            window.draw = function(evt) {
-                if (!window.isDrawing) return;
-                evt.preventDefault();
-                var pos = getPos(evt);
-                if (window.currentStroke) {
-                    window.currentStroke.push({ x: pos.x, y: pos.y });
-                    window.redrawCanvas();
-                }
-            };
-            
-            window.endDrawing = function(evt) {
-                if (!window.isDrawing) return;
-                evt.preventDefault();
-                window.isDrawing = false;
-                
-                if (!window.currentStroke || window.currentStroke.length < 2) {
-                    window.currentStroke = null;
-                    return;
-                }
-                
-                // Clear redo history when a new stroke is added
-                window.undoHistory = [];
-                
-                // In dictionary mode, validate stroke against ghost strokes
-                if (window.dictionaryMode && window.ghostStrokes && window.ghostStrokes.length > 0) {
-                    // Convert current stroke to SVG coordinates
-                    var svgStroke = window.currentStroke.map(function(p) {
-                        return { x: p.x / (300 / 109), y: p.y / (300 / 109) };
-                    });
-                    
-                    // Check if stroke matches current expected stroke using proper validation
-                    var expectedStroke = window.ghostStrokes[window.currentStrokeIndex];
-                    if (expectedStroke) {
-                        var okShape = window.isStrokeCloseEnough(svgStroke, expectedStroke.path);
-                        var okDirection = window.isDirectionCorrect(svgStroke, expectedStroke);
-                        
-                        console.log('[Dictionary] Validating stroke', window.currentStrokeIndex, 'shape:', okShape, 'direction:', okDirection);
-                        
-                        if (okShape && okDirection) {
-                            // Valid stroke - keep it and move to next
-                            window.currentStrokes.push(window.currentStroke);
-                            window.currentStrokeIndex++;
-                            window.updateUndoRedoButtons();
-                            
-                            // Check if current character is complete
-                            if (window.currentStrokeIndex >= window.ghostStrokes.length) {
-                                console.log('[Dictionary] Character complete:', window.currentKanjiChar);
-                                
-                                // Add completed character to answer box
-                                var answerBox = document.getElementById('japanese-input');
-                                if (answerBox) {
-                                    answerBox.value += window.currentKanjiChar;
-                                }
-                                
-                                // Move to next character if available
-                                if (window.kanjiCharList && window.currentKanjiCharIndex < window.kanjiCharList.length - 1) {
-                                    window.currentKanjiCharIndex++;
-                                    var nextChar = window.kanjiCharList[window.currentKanjiCharIndex];
-                                    console.log('[Dictionary] Loading next character:', nextChar);
-                                    
-                                    // Clear user strokes and undo history before loading next character
-                                    window.currentStrokes = [];
-                                    window.undoHistory = [];
-                                    window.updateUndoRedoButtons();
-                                    
-                                    pycmd('lookupKanji:' + nextChar);
-                                } else {
-                                    // All characters complete - return to free-draw mode
-                                    console.log('[Dictionary] All characters complete - returning to free-draw mode');
-                                    
-                                    // Clear ghost strokes and reset dictionary mode
-                                    window.ghostStrokes = [];
-                                    window.dictionaryMode = false;
-                                    window.currentKanjiChar = '';
-                                    window.kanjiCharList = [];
-                                    window.currentKanjiCharIndex = 0;
-                                    
-                                    // Clear user strokes and undo history
-                                    window.currentStrokes = [];
-                                    window.undoHistory = [];
-                                    window.updateUndoRedoButtons();
-                                    
-                                    // Update info display
-                                    var info = document.getElementById('canvas-info');
-                                    if (info) {
-                                        info.textContent = 'All characters completed! Free drawing mode resumed.';
-                                        info.style.color = '#4CAF50';
-                                        
-                                        // Reset to normal message after 3 seconds
-                                        setTimeout(function() {
-                                            info.textContent = 'Free drawing mode - draw any character';
-                                            info.style.color = '';
-                                        }, 3000);
-                                    }
-                                    
-                                    // Clear the canvas and redraw grid
-                                    window.redrawCanvas();
-                                }
-                            } else {
-                                // Update progress for current character
-                                var info = document.getElementById('canvas-info');
-                                if (info) {
-                                    info.textContent = 'Dictionary Mode: Drawing ' + window.currentKanjiChar + 
-                                                      ' (stroke ' + (window.currentStrokeIndex + 1) + 
-                                                      ' of ' + window.ghostStrokes.length + ')';
-                                }
-                            }
-                        } else {
-                            // Invalid stroke - don't keep it
-                            console.log('[Dictionary] Stroke validation failed');
-                        }
-                    }
-                    
-                    window.currentStroke = null;
-                    window.redrawCanvas();
-                } else {
-                    // Normal mode - just add stroke
-                    window.currentStrokes.push(window.currentStroke);
-                    window.updateUndoRedoButtons();
-                    window.currentStroke = null;
-                    window.redrawCanvas();
-                }
-            };
-            
-            var startDrawing = window.startDrawing;
-            var draw = window.draw;
-            var endDrawing = window.endDrawing;
-            
-            // Initialize when DOM is ready
-            if (document.readyState === 'loading') {
-                document.addEventListener('DOMContentLoaded', initCanvas);
-            } else {
-                initCanvas();
-            }
-        })();
-        
-        window.submitAnswer = function() {
-            var input = document.getElementById('japanese-input');
-            var result = document.getElementById('result');
-            var submittedAnswer = input.value.trim();
-            var acceptedAnswer = (window.cardJapanese || '').trim();
-            
-            // Cache the answer
-            pycmd('saveCache:' + JSON.stringify({
-                cardIndex: window.currentCardIndex,
-                answer: input.value,
-                feedback: '',
-                feedbackClass: ''
-            }));
-            
-            if (!submittedAnswer) {
-                result.innerHTML = '⚠️ Please enter an answer first.';
-                result.className = 'result incorrect';
-                result.style.display = 'block';
-                return;
-            }
-            
-            // Show loading state
-            result.innerHTML = '🔍 Checking your answer...';
-            result.className = 'result';
-            result.style.display = 'block';
-            
-            // Check for exact match
-            if (submittedAnswer === acceptedAnswer) {
-                result.innerHTML = '<h2>✅ Correct</h2>';
-                result.className = 'result correct';
-                
-                // Cache the feedback via pycmd
-                pycmd('saveCache:' + JSON.stringify({
-                    cardIndex: window.currentCardIndex,
-                    answer: document.getElementById('japanese-input').value,
-                    feedback: result.innerHTML,
-                    feedbackClass: 'result correct'
-                }));
-                
-                return;
-            }
-            
-            // Request AI feedback for incorrect answer
-            var feedbackRequest = {
-                english: window.cardEnglish || '',
-                accepted: acceptedAnswer,
-                submitted: submittedAnswer,
-                originalKanji: window.cardOriginalKanji || ''
-            };
-            
-            pycmd('getFeedback:' + JSON.stringify(feedbackRequest));
-        };
-        
-        // Handler for AI feedback response
-        window.handleFeedback = function(feedback) {
-            var result = document.getElementById('result');
-            if (!feedback) {
-                result.innerHTML = '❌ Error getting feedback. Please try again.';
-                result.className = 'result incorrect';
-                return;
-            }
-            
-            // Render markdown feedback
-            result.innerHTML = window.renderMarkdown(feedback);
-            
-            // Check if feedback indicates correct answer
-            if (feedback.includes('✅ Correct') || feedback.includes('✅Correct')) {
-                result.className = 'result correct';
-            } else {
-                result.className = 'result incorrect';
-            }
-            
-            result.style.display = 'block';
-            
-            // Cache the feedback via pycmd
-            var input = document.getElementById('japanese-input');
-            pycmd('saveCache:' + JSON.stringify({
-                cardIndex: window.currentCardIndex,
-                answer: input ? input.value : '',
-                feedback: result.innerHTML,
-                feedbackClass: result.className
-            }));
-            
-            // Update answered cards tracking
-            if (!window.answeredCards.includes(window.currentCardIndex)) {
-                window.answeredCards.push(window.currentCardIndex);
-            }
-            
-            // Update Next/Finish button
-            window.updateNextButton();
-        };
-        
-        // Simple markdown renderer with furigana support
-        window.renderMarkdown = function(text) {
-            if (!text) return '';
-            
-            var html = text;
-            
-            // Handle furigana format: 漢字[かんじ] -> <ruby>漢字<rt>かんじ</rt></ruby>
-            html = html.replace(/([一-龯ぁ-ゔァ-ヴー々〆〤]+)\\[([ぁ-んァ-ヴー]+)\\]/g, '<ruby>$1<rt>$2</rt></ruby>');
-            
-            // Handle code blocks first
-            html = html.replace(/```([\\s\\S]*?)```/g, '<pre><code>$1</code></pre>');
-            
-            // Headers
-            html = html.replace(/^### (.*$)/gim, '<h3>$1</h3>');
-            html = html.replace(/^## (.*$)/gim, '<h2>$1</h2>');
-            html = html.replace(/^# (.*$)/gim, '<h1>$1</h1>');
-            
-            // Bold
-            html = html.replace(/\\*\\*([^*]+)\\*\\*/g, '<strong>$1</strong>');
-            html = html.replace(/__([^_]+)__/g, '<strong>$1</strong>');
-            
-            // Italic  
-            html = html.replace(/\\*([^*]+)\\*/g, '<em>$1</em>');
-            html = html.replace(/_([^_]+)_/g, '<em>$1</em>');
-            
-            // Inline code
-            html = html.replace(/`([^`]+)`/g, '<code>$1</code>');
-            
-            // Lists - process line by line
-            var lines = html.split('\\n');
-            var inList = false;
-            var result = [];
-            for (var i = 0; i < lines.length; i++) {
-                var line = lines[i];
-                if (line.match(/^[\\*-] /)) {
-                    if (!inList) {
-                        result.push('<ul>');
-                        inList = true;
-                    }
-                    result.push('<li>' + line.substring(2) + '</li>');
-                } else {
-                    if (inList) {
-                        result.push('</ul>');
-                        inList = false;
-                    }
-                    result.push(line);
-                }
-            }
-            if (inList) result.push('</ul>');
-            html = result.join('\\n');
-            
-            // Line breaks
-            html = html.replace(/\\n\\n/g, '</p><p>');
-            html = '<p>' + html + '</p>';
-            
-            return html;
-        };
-        
-        window.skipCard = function() {
-            pycmd('nextCard');
-        };
-        
-        window.lookupDictionary = function() {
-            console.log('lookupDictionary called');
-            var searchInput = document.getElementById('dict-search');
-            console.log('Search input:', searchInput);
-            var kanji = searchInput ? searchInput.value.trim() : '';
-            console.log('Kanji value:', kanji);
-            
-            // Show status immediately
-            var status = document.getElementById('status');
-            if (status) {
-                status.textContent = 'Looking up: ' + (kanji || '(no input)');
-                status.style.backgroundColor = '#2196F3';
-                status.style.color = 'white';
-                status.style.display = 'block';
-            }
-            
-            if (kanji) {
-                console.log('Calling pycmd with:', 'lookupKanji:' + kanji);
-                pycmd('lookupKanji:' + kanji);
-            } else {
-                console.log('No kanji entered');
-                if (status) {
-                    status.textContent = '⚠ Please enter a character to look up';
-                    status.style.backgroundColor = '#f44336';
-                }
-            }
-        };
-        
-        // Add Enter key support for dictionary lookup
-        var dictSearch = document.getElementById('dict-search');
-        if (dictSearch) {
-            dictSearch.addEventListener('keypress', function(event) {
-                if (event.key === 'Enter') {
-                    event.preventDefault();
-                    window.lookupDictionary();
-                }
-            });
-        };
-        
-        var answerInput = document.getElementById('japanese-input');
-        if (answerInput) {
-            answerInput.addEventListener('keypress', function(event) {
-                if (event.key === 'Enter') {
-                    event.preventDefault();
-                    window.submitAnswer();
-                }
-            });
-        };
-        
-        window.undoStroke = function() {
-            if (window.currentStrokes.length === 0) return;
-            
-            // Remove last stroke and add to redo history
-            var lastStroke = window.currentStrokes.pop();
-            window.undoHistory.push(lastStroke);
-            
-            // Update stroke index if in dictionary mode
-            if (window.dictionaryMode && window.currentStrokeIndex > 0) {
-                window.currentStrokeIndex--;
-            }
-            
-            window.updateUndoRedoButtons();
-            window.redrawCanvas();
-        };
-        
-        window.redoStroke = function() {
-            if (window.undoHistory.length === 0) return;
-            
-            // Restore last undone stroke
-            var stroke = window.undoHistory.pop();
-            window.currentStrokes.push(stroke);
-            
-            // Update stroke index if in dictionary mode
-            if (window.dictionaryMode && window.currentStrokeIndex < window.ghostStrokes.length) {
-                window.currentStrokeIndex++;
-            }
+            japanese = fields.get('Expression', fields.get('Sentence-Japanese', fields.get('Japanese', '')))
+            if not japanese:
+                for key in fields:
+                    if 'japanese' in key.lower() or 'expression' in key.lower():
+                        japanese = fields[key]
+                        break
+            if not japanese:
+                japanese = ''
             
-            window.updateUndoRedoButtons();
-            window.redrawCanvas();
-        };
+            # Get English from field
+            english = fields.get('Sentence-English', fields.get('English', ''))
+            if not english:
+                for key in fields:
+                    if 'english' in key.lower():
+                        english = fields[key]
+                        break
+            if not english:
+                english = "(No English sentence found in card)"
         
-        // Add keyboard shortcuts for undo/redo
-        document.addEventListener('keydown', function(e) {
-            // Only handle if no input/textarea is focused
-            var activeElement = document.activeElement;
-            if (activeElement && (activeElement.tagName === 'INPUT' || activeElement.tagName === 'TEXTAREA')) {
-                return;
-            }
-            
-            // Ctrl+Z for undo (without shift)
-            if (e.ctrlKey && e.key === 'z' && !e.shiftKey) {
-                e.preventDefault();
-                window.undoStroke();
-            }
-            // Ctrl+Y or Ctrl+Shift+Z for redo
-            else if (e.ctrlKey && (e.key === 'y' || (e.key === 'z' && e.shiftKey))) {
-                e.preventDefault();
-                window.redoStroke();
-            }
-        });
+        # Trim whitespace from accepted answer
+        japanese = japanese.strip()
         
-        window.submitDrawing = function() {
-            // In free draw mode, try to recognize character using OpenRouter API
-            if (!window.currentStrokes || window.currentStrokes.length === 0) {
-                var status = document.getElementById('status');
-                if (status) {
-                    status.textContent = '⚠ Draw something first before submitting';
-                    status.style.backgroundColor = '#f44336';
-                    status.style.color = 'white';
-                    status.style.display = 'block';
-                }
-                return;
-            }
-            
-            var status = document.getElementById('status');
-            if (status) {
-                status.textContent = '🔍 Recognizing... (using AI)';
-                status.style.backgroundColor = '#2196F3';
-                status.style.color = 'white';
-                status.style.display = 'block';
-            }
-            
-            // Get canvas image data
-            var canvas = document.getElementById('drawing-canvas');
-            if (!canvas) {
-                console.error('[OCR] Canvas not found');
-                if (status) {
-                    status.textContent = '❌ Error: Canvas not found';
-                    status.style.backgroundColor = '#f44336';
-                }
-                return;
-            }
-            
-            try {
-                // Create a clean image for OCR: white background with black strokes
-                var tempCanvas = document.createElement('canvas');
-                tempCanvas.width = canvas.width;
-                tempCanvas.height = canvas.height;
-                var tempCtx = tempCanvas.getContext('2d');
-                
-                // Fill with white background
-                tempCtx.fillStyle = '#FFFFFF';
-                tempCtx.fillRect(0, 0, tempCanvas.width, tempCanvas.height);
-                
-                // Draw user strokes in black
-                tempCtx.strokeStyle = '#000000';
-                tempCtx.lineWidth = 3;
-                tempCtx.lineCap = 'round';
-                tempCtx.lineJoin = 'round';
-                
-                for (var i = 0; i < window.currentStrokes.length; i++) {
-                    var stroke = window.currentStrokes[i];
-                    if (!stroke || stroke.length < 2) continue;
-                    tempCtx.beginPath();
-                    tempCtx.moveTo(stroke[0].x, stroke[0].y);
-                    for (var j = 1; j < stroke.length; j++) {
-                        tempCtx.lineTo(stroke[j].x, stroke[j].y);
-                    }
-                    tempCtx.stroke();
-                }
-                
-                // Convert to base64 image
-                var imageData = tempCanvas.toDataURL('image/png');
-                
-                // Send to Python backend for OCR processing
-                console.log('[OCR] Sending image to OpenRouter API...');
-                pycmd('recognizeDrawing:' + imageData);
-            } catch (error) {
-                console.error('[OCR] Error capturing canvas:', error);
-                if (status) {
-                    status.textContent = '❌ Error: ' + error.message;
-                    status.style.backgroundColor = '#f44336';
-                }
-            }
-        };
+        # Compile the feedback highlight patterns while the card loads, not on its first feedback request
+        if original_kanji:
+            get_highlight_patterns(original_kanji)
         
-        // Handler for OCR results from Python
-        window.handleOCRResult = function(result) {
-            var status = document.getElementById('status');
-            var answerBox = document.getElementById('japanese-input');
-            
-            if (!result) {
-                // No character recognized
-                console.log('[OCR] No character recognized');
-                if (status) {
-                    status.textContent = '❌ Could not recognize character. Try drawing more clearly.';
-                    status.style.backgroundColor = '#f44336';
-                    status.style.color = 'white';
-                }
-                return;
-            }
-            
-            var recognized = result.text;
-            var confidence = result.confidence;
-            var alternatives = result.alternatives || [];
-            
-            console.log('[OCR] Recognized:', recognized, 'Confidence:', confidence);
-            
-            // Add to answer box
-            if (answerBox) {
-                answerBox.value += recognized;
-            }
+        # Build HTML for practice interface
+        html = f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <link rel="stylesheet" href="{WEB_BASE_URL}/practice.css">
+        </head>
+        <body>
+            <div class="progress">Card {self.current_index + 1} of {len(self.card_data_list)}</div>
+            <div class="english">{english}</div>
             
-            // Save successful handwriting sample for training
-            window.saveHandwritingSample(recognized, true);
+            <div class="input-group">
+                <label><b>Your Answer</b></label>
+                <input type="text" id="japanese-input" placeholder="Type or draw Japanese characters...">
+            </div>
             
-            // Send recognition event
-            pycmd('charRecognized:' + recognized);
+            <div class="dict-group">
+                <label><b>Dictionary Lookup</b></label>
+                <div class="dict-search">
+                    <span>Search kanji:</span>
+                    <input type="text" id="dict-search" placeholder="Enter word/kanji to practice...">
+                    <button onclick="lookupDictionary()">Look Up</button>
+                </div>
+            </div>
             
-            // Show success message with alternatives
-            if (status) {
-                var altText = '';
-                if (alternatives.length > 1) {
-                    var altChars = alternatives.slice(1, 6).map(function(a) { return a.text; }).join(', ');
-                    if (altChars) {
-                        altText = ' | Also: ' + altChars;
-                    }
-                }
-                
-                var confPercent = (confidence * 100).toFixed(0);
-                status.textContent = '✓ Recognized: ' + recognized + ' (' + confPercent + '% confident)' + altText;
-                status.style.backgroundColor = '#4CAF50';
-                status.style.color = 'white';
-                status.style.display = 'block';
-            }
+            <div class="status" id="status"></div>
             
-            // Clear canvas after recognition
-            window.currentStrokes = [];
-            window.redrawCanvas();
-        };
-        
-        // Fallback recognition using stroke count (if OCR fails)
-        window.fallbackRecognition = function() {
-            if (!window.currentStrokes || window.currentStrokes.length === 0) {
-                return null;
-            }
+            <div class="canvas-group">
+                <div class="canvas-info" id="canvas-info">Free drawing mode - draw any character</div>
+                <div id="canvas-container"></div>
+                <div class="controls">
+                    <button onclick="window.undoStroke()" id="undo-btn" disabled>← Undo</button>
+                    <button onclick="window.redoStroke()" id="redo-btn" disabled>→ Redo</button>
+                    <button onclick="window.submitDrawing()">Submit Drawing</button>
+                    <button onclick="window.clearCanvas()">Clear Canvas</button>
+                </div>
+            </div>
             
-            var strokeCount = window.currentStrokes.length;
-            var candidates = [];
+            <div class="controls">
+                <button class="btn-primary" onclick="submitAnswer()">Submit Answer</button>
+                <button onclick="skipCard()">Skip</button>
+            </div>
             
-            if (strokeCount === 1) {
-                candidates = ['一', 'の', 'つ', 'し', 'ー'];
-            } else if (strokeCount === 2) {
-                candidates = ['二', '十', '人', '入', 'リ', 'ニ'];
-            } else if (strokeCount === 3) {
-                candidates = ['三', '山', '川', '女', '大', '子', '小', '口'];
-            } else {
-                candidates = [];
-            }
+            <div class="result" id="result"></div>
             
-            if (candidates.length > 0) {
-                return candidates[0];
-            } else {
-                console.log('[Recognition] No match for', strokeCount, 'strokes');
-                var status = document.getElementById('status');
-                if (status) {
-                    status.textContent = '⚠ No character recognized with ' + strokeCount + ' stroke(s). Use dictionary lookup for accurate results.';
-                    status.style.backgroundColor = '#ff9800';
-                    status.style.color = 'white';
-                    status.style.display = 'block';
-                }
-                return null;
-            }
-        };
+            <div class="nav-controls">
+                <button id="prev-button" onclick="pycmd('prevCard')" {"disabled" if self.current_index == 0 else ""}>Previous Card</button>
+                <button id="next-button" onclick="pycmd('nextCard')" {"disabled" if self.current_index >= len(self.card_data_list) - 1 else ""}>Next Card</button>
+                <button onclick="pycmd('closePractice')">Close Practice</button>
+            </div>
+        </body>
+        </html>
+        """
         
-        // Save handwriting sample for training
-        window.saveHandwritingSample = function(character, success) {
-            if (!window.currentStrokes || window.currentStrokes.length === 0) {
-                console.log('[Dataset] No strokes to save');
-                return;
-            }
-            
-            try {
-                // Create a temporary canvas to capture the drawing
-                var tempCanvas = document.createElement('canvas');
-                tempCanvas.width = 300;
-                tempCanvas.height = 300;
-                var tempCtx = tempCanvas.getContext('2d');
-                
-                // Fill with white background
-                tempCtx.fillStyle = 'white';
-                tempCtx.fillRect(0, 0, 300, 300);
-                
-                // Draw all strokes in black
-                tempCtx.strokeStyle = 'black';
-                tempCtx.lineWidth = 3;
-                tempCtx.lineCap = 'round';
-                tempCtx.lineJoin = 'round';
-                
-                for (var i = 0; i < window.currentStrokes.length; i++) {
-                    var stroke = window.currentStrokes[i];
-                    if (stroke.length === 0) continue;
-                    
-                    tempCtx.beginPath();
-                    tempCtx.moveTo(stroke[0].x, stroke[0].y);
-                    for (var j = 1; j < stroke.length; j++) {
-                        tempCtx.lineTo(stroke[j].x, stroke[j].y);
-                    }
-                    tempCtx.stroke();
-                }
-                
-                // Convert to base64 image
-                var imageData = tempCanvas.toDataURL('image/png');
-                
-                // Prepare data to send
-                var sampleData = {
-                    character: character,
-                    image: imageData,
-                    strokes: window.currentStrokes,  // Include stroke data for potential fine-tuning
-                    success: success
-                };
-                
-                // Send to Python backend for storage
-                console.log('[Dataset] Saving handwriting sample for:', character, 'Success:', success);
-                pycmd('saveHandwritingSample:' + JSON.stringify(sampleData));
-            } catch (error) {
-                console.error('[Dataset] Error saving handwriting sample:', error);
-            }
-        };
+        return html, english, japanese, original_kanji
+    
+    def next_card(self):
+        """Move to next card or show completion screen."""
+        if self.on_completion_screen:
+            # Already on completion, do nothing or could cycle back to first card
+            return
         
-        window.clearCanvas = function() {
-            if (!window.ctx) return;
-            
-            // Clear canvas
-            window.ctx.clearRect(0, 0, 300, 300);
-            
-            // Reset drawing state
-            window.currentStrokes = [];
-            window.currentStroke = null;
-            window.currentStrokeIndex = 0;
-            window.animationStartTime = null;
-            window.undoHistory = [];
-            
-            // Update undo/redo button states
-            window.updateUndoRedoButtons();
-            
-            // Redraw grid
-            if (window.drawGrid) {
-                window.drawGrid();
-            }
-            
-            // Redraw ghost strokes if in dictionary mode
-            if (window.dictionaryMode && window.ghostStrokes && window.ghostStrokes.length > 0) {
-                window.redrawCanvas();
-            }
-            
-            // Hide status message
-            var status = document.getElementById('status');
-            if (status) {
-                status.style.display = 'none';
-            }
-        };
-        """
+        if self.current_index < len(self.card_data_list) - 1:
+            self.current_index += 1
+            self.load_current_card()
+    
+    def prev_card(self):
+        """Move to previous card."""
+        if self.on_completion_screen:
+            # Go back to last card from completion screen
+            self.on_completion_screen = False
+            self.current_index = len(self.card_data_list) - 1
+            self.load_current_card()
+        elif self.current_index > 0:
+            self.current_index -= 1
+            self.load_current_card()
     
     def inject_kanji_strokes(self, char):
         """Load and display ghost strokes for a kanji character in the practice window."""
@@ -5073,7 +4379,6 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
                 window.kanjiCharList = {json.dumps(list(char))};
                 window.currentKanjiCharIndex = 0;
                 """
-                self.web.eval(char_list_js)
                 # Process only the first character now
                 char = char[0]
             else:
@@ -5082,49 +4387,59 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
                 window.kanjiCharList = {json.dumps([char])};
                 window.currentKanjiCharIndex = 0;
                 """
-                self.web.eval(char_list_js)
             
-            # Fetch stroke data
-            if KANJI_REGEX.match(char):
-                stroke_data = kanjiRenderer(char)
-            elif HIRAGANA_REGEX.match(char) or KATAKANA_REGEX.match(char):
-                stroke_data = kanaRenderer(char)
+            n_strokes = self._ghost_stroke_counts.get(char)
+            if n_strokes is not None:
+                # The page already holds Path2D ghost strokes for this character
+                debugPrint(f"Reusing {n_strokes} ghost strokes on the page for {char}")
+                strokes_js_value = "null"
             else:
-                debugPrint(f"Character '{char}' not recognized as kanji or kana")
-                # Show error in UI
-                error_js = """
-                var status = document.getElementById('status');
-                if (status) {
-                    status.textContent = '⚠ Not a valid Japanese character';
-                    status.style.backgroundColor = '#f44336';
-                    status.style.color = 'white';
-                    status.style.display = 'block';
-                }
-                """
-                self.web.eval(error_js)
-                return
-            
-            if not stroke_data:
-                debugPrint(f"No stroke data found for {char}")
-                return
+                # Fetch stroke data
+                if is_kanji(char):
+                    stroke_data = kanjiRenderer(char)
+                elif is_kana(char):
+                    stroke_data = kanaRenderer(char)
+                else:
+                    debugPrint(f"Character '{char}' not recognized as kanji or kana")
+                    # Show error in UI
+                    error_js = """
+                    var status = document.getElementById('status');
+                    if (status) {
+                        status.textContent = '⚠ Not a valid Japanese character';
+                        status.style.backgroundColor = '#f44336';
+                        status.style.color = 'white';
+                        status.style.display = 'block';
+                    }
+                    """
+                    self.web.eval(char_list_js + error_js)
+                    return
+                
+                if not stroke_data:
+                    debugPrint(f"No stroke data found for {char}")
+                    self.web.eval(char_list_js)
+                    return
+                
+                # stroke_data is already a list of stroke dictionaries
+                strokes = stroke_data
+                n_strokes = len(strokes)
+                debugPrint(f"Loaded {n_strokes} strokes for {char}")
+                strokes_js_value = f"JSON.parse({json.dumps(json.dumps(strokes))})"
             
-            # stroke_data is already a list of stroke dictionaries
-            strokes = stroke_data
-            debugPrint(f"Loaded {len(strokes)} strokes for {char}")
+            # Quoted JS string literal for the character, reused by every script below
+            char_js = json.dumps(char)
             
             # Update canvas info
-            js = f"""
+            canvas_info_js = f"""
             var info = document.getElementById('canvas-info');
             if (info) {{
-                info.textContent = 'Dictionary Mode: Drawing {char} (stroke 1 of {len(strokes)})';
+                info.textContent = 'Dictionary Mode: Drawing ' + {char_js} + ' (stroke 1 of {n_strokes})';
                 info.style.color = '#2196F3';
                 info.style.fontWeight = 'bold';
             }}
             """
-            self.web.eval(js)
             
             # Load stroke data and integrate with existing drawing system
-            js = f"""
+            strokes_js = f"""
             (function() {{
                 // Ensure canvas is initialized
                 if (!window.ctx) {{
@@ -5132,26 +4447,38 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
                     return;
                 }}
                 
-                console.log('Setting up dictionary mode for {char}');
+                console.log('Setting up dictionary mode for', {char_js});
+                
+                // Load stroke data and create Path2D objects (reused when the character is revisited)
+                if (!window.ghostStrokeCache) window.ghostStrokeCache = {{}};
+                var cachedStrokes = window.ghostStrokeCache[{char_js}];
+                if (cachedStrokes) {{
+                    window.ghostStrokes = cachedStrokes;
+                }} else {{
+                    var rawStrokes = {strokes_js_value};
+                    window.ghostStrokes = rawStrokes.map(function(s) {{
+                        return {{
+                            index: s.index,
+                            path: new Path2D(s.d),
+                            label_x: s.label_x,
+                            label_y: s.label_y,
+                            start_x: s.start_x,
+                            start_y: s.start_y,
+                            end_x: s.end_x,
+                            end_y: s.end_y
+                        }};
+                    }});
+                    window.ghostStrokeCache[{char_js}] = window.ghostStrokes;
+                }}
                 
-                // Load stroke data and create Path2D objects
-                var rawStrokes = {json.dumps(strokes)};
-                window.ghostStrokes = rawStrokes.map(function(s) {{
-                    return {{
-                        index: s.index,
-                        path: new Path2D(s.d),
-                        label_x: s.label_x,
-                        label_y: s.label_y,
-                        start_x: s.start_x,
-                        start_y: s.start_y,
-                        end_x: s.end_x,
-                        end_y: s.end_y
-                    }};
-                }});
+                // Rasterize every canonical stroke now so the first validation is already warm
+                if (window.getCanonicalRaster) {{
+                    window.ghostStrokes.forEach(function(s) {{ window.getCanonicalRaster(s.path); }});
+                }}
             
             // Enable dictionary mode
             window.dictionaryMode = true;
-            window.currentKanjiChar = '{char}';
+            window.currentKanjiChar = {char_js};
             
             // Reset drawing state for new kanji (clear previous strokes)
             window.currentStrokes = [];
@@ -5161,26 +4488,38 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
             // Redraw canvas to show new ghost strokes
             window.redrawCanvas();
             
-            console.log('Loaded', {len(strokes)}, 'strokes for {char} in dictionary mode');
+            console.log('Loaded', {n_strokes}, 'strokes for', {char_js}, 'in dictionary mode');
             console.log('Ghost strokes:', window.ghostStrokes);
             }})();
             """
             
-            self.web.eval(js)
-            
             # Show success message with delay to ensure element exists
             success_js = f"""
             setTimeout(function() {{
                 var status = document.getElementById('status');
                 if (status) {{
-                    status.textContent = '✓ Loaded {len(strokes)} strokes for {char} - try drawing!';
+                    status.textContent = '✓ Loaded {n_strokes} strokes for ' + {char_js} + ' - try drawing!';
                     status.style.backgroundColor = '#4CAF50';
                     status.style.color = 'white';
                     status.style.display = 'block';
                 }}
             }}, 100);
             """
-            self.web.eval(success_js)
+            
+            # Send everything to the page in a single eval round-trip. The page reports whether
+            # it cached the ghost strokes (it skips them while the canvas is not ready), and
+            # only then are later loads of this character sent without stroke data.
+            confirm_js = f"!!(window.ghostStrokeCache && window.ghostStrokeCache[{char_js}])"
+            page_counts = self._ghost_stroke_counts
+            
+            def on_loaded(cached):
+                if cached:
+                    page_counts[char] = n_strokes
+                else:
+                    page_counts.pop(char, None)
+            
+            self.web.evalWithCallback(char_list_js + canvas_info_js + strokes_js + success_js + confirm_js,
+                                      on_loaded)
             
         except Exception as e:
             debugPrint(f"Error loading kanji strokes: {e}")
@@ -5189,6 +4528,8 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
     
     def closeEvent(self, event):
         """Clean up when window is closed."""
+        self._closed = True
+        self._http.close()
         try:
             gui_hooks.webview_did_receive_js_message.remove(self.handle_message)
         except (ValueError, AttributeError):
@@ -5198,6 +4539,7 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
     def show_completion_screen(self):
         """Show completion screen with results and confetti if perfect score."""
         self.on_completion_screen = True
+        self._practice_page_loaded = False
         total = len(self.card_data_list)
         correct = len(self.correct_cards)
         all_correct = (correct == total)
@@ -5213,161 +4555,87 @@ When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (k
                 if feedback and '✅ Correct' not in feedback:
                     incorrect_feedbacks.append(feedback)
         
-        # Generate AI summary if there are incorrect answers (or use cached)
+        # Generate AI summary if there are incorrect answers (or use cached).
+        # The request runs in the background and fills in the placeholder when it returns.
         summary = ""
         if incorrect_feedbacks and len(incorrect_feedbacks) > 0:
             if self.completion_summary is None:
-                self.completion_summary = self.generate_completion_summary(incorrect_feedbacks)
-            summary = self.completion_summary
+                summary = "<p>⏳ Generating summary...</p>"
+                if not self._summary_pending:
+                    self._summary_pending = True
+                    mw.taskman.run_in_background(
+                        task=lambda: self.generate_completion_summary(incorrect_feedbacks),
+                        on_done=self._on_summary_done
+                    )
+            else:
+                summary = self.completion_summary
         
         # Build completion HTML
-        confetti_script = confettiJs if all_correct else ""
-        
-        completion_html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <meta charset="UTF-8">
-            <style>
-                body {{
-                    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", system-ui, sans-serif;
-                    padding: 40px;
-                    text-align: center;
-                    max-width: 800px;
-                    margin: 0 auto;
-                }}
-                h1 {{
-                    font-size: 48px;
-                    margin-bottom: 20px;
-                    color: {'#4CAF50' if all_correct else '#2196F3'};
-                }}
-                .score {{
-                    font-size: 64px;
-                    font-weight: bold;
-                    margin: 30px 0;
-                    color: {'#4CAF50' if all_correct else '#FF9800'};
-                }}
-                .message {{
-                    font-size: 24px;
-                    margin: 20px 0;
-                    color: #666;
-                }}
-                .summary {{
-                    background-color: #2196F3;
-                    border-left: 4px solid #1976D2;
-                    padding: 20px;
-                    margin: 30px 0;
-                    text-align: left;
-                    border-radius: 4px;
-                    color: #ffffff;
-                }}
-                .summary h2 {{
-                    margin-top: 0;
-                    color: #ffffff;
-                }}
-                .summary strong {{
-                    color: #00f5d5;
-                }}
-                .buttons {{
-                    margin-top: 40px;
-                }}
-                button {{
-                    background-color: #4CAF50;
-                    color: white;
-                    padding: 15px 30px;
-                    font-size: 18px;
-                    border: none;
-                    border-radius: 5px;
-                    cursor: pointer;
-                    margin: 0 10px;
-                }}
-                button:hover {{
-                    background-color: #45a049;
-                }}
-                ruby {{
-                    font-size: 18px;
-                }}
-                rt {{
-                    font-size: 12px;
-                }}
-            </style>
-        </head>
-        <body>
-            <h1>{'🎉 Perfect Score! 🎉' if all_correct else '📊 Practice Complete'}</h1>
-            <div class="score">{correct}/{total}</div>
-            <div class="message">
-                {'Excellent work! You got all answers correct!' if all_correct else f'You got {correct} out of {total} correct.'}
-            </div>
-            
-            {f'''
-            <div class="summary">
-                <h2>📚 Areas to Focus On</h2>
-                <div id="summary-content">{summary}</div>
-            </div>
-            ''' if summary else ''}
-            
-            <div class="buttons">
-                <button onclick="pycmd('prevCard')">← Back to Cards</button>
-                <button onclick="pycmd('closePractice')">Close</button>
-            </div>
-            
-            <canvas id="confetti-canvas" style="position: fixed; top: 0; left: 0; width: 100%; height: 100%; pointer-events: none; z-index: 9999;"></canvas>
-            
-            <script>
-            {confetti_script if all_correct else ''}
-            </script>
-            
-            {f'''
-            <script>
-            // Trigger confetti animation
-            console.log('Initializing confetti for perfect score');
-            setTimeout(function() {{
-                try {{
-                    const canvas = document.getElementById('confetti-canvas');
-                    console.log('Canvas element:', canvas);
-                    const jsConfetti = new JSConfetti({{canvas: canvas}});
-                    console.log('JSConfetti initialized:', jsConfetti);
-                    
-                    jsConfetti.addConfetti({{
-                        emojis: ['🎉', '✨', '🎊', '🌟'],
-                        emojiSize: 50,
-                        confettiNumber: 100,
-                    }});
-                    
-                    // Add more confetti bursts
-                    setTimeout(function() {{
-                        jsConfetti.addConfetti({{
-                            confettiColors: ['#4CAF50', '#45a049', '#66BB6A', '#81C784'],
-                            confettiNumber: 150,
-                        }});
-                    }}, 300);
-                }} catch(e) {{
-                    console.error('Confetti error:', e);
-                }}
-            }}, 100);
-            </script>
-            ''' if all_correct else ''}
-        </body>
-        </html>
-        """
+        completion_html = COMPLETION_HTML_TEMPLATE.substitute(
+            title_color='#4CAF50' if all_correct else '#2196F3',
+            score_color='#4CAF50' if all_correct else '#FF9800',
+            heading='🎉 Perfect Score! 🎉' if all_correct else '📊 Practice Complete',
+            correct=correct,
+            total=total,
+            message='Excellent work! You got all answers correct!' if all_correct else f'You got {correct} out of {total} correct.',
+            summary_block=COMPLETION_SUMMARY_TEMPLATE.substitute(summary=summary) if summary else '',
+            confetti_block=COMPLETION_CONFETTI_HTML if all_correct else '',
+        )
         
         self.web.stdHtml(completion_html, css=[], js=[])
     
+    def _on_summary_done(self, future):
+        """Store the AI summary and show it if the completion screen is still open."""
+        self._summary_pending = False
+        if self._closed:
+            return
+        
+        try:
+            self.completion_summary = future.result()
+        except Exception as e:
+            debugPrint(f"Error generating completion summary: {e}")
+            self.completion_summary = "<p>Review the incorrect answers to identify areas for improvement.</p>"
+        
+        if self.on_completion_screen:
+            self.web.eval(f"""
+            var summaryContent = document.getElementById('summary-content');
+            if (summaryContent) summaryContent.innerHTML = {dumps_json(self.completion_summary)};
+            """)
+    
     def generate_completion_summary(self, incorrect_feedbacks):
         """Generate AI summary of trends in incorrect answers."""
         try:
             # Load AI config
             ai_config = load_ai_config()
-            api_key = ai_config.get('api_key', '')
-            api_url = ai_config.get('api_url') or 'https://openrouter.ai/api/v1/chat/completions'
-            model = ai_config.get('model') or 'google/gemini-2.5-flash'
+            api_key = ai_config.api_key
+            api_url = ai_config.api_url or 'https://openrouter.ai/api/v1/chat/completions'
+            model = ai_config.model or 'google/gemini-2.5-flash'
             
             if not api_key:
                 debugPrint("AI summary not available - API key not configured")
                 return "<p>Review the incorrect answers above to identify areas for improvement.</p>"
             
-            # Build prompt
-            feedbacks_text = "\n\n---\n\n".join(incorrect_feedbacks)
+            # Build prompt, sending each distinct feedback once (ignoring case, spacing and punctuation)
+            seen = set()
+            unique_feedbacks = []
+            for feedback in incorrect_feedbacks:
+                normalized = NON_WORD_REGEX.sub(' ', feedback.lower()).strip()
+                if normalized not in seen:
+                    seen.add(normalized)
+                    unique_feedbacks.append(feedback)
+            feedbacks_text = "\n\n---\n\n".join(unique_feedbacks)
+            
+            # Reuse a summary of the same feedback set from an earlier session. The markdown is
+            # cached and rendered on every use; the "markdown" tag keeps keys from older
+            # versions, whose entries held rendered HTML, from matching
+            summary_key = hashlib.blake2b(
+                "\0".join(["markdown", model] + sorted(unique_feedbacks)).encode("utf-8"), digest_size=16
+            ).hexdigest()
+            cached_summary = load_ai_summaries().get(summary_key)
+            if cached_summary is not None:
+                debugPrint("Using cached AI summary")
+                return render_markdown(cached_summary)
+            
             prompt = f"""Based on these feedback messages from incorrect Japanese translation attempts, identify the main trends, common mistakes, and concepts/topics the student should focus on. Be concise but helpful.
 
 When showing Japanese text with kanji, use furigana format: 漢字[かんじ] (kanji followed by *Hiragana* reading in square brackets; no space between the kanji and the square brackets).
@@ -5398,23 +4666,19 @@ Provide a brief summary in markdown format with:
             
             debugPrint(f"Requesting completion summary from AI...")
             
-            # Make API request
-            request = urllib.request.Request(
-                api_url,
-                data=json.dumps(payload).encode('utf-8'),
-                headers=headers
-            )
-            
-            with urllib.request.urlopen(request, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
+            # Make API request (reuses the window's pooled connection)
+            response = self._http.post(api_url, json=payload, headers=headers, timeout=(5, 30))
+            response.raise_for_status()
+            result = response.json()
             
             # Extract summary
             if result.get('choices') and len(result['choices']) > 0:
                 summary = result['choices'][0]['message']['content'].strip()
                 debugPrint(f"AI summary generated")
                 
-                # Render markdown to HTML
-                return self.render_markdown_python(summary)
+                # Cache the markdown, then render it to HTML
+                save_ai_summary(summary_key, summary)
+                return render_markdown(summary)
             
             return "<p>Review the incorrect answers to identify areas for improvement.</p>"
             
@@ -5423,55 +4687,6 @@ Provide a brief summary in markdown format with:
             import traceback
             traceback.print_exc()
             return "<p>Review the incorrect answers to identify areas for improvement.</p>"
-    
-    def render_markdown_python(self, text):
-        """Simple markdown to HTML renderer in Python."""
-        import re
-        html = text
-        
-        # Furigana
-        html = re.sub(r'([一-龯ぁ-ゔァ-ヴー々〆〤]+)\[([ぁ-んァ-ヴー]+)\]', r'<ruby>\1<rt>\2</rt></ruby>', html)
-        
-        # Headers
-        html = re.sub(r'^### (.+)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-        html = re.sub(r'^## (.+)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-        html = re.sub(r'^# (.+)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-        
-        # Bold
-        html = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html)
-        html = re.sub(r'__(.+?)__', r'<strong>\1</strong>', html)
-        
-        # Italic
-        html = re.sub(r'\*(.+?)\*', r'<em>\1</em>', html)
-        html = re.sub(r'_(.+?)_', r'<em>\1</em>', html)
-        
-        # Inline code
-        html = re.sub(r'`([^`]+)`', r'<code>\1</code>', html)
-        
-        # Lists (simple processing)
-        lines = html.split('\n')
-        result = []
-        in_list = False
-        for line in lines:
-            if re.match(r'^[\*\-] ', line):
-                if not in_list:
-                    result.append('<ul>')
-                    in_list = True
-                result.append(f'<li>{line[2:]}</li>')
-            else:
-                if in_list:
-                    result.append('</ul>')
-                    in_list = False
-                result.append(line)
-        if in_list:
-            result.append('</ul>')
-        html = '\n'.join(result)
-        
-        # Paragraphs
-        html = re.sub(r'\n\n+', '</p><p>', html)
-        html = f'<p>{html}</p>'
-        
-        return html
 
 
 def inject_practice_session(card_data_list, sentence_source):
@@ -5650,27 +4865,32 @@ def inject_practice_session(card_data_list, sentence_source):
         
         if message.startswith('charRecognized:'):
             char = message.split(':', 1)[1]
-            # Insert into input field
-            js = f"document.getElementById('japanese-input').value += '{char}';"
-            mw.reviewer.web.eval(js)
-            # Show status
-            js = f"var s = document.getElementById('status'); s.textContent = '✓ Matched: {char}'; s.style.backgroundColor = '#4CAF50'; s.style.color = 'white'; s.style.display = 'block';"
+            char_js = json.dumps(char)
+            # Insert into input field, show status and clear the canvas in one script
+            js = f"""(function() {{
+                document.getElementById('japanese-input').value += {char_js};
+                var s = document.getElementById('status');
+                s.textContent = '✓ Matched: ' + {char_js};
+                s.style.backgroundColor = '#4CAF50'; s.style.color = 'white'; s.style.display = 'block';
+                setTimeout(function() {{ window.clearCanvas && window.clearCanvas(); }}, 500);
+            }})();"""
             mw.reviewer.web.eval(js)
-            # Clear canvas
-            QTimer.singleShot(500, lambda: mw.reviewer.web.eval('window.clearCanvas && window.clearCanvas()'))
             return (True, None)
         elif message.startswith('noMatch'):
-            # Show error
-            js = "var s = document.getElementById('status'); s.textContent = '⚠ No character matched - try again'; s.style.backgroundColor = '#f44336'; s.style.color = 'white'; s.style.display = 'block';"
+            # Show error and clear the canvas in one script
+            js = """(function() {
+                var s = document.getElementById('status');
+                s.textContent = '⚠ No character matched - try again';
+                s.style.backgroundColor = '#f44336'; s.style.color = 'white'; s.style.display = 'block';
+                setTimeout(function() { window.clearCanvas && window.clearCanvas(); }, 100);
+            })();"""
             mw.reviewer.web.eval(js)
-            # Clear canvas
-            QTimer.singleShot(100, lambda: mw.reviewer.web.eval('window.clearCanvas && window.clearCanvas()'))
             return (True, None)
         elif message.startswith('lookupKanji:'):
             kanji = message.split(':', 1)[1]
             debugPrint(f"Looking up kanji: {kanji}")
             # Split into individual characters
-            kanji_list = [c for c in kanji if KANJI_REGEX.match(c) or HIRAGANA_REGEX.match(c) or KATAKANA_REGEX.match(c)]
+            kanji_list = [c for c in kanji if is_kanji(c) or is_kana(c)]
             if kanji_list:
                 # Store the list in JavaScript
                 kanji_list_js = json.dumps(kanji_list)
@@ -5710,7 +4930,7 @@ def inject_kanji_strokes(char):
 
 
 def inject_practice_canvas_js(card_data):
-    """DEPRECATED: Use KanjiPracticeWindow.get_practice_js() instead."""
+    """DEPRECATED: The practice window script is served from web/practice.js."""
     pass
 
 
@@ -3,11 +3,29 @@ Data preparation utilities for handwriting recognition training
 """
 
 import json
-import base64
+import binascii
 from io import BytesIO
 import numpy as np
 from PIL import Image
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+# Optional: streams large dataset files instead of loading every image string at once
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+# Optional: parses whole dataset files several times faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Samples handed to the worker pool at a time while streaming a dataset
+SAMPLE_BATCH_SIZE = 1024
 
 
 def load_dataset(dataset_file="handwriting_dataset.json"):
@@ -15,59 +33,116 @@ def load_dataset(dataset_file="handwriting_dataset.json"):
     if not os.path.exists(dataset_file):
         raise FileNotFoundError(f"Dataset file not found: {dataset_file}")
     
+    if orjson is not None:
+        with open(dataset_file, 'rb') as f:
+            return orjson.loads(f.read())
     with open(dataset_file, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
+def iter_dataset(dataset):
+    """
+    Iterate (character, samples) pairs of a dataset.
+    
+    Args:
+        dataset: Dictionary {character: [samples]} or path of a dataset JSON file.
+                 Files are streamed one character at a time when ijson is installed.
+    """
+    if not isinstance(dataset, (str, os.PathLike)):
+        yield from dataset.items()
+        return
+    
+    if ijson is None:
+        yield from load_dataset(dataset).items()
+        return
+    
+    if not os.path.exists(dataset):
+        raise FileNotFoundError(f"Dataset file not found: {dataset}")
+    with open(dataset, 'rb') as f:
+        yield from ijson.kvitems(f, '')
+
+
+def get_sample_counts(dataset):
+    """Get {character: number of samples} for a dataset dictionary or file."""
+    return {char: len(samples) for char, samples in iter_dataset(dataset)}
+
+
 def decode_image(base64_string):
-    """Decode base64 image string to PIL Image."""
+    """Decode base64 image string (or bytes) to PIL Image."""
+    data = base64_string if isinstance(base64_string, bytes) else base64_string.encode('ascii')
+    
     # Remove data URL prefix if present
-    if ',' in base64_string:
-        base64_string = base64_string.split(',', 1)[1]
+    pos = data.find(b',')
+    if pos >= 0:
+        data = data[pos + 1:]
     
-    image_data = base64.b64decode(base64_string)
-    return Image.open(BytesIO(image_data))
+    return Image.open(BytesIO(binascii.a2b_base64(data)))
 
 
-def preprocess_image(image, target_size=(64, 64)):
+def preprocess_image(image, target_size=(64, 64), out=None, resample=Image.Resampling.LANCZOS,
+                     dtype=np.float32):
     """
     Preprocess image for model input.
     
     Args:
         image: PIL Image
         target_size: Tuple (width, height) for resizing
+        out: Optional array of shape (height, width, 1) to write the result into
+        resample: Pillow resampling filter for the final resize
+        dtype: np.float32 for values in [0, 1], or np.uint8 for the same image scaled to [0, 255]
     
     Returns:
         numpy array of shape (height, width, 1) with values in [0, 1]
+        (or [0, 255] for uint8)
     """
     # Convert to grayscale
     if image.mode != 'L':
         image = image.convert('L')
     
-    # Resize
-    image = image.resize(target_size, Image.Resampling.LANCZOS)
+    # Resize; large downscales (e.g. the 300px canvas to 64px) are first shrunk by an
+    # integer factor with Image.reduce so the filter only runs over a small image
+    image = image.resize(target_size, resample, reducing_gap=2.0)
     
-    # Convert to numpy array and normalize
-    img_array = np.array(image, dtype=np.float32)
-    img_array = img_array / 255.0  # Normalize to [0, 1]
+    if out is None:
+        out = np.empty((target_size[1], target_size[0], 1), dtype=dtype)
     
-    # Invert colors (make strokes white on black background for better learning)
-    img_array = 1.0 - img_array
+    if out.dtype == np.uint8:
+        # Invert colors only; scaling to [0, 1] is left to whoever feeds the model
+        np.subtract(255, np.asarray(image, dtype=np.uint8), out=out[:, :, 0])
+        return out
     
-    # Add channel dimension
-    img_array = np.expand_dims(img_array, axis=-1)
+    # Normalize to [0, 1] and invert colors (make strokes white on black background
+    # for better learning) in one pass, straight into the channel dimension
+    pixels = np.asarray(image, dtype=np.float32)
+    np.multiply(pixels, 1 / 255.0, out=pixels)
+    np.subtract(1.0, pixels, out=out[:, :, 0])
     
-    return img_array
+    return out
+
+
+def _process_one(image_b64, target_size, dtype):
+    """Decode and preprocess one sample in a worker process; returns the exception if it fails."""
+    try:
+        return preprocess_image(decode_image(image_b64), target_size, dtype=dtype)
+    except Exception as e:
+        return e
+
 
 
-def prepare_training_data(dataset, target_size=(64, 64), min_samples=2):
+def prepare_training_data(dataset, target_size=(64, 64), min_samples=2, workers=None, cache_dir=None,
+                          dtype=np.uint8):
     """
     Prepare training data from dataset.
     
     Args:
-        dataset: Dictionary {character: [samples]}
+        dataset: Dictionary {character: [samples]} or path of a dataset JSON file
         target_size: Image size for model input
         min_samples: Minimum samples required per character
+        workers: Number of worker processes for decoding (default: one per CPU core)
+        cache_dir: If given, X and y are written to disk-backed memmaps in this directory
+                   (reopen them with load_prepared_data) instead of being held in RAM
+        dtype: Element type of X; uint8 (the default) keeps images at a quarter of the
+               float32 size, divide by 255 before feeding them to the model
     
     Returns:
         X: numpy array of images (N, height, width, 1)
@@ -75,42 +150,71 @@ def prepare_training_data(dataset, target_size=(64, 64), min_samples=2):
         char_to_idx: Dictionary mapping character to index
         idx_to_char: Dictionary mapping index to character
     """
-    X = []
-    y = []
-    
     # Filter characters with enough samples
-    valid_chars = {char: samples for char, samples in dataset.items() 
-                   if len(samples) >= min_samples}
+    valid_counts = {char: n for char, n in get_sample_counts(dataset).items() 
+                    if n >= min_samples}
     
-    if not valid_chars:
+    if not valid_counts:
         raise ValueError(f"No characters have at least {min_samples} samples")
     
     # Create character to index mapping
-    char_to_idx = {char: idx for idx, char in enumerate(sorted(valid_chars.keys()))}
+    char_to_idx = {char: idx for idx, char in enumerate(sorted(valid_counts.keys()))}
     idx_to_char = {idx: char for char, idx in char_to_idx.items()}
     
-    print(f"Processing {len(valid_chars)} characters with {min_samples}+ samples...")
-    
-    # Process each character
-    for char, samples in valid_chars.items():
-        char_idx = char_to_idx[char]
-        
-        for sample in samples:
-            try:
-                # Decode and preprocess image
-                img = decode_image(sample['image'])
-                img_array = preprocess_image(img, target_size)
-                
-                X.append(img_array)
-                y.append(char_idx)
-                
-            except Exception as e:
-                print(f"Error processing sample for '{char}': {e}")
-                continue
-    
-    # Convert to numpy arrays
-    X = np.array(X)
-    y = np.array(y)
+    print(f"Processing {len(valid_counts)} characters with {min_samples}+ samples...")
+    
+    # Allocate the output arrays once and fill them as the workers finish
+    total = sum(valid_counts.values())
+    x_shape = (total, target_size[1], target_size[0], 1)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        X = np.memmap(os.path.join(cache_dir, 'X.dat'), dtype=dtype, mode='w+', shape=x_shape)
+        y = np.memmap(os.path.join(cache_dir, 'y.i32'), dtype=np.int32, mode='w+', shape=(total,))
+    else:
+        X = np.empty(x_shape, dtype=dtype)
+        y = np.empty(total, dtype=np.int32)
+    count = 0
+    
+    # Only a batch of encoded images is held at a time; the dataset itself is streamed
+    tasks = ((char, sample['image']) for char, samples in iter_dataset(dataset)
+             if char in char_to_idx for sample in samples)
+    
+    # Decoding and resizing are CPU-bound, so spread the samples over worker processes
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            batch = list(islice(tasks, SAMPLE_BATCH_SIZE))
+            if not batch:
+                break
+            results = executor.map(
+                partial(_process_one, target_size=target_size, dtype=dtype),
+                [image for _, image in batch],
+                chunksize=64,
+            )
+            for (char, _), img_array in zip(batch, results):
+                if isinstance(img_array, Exception):
+                    print(f"Error processing sample for '{char}': {img_array}")
+                    continue
+                X[count] = img_array
+                y[count] = char_to_idx[char]
+                count += 1
+    
+    # Drop the slots of samples that failed to decode
+    X = X[:count]
+    y = y[:count]
+    
+    if cache_dir:
+        X.flush()
+        y.flush()
+        meta = {
+            'count': count,
+            'capacity': total,
+            'shape': list(x_shape[1:]),
+            'x_dtype': np.dtype(dtype).name,
+            'y_dtype': 'int32',
+            'char_to_idx': char_to_idx,
+        }
+        with open(os.path.join(cache_dir, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
     
     print(f"Prepared {len(X)} samples for {len(char_to_idx)} characters")
     print(f"Image shape: {X.shape}")
@@ -119,17 +223,39 @@ def prepare_training_data(dataset, target_size=(64, 64), min_samples=2):
     return X, y, char_to_idx, idx_to_char
 
 
+def load_prepared_data(cache_dir):
+    """
+    Reopen training data written by prepare_training_data(cache_dir=...) without reading it into RAM.
+    
+    Returns:
+        X, y, char_to_idx, idx_to_char as from prepare_training_data, with X and y read-only memmaps
+    """
+    with open(os.path.join(cache_dir, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    
+    capacity = meta['capacity']
+    X = np.memmap(os.path.join(cache_dir, 'X.dat'), dtype=meta['x_dtype'], mode='r',
+                  shape=(capacity, *meta['shape']))[:meta['count']]
+    y = np.memmap(os.path.join(cache_dir, 'y.i32'), dtype=meta['y_dtype'], mode='r',
+                  shape=(capacity,))[:meta['count']]
+    
+    char_to_idx = meta['char_to_idx']
+    idx_to_char = {idx: char for char, idx in char_to_idx.items()}
+    return X, y, char_to_idx, idx_to_char
+
+
 def get_dataset_stats(dataset):
-    """Get statistics about the dataset."""
-    total_samples = sum(len(samples) for samples in dataset.values())
+    """Get statistics about the dataset (a dictionary or a dataset file path)."""
+    counts = get_sample_counts(dataset)
+    total_samples = sum(counts.values())
     
     stats = {
-        'total_characters': len(dataset),
+        'total_characters': len(counts),
         'total_samples': total_samples,
-        'avg_samples_per_char': total_samples / len(dataset) if dataset else 0,
-        'min_samples': min(len(samples) for samples in dataset.values()) if dataset else 0,
-        'max_samples': max(len(samples) for samples in dataset.values()) if dataset else 0,
-        'samples_per_char': {char: len(samples) for char, samples in dataset.items()}
+        'avg_samples_per_char': total_samples / len(counts) if counts else 0,
+        'min_samples': min(counts.values()) if counts else 0,
+        'max_samples': max(counts.values()) if counts else 0,
+        'samples_per_char': counts
     }
     
     return stats
@@ -0,0 +1,270 @@
+"""
+KanjiVG stroke data: SVG parsing and the bundled stroke database
+"""
+
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+
+# lxml (libxml2) parses noticeably faster; the standard library parser is the fallback
+try:
+    from lxml import etree as ET
+    HAVE_LXML = True
+except ImportError:
+    import xml.etree.ElementTree as ET
+    HAVE_LXML = False
+
+
+# Fully qualified KanjiVG tag/attribute names, matched directly while streaming the SVG
+SVG_G_TAG = "{http://www.w3.org/2000/svg}g"
+SVG_PATH_TAG = "{http://www.w3.org/2000/svg}path"
+SVG_TEXT_TAG = "{http://www.w3.org/2000/svg}text"
+KVG_ELEMENT_ATTR = "{http://kanjivg.tagaini.net}element"
+# SVG path commands and their numeric parameters
+PATH_COMMAND_REGEX = re.compile(r'[MmLlHhVvCcSsQqTtAaZz][^MmLlHhVvCcSsQqTtAaZz]*')
+PATH_NUMBER_REGEX = re.compile(r'(-?\d+(?:\.\d+)?)')
+
+
+def parse_label_translation(transform):
+    """Return the (x, y) translation of a label's transform="matrix(a b c d x y)", or None."""
+    # KanjiVG always writes this one fixed form, so plain string slicing is enough
+    start = transform.find('matrix(')
+    if start < 0:
+        return None
+    end = transform.find(')', start)
+    if end < 0:
+        return None
+    parts = transform[start + 7:end].split()
+    try:
+        return float(parts[-2]), float(parts[-1])
+    except (ValueError, IndexError):
+        return None
+
+
+def extract_stroke_paths_from_svg(svg_text, char):
+    # One streaming pass collects the path data of the character's group and the
+    # stroke number labels; elements are cleared as soon as they have been read
+    d_strings = []
+    number_labels = []  # (transform, text) of each <text> in the StrokeNumbers group
+    depth = 0
+    target_depth = None  # depth of the <g kvg:element=char> group while inside it
+    numbers_depth = None  # depth of the StrokeNumbers group while inside it
+    found_target = False
+    found_numbers = False
+    if HAVE_LXML:
+        source = io.BytesIO(svg_text.encode("utf-8"))
+    else:
+        source = io.StringIO(svg_text)
+    for event, elem in ET.iterparse(source, events=("start", "end")):
+        if event == "start":
+            depth += 1
+            if elem.tag == SVG_G_TAG:
+                if not found_target and elem.get(KVG_ELEMENT_ATTR) == char:
+                    found_target = True
+                    target_depth = depth
+                elif not found_numbers and elem.get('id', '').startswith('kvg:StrokeNumbers_'):
+                    found_numbers = True
+                    numbers_depth = depth
+            continue
+
+        if target_depth is not None and elem.tag == SVG_PATH_TAG:
+            d = elem.get('d')
+            if d:
+                d_strings.append(d)
+        elif numbers_depth is not None and depth == numbers_depth + 1 and elem.tag == SVG_TEXT_TAG:
+            number_labels.append((elem.get('transform', ''), elem.text))
+
+        if depth == target_depth:
+            target_depth = None
+        elif depth == numbers_depth:
+            numbers_depth = None
+        elem.clear()
+        depth -= 1
+
+        # Both groups have been read in full; the rest of the document is irrelevant
+        if found_target and found_numbers and target_depth is None and numbers_depth is None:
+            break
+
+    if not found_target:
+        raise ValueError(f"No stroke group found for kanji {char!r}")
+
+    start_end = []
+    for d in d_strings:
+
+        # Parse SVG path to get actual start and end points
+        # Split by command letters to get segments
+        commands = PATH_COMMAND_REGEX.findall(d)
+        
+        sx, sy, ex, ey = None, None, None, None
+        current_x, current_y = 0, 0
+        
+        for cmd in commands:
+            cmd_letter = cmd[0]
+            params = PATH_NUMBER_REGEX.findall(cmd, 1)
+            
+            if not params:
+                continue
+                
+            # M/m = move to (absolute/relative) - this is the start
+            if cmd_letter in 'Mm':
+                if len(params) >= 2:
+                    if cmd_letter == 'M':
+                        current_x, current_y = float(params[0]), float(params[1])
+                    else:  # relative
+                        current_x += float(params[0])
+                        current_y += float(params[1])
+                    if sx is None:  # First move is the start point
+                        sx, sy = current_x, current_y
+            
+            # L/l = line to
+            elif cmd_letter in 'Ll':
+                if len(params) >= 2:
+                    if cmd_letter == 'L':
+                        current_x, current_y = float(params[-2]), float(params[-1])
+                    else:
+                        current_x += float(params[-2])
+                        current_y += float(params[-1])
+            
+            # C/c = cubic bezier (last pair is endpoint)
+            elif cmd_letter in 'Cc':
+                if len(params) >= 6:
+                    if cmd_letter == 'C':
+                        current_x, current_y = float(params[-2]), float(params[-1])
+                    else:
+                        current_x += float(params[-2])
+                        current_y += float(params[-1])
+            
+            # S/s = smooth cubic bezier
+            elif cmd_letter in 'Ss':
+                if len(params) >= 4:
+                    if cmd_letter == 'S':
+                        current_x, current_y = float(params[-2]), float(params[-1])
+                    else:
+                        current_x += float(params[-2])
+                        current_y += float(params[-1])
+            
+            # Q/q = quadratic bezier
+            elif cmd_letter in 'Qq':
+                if len(params) >= 4:
+                    if cmd_letter == 'Q':
+                        current_x, current_y = float(params[-2]), float(params[-1])
+                    else:
+                        current_x += float(params[-2])
+                        current_y += float(params[-1])
+            
+            # T/t = smooth quadratic bezier
+            elif cmd_letter in 'Tt':
+                if len(params) >= 2:
+                    if cmd_letter == 'T':
+                        current_x, current_y = float(params[-2]), float(params[-1])
+                    else:
+                        current_x += float(params[-2])
+                        current_y += float(params[-1])
+        
+        ex, ey = current_x, current_y
+        
+        if sx is not None and ex is not None:
+            start_end.append((sx, sy, ex, ey))
+        else:
+            start_end.append((None, None, None, None))
+
+    label_positions = []
+    for transform, label_text in number_labels:
+        translation = parse_label_translation(transform)
+        if translation is None:
+            continue
+        x, y = translation
+        try:
+            num = int((label_text or '').strip())
+        except ValueError:
+            continue
+        label_positions.append((num, x, y))
+
+    stroke_data = []
+    if label_positions and len(label_positions) == len(d_strings):
+        label_positions.sort(key=lambda t: t[0])
+        for idx, d in enumerate(d_strings, start=1):
+            num, x, y = label_positions[idx - 1]
+            sx, sy, ex, ey = start_end[idx - 1]
+            stroke_data.append({
+                "index": num,
+                "d": d,
+                "label_x": x,
+                "label_y": y,
+                "start_x": sx,
+                "start_y": sy,
+                "end_x": ex,
+                "end_y": ey,
+            })
+    else:
+        for idx, d in enumerate(d_strings, start=1):
+            sx, sy, ex, ey = start_end[idx - 1]
+            stroke_data.append({
+                "index": idx,
+                "d": d,
+                "label_x": None,
+                "label_y": None,
+                "start_x": sx,
+                "start_y": sy,
+                "end_x": ex,
+                "end_y": ey,
+            })
+
+    return stroke_data
+
+
+def build_stroke_db(kanjivg_dir, db_path):
+    """
+    Parse every SVG of a KanjiVG checkout into a stroke database.
+
+    Args:
+        kanjivg_dir: Directory holding the KanjiVG SVGs (named by code point, e.g. 065e5.svg)
+        db_path: Path of the sqlite file to (re)create
+
+    Returns:
+        Number of characters written
+    """
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    conn = sqlite3.connect(tmp_path)
+    conn.execute("CREATE TABLE strokes(cp INTEGER PRIMARY KEY, data BLOB NOT NULL)")
+
+    count = 0
+    for name in sorted(os.listdir(kanjivg_dir)):
+        stem, ext = os.path.splitext(name)
+        # Variant files (065e5-Kaisho.svg) share a code point with the main one
+        if ext != ".svg" or "-" in stem:
+            continue
+        char = chr(int(stem, 16))
+        with open(os.path.join(kanjivg_dir, name), "r", encoding="utf-8") as f:
+            svg_text = f.read()
+        try:
+            stroke_data = extract_stroke_paths_from_svg(svg_text, char)
+        except Exception as e:
+            print(f"Skipping {name}: {e}")
+            continue
+        conn.execute(
+            "INSERT INTO strokes(cp, data) VALUES (?, ?)",
+            (ord(char), json.dumps(stroke_data, ensure_ascii=False).encode("utf-8")),
+        )
+        count += 1
+
+    conn.commit()
+    conn.close()
+    os.replace(tmp_path, db_path)
+    return count
+
+
+if __name__ == "__main__":
+    # Usage: python kanjivg.py <kanjivg/kanji directory> [output sqlite]
+    if len(sys.argv) < 2:
+        print("Usage: python kanjivg.py <kanjivg/kanji directory> [output sqlite]")
+        sys.exit(1)
+    out = sys.argv[2] if len(sys.argv) > 2 else os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "user_files", "kvg_strokes.sqlite")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    print(f"Wrote {build_stroke_db(sys.argv[1], out)} characters to {out}")
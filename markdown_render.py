@@ -0,0 +1,72 @@
+"""
+Markdown to HTML rendering for AI completion summaries (furigana aware)
+"""
+
+import re
+
+# Inline markdown: furigana, bold, italic and code in one pattern. An emphasis marker
+# only opens when followed by non-space and only closes after non-space, so list
+# bullets ("* item") and spaced asterisks are left alone. A closing marker may not be
+# followed by another marker character, and an italic one either stands alone or ends
+# a run of markers, so nested emphasis such as **bold *italic*** and *italic **bold***
+# closes on the outer markers.
+MD_INLINE_REGEX = re.compile(
+    r'(?P<base>[一-龯ぁ-ゔァ-ヴー々〆〤]+)\[(?P<reading>[ぁ-んァ-ヴー]+)\]'
+    r'|\*\*(?!\s)(?P<bold_star>.+?)(?<!\s)\*\*(?!\*)'
+    r'|__(?!\s)(?P<bold_underscore>.+?)(?<!\s)__(?!_)'
+    r'|\*(?![\s*])(?P<italic_star>.+?)(?:(?<![\s*])\*(?!\*)|(?<=\*)\*(?![\w*]))'
+    r'|_(?![\s_])(?P<italic_underscore>.+?)(?:(?<![\s_])_(?!_)|(?<=_)_(?![\w_]))'
+    r'|`(?P<code>[^`]+)`'
+)
+MD_HEADER_PREFIXES = (('### ', 'h3'), ('## ', 'h2'), ('# ', 'h1'))
+MD_LIST_PREFIXES = ('* ', '- ')
+MD_PARAGRAPH_REGEX = re.compile(r'\n\n+')
+
+
+def render_markdown_inline(match):
+    """MD_INLINE_REGEX callback; bold and italic content is rendered recursively."""
+    kind = match.lastgroup
+    if kind == 'reading':
+        return f"<ruby>{match.group('base')}<rt>{match.group('reading')}</rt></ruby>"
+    if kind == 'code':
+        return f"<code>{match.group('code')}</code>"
+    inner = MD_INLINE_REGEX.sub(render_markdown_inline, match.group(kind))
+    tag = 'strong' if kind.startswith('bold') else 'em'
+    return f"<{tag}>{inner}</{tag}>"
+
+
+def render_inline(text):
+    """Render furigana, emphasis and inline code in one line of text."""
+    return MD_INLINE_REGEX.sub(render_markdown_inline, text)
+
+
+def render_markdown(text):
+    """Simple markdown to HTML renderer (headers, lists, paragraphs and inline markup)."""
+    result = []
+    in_list = False
+    for line in text.split('\n'):
+        # Block prefixes are recognised on the raw line, before any inline markup
+        if line.startswith(MD_LIST_PREFIXES):
+            if not in_list:
+                result.append('<ul>')
+                in_list = True
+            result.append(f'<li>{render_inline(line[2:])}</li>')
+            continue
+
+        if in_list:
+            result.append('</ul>')
+            in_list = False
+        for prefix, tag in MD_HEADER_PREFIXES:
+            if line.startswith(prefix) and len(line) > len(prefix):
+                line = f'<{tag}>{render_inline(line[len(prefix):])}</{tag}>'
+                break
+        else:
+            line = render_inline(line)
+        result.append(line)
+    if in_list:
+        result.append('</ul>')
+    html = '\n'.join(result)
+
+    # Paragraphs
+    html = MD_PARAGRAPH_REGEX.sub('</p><p>', html)
+    return f'<p>{html}</p>'
@@ -3,21 +3,71 @@ Custom Handwriting Model Server
 Runs the trained TensorFlow model as a separate HTTP server
 """
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
-import base64
+from flask import Flask, request
+import binascii
+import hashlib
 import json
 import os
 import sys
+import queue
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future
 from io import BytesIO
 
+from server_common import json_response, read_json_body, enable_cors, serve_app
+
+try:
+    import numpy as np
+    import tensorflow as tf
+    from PIL import Image
+except ImportError as e:
+    print(f"ERROR: Required dependency not installed: {e}")
+    print("Install with: pip install tensorflow numpy pillow")
+    sys.exit(1)
+
 app = Flask(__name__)
-CORS(app)
+enable_cors(app)
 
 # Global model and mappings
 model = None
-char_mappings = None
+idx_to_char = []  # Character for each class index
 model_path = None
+# Keras model traced once for (B, 64, 64, 1) float32 batches, used when no TFLite model is
+keras_infer = None
+
+# TFLite model used for inference when conversion succeeds (None = use the Keras model)
+interpreter_path = None
+interpreter_backend = 'keras'
+# One interpreter per padded batch size: batch size -> (interpreter, input details, output details)
+interpreters = {}
+# A TFLite interpreter must not be invoked from several threads at once
+interpreter_lock = threading.Lock()
+
+# Dynamic batching: concurrent /predict requests are run through the model together.
+# The worker waits up to BATCH_WAIT_SECONDS for more images after the first one arrives.
+MAX_BATCH = 16
+BATCH_WAIT_SECONDS = 0.005
+# TFLite inputs have a fixed shape, so batches are padded up to one of these sizes
+TFLITE_BATCH_SIZES = (1, 4, 16)
+prediction_queue = queue.Queue()
+batch_worker_thread = None
+batch_worker_lock = threading.Lock()
+# Per-thread (1, 64, 64, 1) input buffer; safe to reuse because a request thread waits
+# for its result, and the batch worker copies inputs out with np.concatenate
+request_scratch = threading.local()
+
+# Results of recent predictions keyed by a hash of the submitted image, so retries and
+# double submits of the same drawing skip decoding and inference
+PREDICTION_CACHE_SIZE = 1024
+prediction_cache = OrderedDict()
+prediction_cache_lock = threading.Lock()
+
+# An int8 model is only used if its top-1 predictions on the calibration images
+# agree with the float model at least this often; otherwise float16 is used
+INT8_MIN_AGREEMENT = 0.98
 
 
 def get_latest_model_path():
@@ -48,15 +98,132 @@ def get_latest_model_path():
     return None
 
 
+def get_calibration_path(keras_path):
+    """Path of the calibration images train_model.py saves next to a model."""
+    return os.path.splitext(keras_path)[0] + '.calib.npy'
+
+
+def load_idx_to_char(mapping_file):
+    """
+    Character for each class index from a char_mappings JSON file.
+    
+    The list is cached as a NumPy array in a .npz next to the JSON, so only the
+    first load after training parses the JSON.
+    """
+    npz_path = os.path.splitext(mapping_file)[0] + '.npz'
+    if os.path.exists(npz_path) and os.path.getmtime(npz_path) >= os.path.getmtime(mapping_file):
+        with np.load(npz_path) as cached:
+            return cached['idx_to_char'].tolist()
+    
+    with open(mapping_file, 'r', encoding='utf-8') as f:
+        mapping = json.load(f)['idx_to_char']
+    chars = [mapping[str(i)] for i in range(len(mapping))]
+    try:
+        tmp_path = npz_path + '.tmp.npz'
+        np.savez(tmp_path, idx_to_char=np.array(chars))
+        os.replace(tmp_path, npz_path)
+    except OSError as e:
+        print(f"WARNING: Could not cache mappings to {npz_path}: {e}")
+    return chars
+
+
+def get_converted_path(keras_path, suffix):
+    """Path of an existing TFLite conversion of keras_path that is newer than it, else None."""
+    tflite_path = os.path.splitext(keras_path)[0] + suffix
+    if os.path.exists(tflite_path) and os.path.getmtime(tflite_path) >= os.path.getmtime(keras_path):
+        return tflite_path
+    return None
+
+
+def convert_to_tflite(keras_model, keras_path, calibration=None):
+    """
+    Convert a Keras model to a quantized TFLite file next to it.
+    
+    The converted file is reused until the Keras model is newer. int8 conversions are
+    written with the .int8.unchecked.tflite suffix; load_model renames them to
+    .int8.tflite once they pass the agreement check.
+    
+    Args:
+        keras_model: Loaded Keras model
+        keras_path: Path of the .keras file
+        calibration: Optional uint8 images (N, 64, 64, 1) as stored for training; when
+                     given, the model is fully int8-quantized, otherwise float16
+    
+    Returns:
+        Path of the .tflite file
+    """
+    suffix = '.int8.unchecked.tflite' if calibration is not None else '.f16.tflite'
+    tflite_path = get_converted_path(keras_path, suffix)
+    if tflite_path:
+        return tflite_path
+    tflite_path = os.path.splitext(keras_path)[0] + suffix
+    
+    converter = tf.lite.TFLiteConverter.from_keras_model(keras_model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if calibration is not None:
+        print(f"Converting model to TFLite (int8, {len(calibration)} calibration images)...")
+        converter.representative_dataset = lambda: (
+            [(x[None, ...].astype(np.float32) / 255.0)] for x in calibration
+        )
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    else:
+        print("Converting model to TFLite (float16)...")
+        converter.target_spec.supported_types = [tf.float16]
+    tflite_bytes = converter.convert()
+    
+    tmp_path = tflite_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(tflite_bytes)
+    os.replace(tmp_path, tflite_path)
+    return tflite_path
+
+
+def create_interpreter(tflite_path, batch_size):
+    """Create a TFLite interpreter whose input takes batch_size images."""
+    new_interpreter = tf.lite.Interpreter(model_path=tflite_path, num_threads=os.cpu_count())
+    input_details = new_interpreter.get_input_details()[0]
+    if batch_size != input_details['shape'][0]:
+        new_interpreter.resize_tensor_input(input_details['index'], [batch_size, 64, 64, 1])
+    new_interpreter.allocate_tensors()
+    return new_interpreter, new_interpreter.get_input_details()[0], new_interpreter.get_output_details()[0]
+
+
+def open_interpreter(tflite_path, backend):
+    """Make a converted model the one run_model uses."""
+    global interpreter_path, interpreter_backend
+    
+    single = create_interpreter(tflite_path, 1)
+    with interpreter_lock:
+        interpreter_path = tflite_path
+        interpreter_backend = backend
+        interpreters.clear()
+        interpreters[1] = single
+
+
+def use_keras_model():
+    """Drop any TFLite interpreter and run the Keras model directly."""
+    global interpreter_path, interpreter_backend
+    with interpreter_lock:
+        interpreter_path = None
+        interpreter_backend = 'keras'
+        interpreters.clear()
+
+
+def int8_agreement(keras_model, calibration):
+    """Fraction of calibration images where the active interpreter's top-1 matches the Keras model."""
+    images = calibration.astype(np.float32) / 255.0
+    expected = keras_model.predict(images, verbose=0).argmax(axis=1)
+    actual = np.concatenate([run_model(images[i:i + MAX_BATCH]) for i in range(0, len(images), MAX_BATCH)])
+    return float(np.mean(actual.argmax(axis=1) == expected))
+
+
 def load_model():
     """Load the custom handwriting recognition model."""
-    global model, char_mappings, model_path
+    global model, model_path, keras_infer, idx_to_char
     
     try:
-        import tensorflow as tf
-        import numpy as np
-        from PIL import Image
-        
         model_path = get_latest_model_path()
         if not model_path:
             print("ERROR: No trained model found")
@@ -80,67 +247,210 @@ def load_model():
         
         print(f"Loading mappings from: {mapping_file}")
         
-        with open(mapping_file, 'r', encoding='utf-8') as f:
-            char_mappings = json.load(f)
+        idx_to_char = load_idx_to_char(mapping_file)
+        
+        # TF's own thread pools, used by the Keras path (TFLite sets its threads per interpreter)
+        tf.config.threading.set_intra_op_parallelism_threads(os.cpu_count() or 1)
+        tf.config.threading.set_inter_op_parallelism_threads(2)
+        
+        # A conversion kept from an earlier run is opened straight from disk; the
+        # interpreter mmaps the FlatBuffer, so the Keras weights are never loaded.
+        # Only int8 files that passed the agreement check carry the .int8.tflite suffix.
+        calibration_path = get_calibration_path(model_path)
+        converted = (os.path.exists(calibration_path) and get_converted_path(model_path, '.int8.tflite')) \
+            or get_converted_path(model_path, '.f16.tflite')
+        if converted:
+            try:
+                open_interpreter(converted, 'tflite-int8' if converted.endswith('.int8.tflite') else 'tflite-f16')
+                model = None
+                keras_infer = None
+                with prediction_cache_lock:
+                    prediction_cache.clear()
+                print(f"Inference backend: {interpreter_backend} ({os.path.basename(converted)})")
+                print(f"Recognizes {len(idx_to_char)} characters")
+                return True
+            except Exception as e:
+                print(f"WARNING: Could not open {converted}, loading the Keras model: {e}")
         
         # Load model
         model = tf.keras.models.load_model(model_path)
+        keras_infer = tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec((None, 64, 64, 1), tf.float32)],
+        ).get_concrete_function()
+        
+        # Run inference through TFLite: int8 when calibration images were saved with the
+        # model and it stays accurate, else float16; the Keras model is the last fallback
+        use_keras_model()
+        if os.path.exists(calibration_path):
+            try:
+                calibration = np.load(calibration_path)
+                unchecked_path = convert_to_tflite(model, model_path, calibration)
+                open_interpreter(unchecked_path, 'tflite-int8')
+                agreement = int8_agreement(model, calibration)
+                print(f"int8 model agrees with float model on {agreement * 100:.1f}% of calibration images")
+                # Release the interpreter before the file is renamed or deleted
+                use_keras_model()
+                if agreement >= INT8_MIN_AGREEMENT:
+                    int8_path = os.path.splitext(model_path)[0] + '.int8.tflite'
+                    os.replace(unchecked_path, int8_path)
+                    open_interpreter(int8_path, 'tflite-int8')
+            except Exception as e:
+                use_keras_model()
+                print(f"WARNING: int8 conversion failed: {e}")
+            # A conversion that failed or was rejected must not be picked up next time
+            unchecked_path = os.path.splitext(model_path)[0] + '.int8.unchecked.tflite'
+            try:
+                if os.path.exists(unchecked_path):
+                    os.remove(unchecked_path)
+            except OSError as e:
+                print(f"WARNING: Could not remove {unchecked_path}: {e}")
+        
+        if interpreter_path is None:
+            try:
+                open_interpreter(convert_to_tflite(model, model_path), 'tflite-f16')
+            except Exception as e:
+                use_keras_model()
+                print(f"WARNING: TFLite conversion failed, using the Keras model: {e}")
+        print(f"Inference backend: {interpreter_backend}")
+        with prediction_cache_lock:
+            prediction_cache.clear()
         
         print(f"Model loaded successfully!")
-        print(f"Recognizes {len(char_mappings['char_to_idx'])} characters")
+        print(f"Recognizes {len(idx_to_char)} characters")
         
         return True
         
-    except ImportError as e:
-        print(f"ERROR: Required dependency not installed: {e}")
-        print("Install with: pip install tensorflow numpy pillow")
-        return False
     except Exception as e:
         print(f"ERROR: Failed to load model: {e}")
-        import traceback
         traceback.print_exc()
         return False
 
 
+def run_model(images):
+    """Return class probabilities (B, classes) for a (B, 64, 64, 1) float32 image batch."""
+    with interpreter_lock:
+        if interpreter_path is None:
+            return keras_infer(tf.constant(images, dtype=tf.float32)).numpy()
+        
+        count = len(images)
+        batch_size = next((size for size in TFLITE_BATCH_SIZES if size >= count), count)
+        if batch_size not in interpreters:
+            interpreters[batch_size] = create_interpreter(interpreter_path, batch_size)
+        batch_interpreter, input_details, output_details = interpreters[batch_size]
+        if batch_size > count:
+            padding = np.zeros((batch_size - count, 64, 64, 1), dtype=np.float32)
+            images = np.concatenate([images, padding])
+        
+        # Quantized models take and return int8 values with a scale and zero point
+        input_scale, input_zero_point = input_details['quantization']
+        if input_scale:
+            images = np.clip(np.round(images / input_scale + input_zero_point), -128, 127)
+        batch_interpreter.set_tensor(input_details['index'], images.astype(input_details['dtype']))
+        batch_interpreter.invoke()
+        predictions = batch_interpreter.get_tensor(output_details['index'])[:count]
+    
+    output_scale, output_zero_point = output_details['quantization']
+    if output_scale:
+        predictions = (predictions.astype(np.float32) - output_zero_point) * output_scale
+    return predictions
+
+
+def batch_worker():
+    """Run queued (image, future) requests through the model in batches."""
+    while True:
+        pending = [prediction_queue.get()]
+        deadline = time.monotonic() + BATCH_WAIT_SECONDS
+        while len(pending) < MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                pending.append(prediction_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        
+        try:
+            predictions = run_model(np.concatenate([img_array for img_array, _ in pending]))
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            continue
+        for (_, future), row in zip(pending, predictions):
+            future.set_result(row)
+
+
+def start_batch_worker():
+    """Start the batching thread if it is not running yet."""
+    global batch_worker_thread
+    with batch_worker_lock:
+        if batch_worker_thread is None:
+            batch_worker_thread = threading.Thread(target=batch_worker, name='predict-batcher', daemon=True)
+            batch_worker_thread.start()
+
+
 def predict_character(image_data_base64):
     """
-    Predict character from base64 image.
+    Predict character from a base64 image (str or ASCII bytes, data URL prefix optional).
     
     Returns:
         dict with 'character', 'confidence', and 'alternatives'
     """
-    global model, char_mappings
-    
-    if model is None:
+    if model is None and interpreter_path is None:
         return None
     
+    if isinstance(image_data_base64, str):
+        image_data_base64 = image_data_base64.encode('ascii')
+    
+    key = hashlib.blake2b(image_data_base64, digest_size=16).digest()
+    with prediction_cache_lock:
+        cached = prediction_cache.get(key)
+        if cached is not None:
+            prediction_cache.move_to_end(key)
+            return cached
+    
+    result = _predict_uncached(image_data_base64)
+    if result is not None:
+        with prediction_cache_lock:
+            prediction_cache[key] = result
+            if len(prediction_cache) > PREDICTION_CACHE_SIZE:
+                prediction_cache.popitem(last=False)
+    return result
+
+
+def _predict_uncached(image_data_base64):
+    """Decode, preprocess and run one base64 image through the model."""
     try:
-        import numpy as np
-        from PIL import Image
-        
-        # Remove data URL prefix if present
-        if ',' in image_data_base64:
-            image_data_base64 = image_data_base64.split(',', 1)[1]
-        
-        # Decode image
-        image_data = base64.b64decode(image_data_base64)
+        # Skip the data URL prefix without copying the payload
+        comma = image_data_base64.find(b',')
+        image_data = binascii.a2b_base64(memoryview(image_data_base64)[comma + 1:])
         img = Image.open(BytesIO(image_data))
+        # Let the JPEG decoder downscale while decoding; no-op for PNG canvases
+        img.draft('L', (64, 64))
         
         # Preprocess image (same as training)
         if img.mode != 'L':
             img = img.convert('L')
-        img = img.resize((64, 64), Image.Resampling.LANCZOS)
-        img_array = np.array(img, dtype=np.float32) / 255.0
-        img_array = 1.0 - img_array  # Invert colors
-        img_array = np.expand_dims(img_array, axis=-1)
-        img_array = np.expand_dims(img_array, axis=0)  # Add batch dimension
+        img = img.resize((64, 64), Image.Resampling.LANCZOS, reducing_gap=2.0)
         
-        # Predict
-        predictions = model.predict(img_array, verbose=0)[0]
+        # Normalize and invert colors in place in this thread's (1, 64, 64, 1) batch buffer
+        img_array = getattr(request_scratch, 'img_array', None)
+        if img_array is None:
+            img_array = request_scratch.img_array = np.empty((1, 64, 64, 1), dtype=np.float32)
+        pixels = img_array[0, :, :, 0]
+        np.multiply(np.asarray(img), 1 / 255.0, out=pixels, dtype=np.float32)
+        np.subtract(1.0, pixels, out=pixels)
         
-        # Get top 5 predictions
-        idx_to_char = {int(k): v for k, v in char_mappings['idx_to_char'].items()}
-        top_indices = np.argsort(predictions)[-5:][::-1]
+        # Predict, batched with any other requests arriving at the same time
+        start_batch_worker()
+        future = Future()
+        prediction_queue.put((img_array, future))
+        predictions = future.result()
+        
+        # Get top 5 predictions; argpartition avoids sorting every class
+        top_k = min(5, len(predictions))
+        top_indices = np.argpartition(predictions, -top_k)[-top_k:]
+        top_indices = top_indices[np.argsort(predictions[top_indices])[::-1]]
         
         results = []
         for idx in top_indices:
@@ -159,7 +469,6 @@ def predict_character(image_data_base64):
         
     except Exception as e:
         print(f"ERROR in prediction: {e}")
-        import traceback
         traceback.print_exc()
         return None
 
@@ -167,11 +476,12 @@ def predict_character(image_data_base64):
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
+    return json_response({
         'status': 'running',
-        'model_loaded': model is not None,
+        'model_loaded': model is not None or interpreter_path is not None,
         'model_path': model_path,
-        'num_characters': len(char_mappings['char_to_idx']) if char_mappings else 0
+        'backend': interpreter_backend,
+        'num_characters': len(idx_to_char)
     })
 
 
@@ -179,27 +489,30 @@ def health_check():
 def predict():
     """Prediction endpoint."""
     try:
-        data = request.get_json()
-        
-        if not data or 'image' not in data:
-            return jsonify({'error': 'No image data provided'}), 400
-        
-        image_data = data['image']
+        if request.mimetype == 'application/json':
+            data = read_json_body()
+            if not data or not isinstance(data.get('image'), str):
+                return json_response({'error': 'No image data provided'}, 400)
+            image_data = data['image']
+        else:
+            # Raw base64 / data URL body, passed through as bytes
+            image_data = request.get_data()
+            if not image_data:
+                return json_response({'error': 'No image data provided'}, 400)
         
         # Predict
         result = predict_character(image_data)
         
         if result:
             print(f"Predicted: '{result['character']}' (confidence: {result['confidence']:.2f})")
-            return jsonify(result)
+            return json_response(result)
         else:
-            return jsonify({'error': 'Prediction failed'}), 500
+            return json_response({'error': 'Prediction failed'}, 500)
             
     except Exception as e:
         print(f"ERROR in /predict: {e}")
-        import traceback
         traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 
 def main():
@@ -223,7 +536,8 @@ def main():
     print("\nPress Ctrl+C to stop")
     print("="*60 + "\n")
     
-    app.run(host='localhost', port=8766, debug=False)
+    # Serve with waitress when installed; Flask's development server otherwise
+    serve_app(app, 8766)
 
 
 if __name__ == '__main__':
@@ -5,13 +5,39 @@ This module provides functions to send images to the OCR server
 and receive recognized text.
 """
 
-import urllib.request
-import urllib.error
 import json
-import base64
+
+import urllib3
+
+# Fast JSON when orjson is installed
+try:
+    import orjson
+
+    dumps_json = orjson.dumps
+    loads_json = orjson.loads
+except ImportError:
+    def dumps_json(obj):
+        """Serialize obj to UTF-8 JSON bytes."""
+        return json.dumps(obj).encode('utf-8')
+
+    loads_json = json.loads
 
 OCR_SERVER_URL = "http://localhost:8765"
 
+# Small pool of kept-alive connections to the OCR server, reused across calls instead of
+# a new TCP connection per request. Several connections let a health check go through
+# while a long /ocr call is still running.
+_pool = urllib3.PoolManager(num_pools=1, maxsize=4, retries=False)
+
+
+def _request_json(method, path, payload=None, timeout=2):
+    """Send a request to the OCR server over a pooled connection and parse the JSON reply."""
+    body = dumps_json(payload) if payload is not None else None
+    headers = {'Content-Type': 'application/json'} if body is not None else None
+    response = _pool.request(method, f'{OCR_SERVER_URL}{path}', body=body, headers=headers,
+                             timeout=timeout)
+    return loads_json(response.data)
+
 def check_ocr_server():
     """
     Check if the OCR server is running and healthy.
@@ -20,10 +46,8 @@ def check_ocr_server():
         bool: True if server is running and healthy, False otherwise
     """
     try:
-        request = urllib.request.Request(f"{OCR_SERVER_URL}/health")
-        with urllib.request.urlopen(request, timeout=2) as response:
-            data = json.loads(response.read().decode('utf-8'))
-            return data.get('status') == 'ok'
+        data = _request_json('GET', '/health')
+        return data.get('status') == 'ok'
     except Exception:
         return False
 
@@ -49,17 +73,9 @@ def recognize_text(image_data_url):
         }
         
         # Make HTTP request to OCR server
-        request = urllib.request.Request(
-            f"{OCR_SERVER_URL}/ocr",
-            data=json.dumps(payload).encode('utf-8'),
-            headers={'Content-Type': 'application/json'}
-        )
-        
-        with urllib.request.urlopen(request, timeout=120) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result
+        return _request_json('POST', '/ocr', payload, timeout=120)
     
-    except urllib.error.URLError as e:
+    except urllib3.exceptions.NewConnectionError:
         return {
             'success': False,
             'error': f'Cannot connect to OCR server. Make sure it is running at {OCR_SERVER_URL}',
@@ -82,9 +98,7 @@ def get_server_status():
         dict: Server status information or error
     """
     try:
-        request = urllib.request.Request(f"{OCR_SERVER_URL}/health")
-        with urllib.request.urlopen(request, timeout=2) as response:
-            return json.loads(response.read().decode('utf-8'))
+        return _request_json('GET', '/health')
     except Exception as e:
         return {
             'status': 'error',
@@ -10,15 +10,18 @@ Usage:
 The server will run on http://localhost:8765
 """
 
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+from flask import Flask, request
 import base64
 import io
+import threading
+import numpy as np
 from PIL import Image
 import logging
 
+from server_common import json_response, read_json_body, enable_cors, serve_app
+
 app = Flask(__name__)
-CORS(app)  # Allow requests from Anki
+enable_cors(app)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,18 +29,27 @@ logger = logging.getLogger(__name__)
 
 # Global variable to hold the OCR instance
 ocr = None
+# Requests are served on several threads; only the first one may load the model
+ocr_init_lock = threading.Lock()
 
 def init_ocr():
     """Initialize Manga OCR (lazy loading)."""
     global ocr
-    if ocr is None:
+    if ocr is not None:
+        return ocr
+    with ocr_init_lock:
+        if ocr is not None:
+            return ocr
         try:
             from manga_ocr import MangaOcr
             
             logger.info("Initializing Manga OCR...")
             logger.info("This will download models on first run (~400MB)...")
             # Initialize Manga OCR (optimized for Japanese handwriting/manga)
-            ocr = MangaOcr()
+            instance = MangaOcr()
+            # One dummy inference so the first real request runs on warm kernels
+            instance(Image.new('L', (64, 64), 255))
+            ocr = instance
             logger.info("Manga OCR initialized successfully")
         except ImportError:
             logger.error("Manga OCR not installed. Install with: pip install manga-ocr")
@@ -47,10 +59,18 @@ def init_ocr():
             raise
     return ocr
 
+def preload_ocr():
+    """Load Manga OCR in the background at startup; requests wait in init_ocr for the rest."""
+    try:
+        init_ocr()
+    except Exception:
+        # Already logged by init_ocr; the first request retries and reports the error
+        pass
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint."""
-    return jsonify({
+    return json_response({
         'status': 'ok',
         'service': 'paddleocr-server',
         'ocr_initialized': ocr is not None
@@ -76,12 +96,12 @@ def perform_ocr():
     """
     try:
         # Get JSON data
-        data = request.get_json()
-        if not data or 'image' not in data:
-            return jsonify({
+        data = read_json_body()
+        if not data or not isinstance(data.get('image'), str):
+            return json_response({
                 'success': False,
                 'error': 'No image data provided'
-            }), 400
+            }, 400)
         
         # Optional context for better recognition
         context = data.get('context', '')
@@ -97,30 +117,37 @@ def perform_ocr():
         image_bytes = base64.b64decode(image_data)
         image = Image.open(io.BytesIO(image_bytes))
         
-        # Convert to RGB if needed (remove alpha channel, handle grayscale)
-        if image.mode != 'RGB':
+        # Convert to RGB if needed (remove alpha channel); grayscale is kept as it is,
+        # Manga OCR converts every input to grayscale itself
+        if image.mode not in ('RGB', 'L'):
             image = image.convert('RGB')
         
         # For single characters, add padding and centering to help OCR
         # This simulates how the character would appear in a sentence
         width, height = image.size
         max_dim = max(width, height)
+        max_size = 1024
         
         # If image looks like a single character (roughly square), add context padding
         aspect_ratio = width / height if height > 0 else 1
         if 0.5 < aspect_ratio < 2.0:  # Roughly square = likely single character
-            # Create a larger canvas (3x size) and center the character
-            new_size = (max_dim * 3, max_dim * 3)
-            padded = Image.new('RGB', new_size, (255, 255, 255))  # White background
-            paste_x = (new_size[0] - width) // 2
-            paste_y = (new_size[1] - height) // 2
-            padded.paste(image, (paste_x, paste_y))
-            image = padded
-            logger.info(f"Added context padding for single character: {new_size}")
-        
-        # Resize if image is too large
-        max_size = 1024
-        if max(image.size) > max_size:
+            # Center the character on a larger canvas (3x size, capped at max_size).
+            # When the cap applies, only the character is scaled down, so the
+            # padded canvas is built at its final size and never resized
+            canvas_size = min(max_dim * 3, max_size)
+            if canvas_size < max_dim * 3:
+                ratio = canvas_size / (max_dim * 3)
+                width, height = max(1, round(width * ratio)), max(1, round(height * ratio))
+                image = image.resize((width, height), Image.LANCZOS)
+            pixels = np.asarray(image)
+            padded = np.full((canvas_size, canvas_size) + pixels.shape[2:], 255, dtype=np.uint8)
+            paste_x = (canvas_size - width) // 2
+            paste_y = (canvas_size - height) // 2
+            padded[paste_y:paste_y + height, paste_x:paste_x + width] = pixels
+            image = Image.fromarray(padded)
+            logger.info(f"Added context padding for single character: {(canvas_size, canvas_size)}")
+        elif max(image.size) > max_size:
+            # Resize if image is too large
             ratio = max_size / max(image.size)
             new_size = tuple(int(dim * ratio) for dim in image.size)
             image = image.resize(new_size, Image.LANCZOS)
@@ -149,7 +176,7 @@ def perform_ocr():
         if text and text.strip():
             logger.info(f"OCR result: {text}")
             
-            return jsonify({
+            return json_response({
                 'success': True,
                 'text': text.strip(),
                 'details': [{
@@ -160,7 +187,7 @@ def perform_ocr():
             })
         else:
             logger.info("No text detected")
-            return jsonify({
+            return json_response({
                 'success': True,
                 'text': '',
                 'details': []
@@ -170,10 +197,10 @@ def perform_ocr():
         logger.error(f"OCR error: {e}")
         import traceback
         traceback.print_exc()
-        return jsonify({
+        return json_response({
             'success': False,
             'error': str(e)
-        }), 500
+        }, 500)
 
 @app.route('/shutdown', methods=['POST'])
 def shutdown():
@@ -181,11 +208,13 @@ def shutdown():
     logger.info("Shutting down server...")
     func = request.environ.get('werkzeug.server.shutdown')
     if func is None:
-        return jsonify({'success': False, 'error': 'Not running with Werkzeug server'})
+        return json_response({'success': False, 'error': 'Not running with Werkzeug server'})
     func()
-    return jsonify({'success': True, 'message': 'Server shutting down...'})
+    return json_response({'success': True, 'message': 'Server shutting down...'})
 
 if __name__ == '__main__':
     logger.info("Starting PaddleOCR server on http://localhost:8765")
     logger.info("Press Ctrl+C to stop")
-    app.run(host='localhost', port=8765, debug=False)
+    threading.Thread(target=preload_ocr, name='ocr-preload', daemon=True).start()
+    # Serve with waitress when installed; Flask's development server otherwise
+    serve_app(app, 8765)
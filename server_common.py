@@ -0,0 +1,58 @@
+"""
+HTTP helpers shared by the standalone servers (model_server.py and ocr_server.py)
+"""
+
+import os
+
+from flask import current_app, jsonify, request
+
+# Fast JSON for request and response bodies when orjson is installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_response(obj, status=200):
+    """Build a JSON response (orjson when available, jsonify otherwise)."""
+    if orjson is None:
+        return jsonify(obj), status
+    return current_app.response_class(orjson.dumps(obj), status=status, mimetype='application/json')
+
+
+def read_json_body():
+    """Parse the JSON request body; None if it is missing, malformed or not a JSON object."""
+    if orjson is None:
+        data = request.get_json(silent=True)
+    else:
+        try:
+            data = orjson.loads(request.get_data())
+        except orjson.JSONDecodeError:
+            return None
+    return data if isinstance(data, dict) else None
+
+
+def add_cors_headers(response):
+    """Allow cross-origin calls to the POST endpoints; /health is left alone."""
+    if request.method in ('POST', 'OPTIONS'):
+        response.headers['Access-Control-Allow-Origin'] = '*'
+        if request.method == 'OPTIONS':
+            # Preflight: Flask answers OPTIONS for every route itself
+            response.headers['Access-Control-Allow-Methods'] = 'POST, OPTIONS'
+            response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    return response
+
+
+def enable_cors(app):
+    """Register add_cors_headers on app."""
+    app.after_request(add_cors_headers)
+
+
+def serve_app(app, port):
+    """Serve app on localhost with waitress when installed; Flask's development server otherwise."""
+    try:
+        from waitress import serve
+    except ImportError:
+        app.run(host='localhost', port=port, debug=False, threaded=True)
+    else:
+        serve(app, host='localhost', port=port, threads=max(4, os.cpu_count() or 1))
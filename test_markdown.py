@@ -0,0 +1,47 @@
+"""
+Regression checks for the completion summary markdown renderer
+
+Usage: python test_markdown.py
+"""
+
+from markdown_render import render_markdown
+
+
+CASES = [
+    # List bullets are not emphasis markers
+    ("* **Particles**: confusing は and が",
+     "<p><ul>\n<li><strong>Particles</strong>: confusing は and が</li>\n</ul></p>"),
+    ("- *x*",
+     "<p><ul>\n<li><em>x</em></li>\n</ul></p>"),
+    ("* **x**\n- *y*",
+     "<p><ul>\n<li><strong>x</strong></li>\n<li><em>y</em></li>\n</ul></p>"),
+    # Headers, inline markup inside them, and paragraphs
+    ("## **Key** points\n\nReview 助詞[じょし].",
+     "<p><h2><strong>Key</strong> points</h2></p><p>Review <ruby>助詞<rt>じょし</rt></ruby>.</p>"),
+    # Spaced asterisks are left alone
+    ("2 * 3 * 4",
+     "<p>2 * 3 * 4</p>"),
+    ("Use `は` for __topics__ and _contrast_",
+     "<p>Use <code>は</code> for <strong>topics</strong> and <em>contrast</em></p>"),
+    # Nested emphasis
+    ("**bold *italic***",
+     "<p><strong>bold <em>italic</em></strong></p>"),
+    ("*italic **bold***",
+     "<p><em>italic <strong>bold</strong></em></p>"),
+    ("***both***",
+     "<p><strong><em>both</em></strong></p>"),
+    ("**a *b* c** and __d _e___",
+     "<p><strong>a <em>b</em> c</strong> and <strong>d <em>e</em></strong></p>"),
+]
+
+
+def test_render_markdown():
+    """Each case renders to exactly the expected HTML."""
+    for text, expected in CASES:
+        html = render_markdown(text)
+        assert html == expected, f"{text!r}\n  expected: {expected!r}\n  got:      {html!r}"
+
+
+if __name__ == '__main__':
+    test_render_markdown()
+    print(f"All {len(CASES)} markdown cases passed")
@@ -5,8 +5,11 @@ Test trained handwriting recognition model
 import numpy as np
 import json
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 from tensorflow import keras
-from data_prep import load_dataset, decode_image, preprocess_image
+from data_prep import load_dataset, preprocess_image, _process_one
 
 
 def load_latest_model():
@@ -62,8 +65,10 @@ def predict_image(model, img_array, idx_to_char, top_k=5):
     # Predict
     predictions = model.predict(img_array, verbose=0)[0]
     
-    # Get top K predictions
-    top_indices = np.argsort(predictions)[-top_k:][::-1]
+    # Get top K predictions; argpartition avoids sorting every class
+    top_k = min(top_k, len(predictions))
+    top_indices = np.argpartition(predictions, -top_k)[-top_k:]
+    top_indices = top_indices[np.argsort(predictions[top_indices])[::-1]]
     
     results = []
     for idx in top_indices:
@@ -74,49 +79,55 @@ def predict_image(model, img_array, idx_to_char, top_k=5):
     return results
 
 
-def test_on_dataset(model, dataset, char_to_idx, idx_to_char):
+def test_on_dataset(model, dataset, char_to_idx, idx_to_char, batch_size=256, workers=None):
     """Test model on all samples in dataset."""
     print("\n" + "="*60)
     print("TESTING MODEL ON DATASET")
     print("="*60)
     
-    correct = 0
-    total = 0
-    per_char_accuracy = {}
+    # Skip characters not in training set
+    test_chars = [char for char in dataset if char in char_to_idx]
+    num_samples = sum(len(dataset[char]) for char in test_chars)
+    
+    # Preprocess every sample into one array so the model runs in large batches
+    X = np.empty((num_samples, 64, 64, 1), dtype=np.float32)
+    labels = []
+    char_ranges = []  # (char, start, end) of each character's samples in X
+    # Decoding and resizing are CPU-bound, so spread the samples over worker processes
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(
+            partial(_process_one, target_size=(64, 64), dtype=np.float32),
+            (sample['image'] for char in test_chars for sample in dataset[char]),
+            chunksize=32,
+        )
+        for true_char in test_chars:
+            start = len(labels)
+            for img_array in islice(results, len(dataset[true_char])):
+                if isinstance(img_array, Exception):
+                    print(f"Error testing sample: {img_array}")
+                    continue
+                X[len(labels)] = img_array
+                labels.append(true_char)
+            char_ranges.append((true_char, start, len(labels)))
+    X = X[:len(labels)]
     
-    for true_char, samples in dataset.items():
-        if true_char not in char_to_idx:
-            continue  # Skip characters not in training set
-        
-        char_correct = 0
-        char_total = 0
-        
-        for sample in samples:
-            try:
-                # Preprocess
-                img = decode_image(sample['image'])
-                img_array = preprocess_image(img, target_size=(64, 64))
-                
-                # Predict
-                predictions = predict_image(model, img_array, idx_to_char, top_k=1)
-                predicted_char = predictions[0][0]
-                
-                # Check if correct
-                if predicted_char == true_char:
-                    correct += 1
-                    char_correct += 1
-                
-                total += 1
-                char_total += 1
-                
-            except Exception as e:
-                print(f"Error testing sample: {e}")
-                continue
-        
-        if char_total > 0:
-            per_char_accuracy[true_char] = (char_correct / char_total) * 100
+    # Predict
+    idx_to_char_arr = np.array([idx_to_char[i] for i in range(len(idx_to_char))])
+    labels = np.array(labels)
+    if len(labels):
+        predictions = model.predict(X, batch_size=batch_size, verbose=0)
+        is_correct = idx_to_char_arr[predictions.argmax(axis=1)] == labels
+    else:
+        is_correct = np.zeros(0, dtype=bool)
+    
+    per_char_accuracy = {}
+    for true_char, start, end in char_ranges:
+        if end > start:
+            per_char_accuracy[true_char] = float(is_correct[start:end].mean()) * 100
     
     # Print results
+    correct = int(is_correct.sum())
+    total = len(labels)
     overall_accuracy = (correct / total * 100) if total > 0 else 0
     
     print(f"\nOverall Accuracy: {overall_accuracy:.2f}% ({correct}/{total})")
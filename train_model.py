@@ -3,8 +3,10 @@ Train handwriting recognition model
 """
 
 import numpy as np
+import hashlib
 import json
 import os
+import shutil
 from datetime import datetime
 
 # TensorFlow imports
@@ -13,23 +15,37 @@ from tensorflow import keras
 from tensorflow.keras import layers
 from sklearn.model_selection import train_test_split
 
-from data_prep import load_dataset, prepare_training_data, get_dataset_stats, print_stats
+from data_prep import (load_dataset, prepare_training_data, load_prepared_data, get_dataset_stats,
+                       print_stats, ijson)
 
+# Decoded training images are kept here between runs (see get_prepared_cache_dir)
+PREPARED_CACHE_ROOT = "prepared_data"
 
-def create_model(num_classes, input_shape=(64, 64, 1)):
+
+def create_model(num_classes, input_shape=(64, 64, 1), use_augmentation=False, jit_compile=False):
     """
     Create a lightweight CNN model for handwriting recognition.
     
     Args:
         num_classes: Number of character classes
         input_shape: Input image shape (height, width, channels)
+        use_augmentation: Start the model with the random augmentation layers; they
+                          run inside each training step and pass images through unchanged
+                          at inference
+        jit_compile: Compile the training step with XLA, fusing the elementwise ops
+                     into the convolution kernels
     
     Returns:
         Compiled Keras model
     """
+    augmentation = [create_data_augmentation()] if use_augmentation else []
+    
     model = keras.Sequential([
+        keras.Input(shape=input_shape),
+        *augmentation,
+        
         # First convolutional block
-        layers.Conv2D(32, (3, 3), activation='relu', input_shape=input_shape),
+        layers.Conv2D(32, (3, 3), activation='relu'),
         layers.MaxPooling2D((2, 2)),
         layers.Dropout(0.25),
         
@@ -43,22 +59,48 @@ def create_model(num_classes, input_shape=(64, 64, 1)):
         layers.MaxPooling2D((2, 2)),
         layers.Dropout(0.25),
         
-        # Flatten and dense layers
-        layers.Flatten(),
+        # Pool each feature map to one value (6x6x128 -> 128) and classify; this keeps
+        # the first dense layer at 128x128 weights instead of 4608x128
+        layers.GlobalAveragePooling2D(),
         layers.Dense(128, activation='relu'),
         layers.Dropout(0.5),
-        layers.Dense(num_classes, activation='softmax')
+        # Kept in float32 under mixed precision so softmax and the loss stay stable
+        layers.Dense(num_classes, activation='softmax', dtype='float32')
     ])
     
     model.compile(
         optimizer='adam',
         loss='sparse_categorical_crossentropy',
-        metrics=['accuracy']
+        metrics=['accuracy'],
+        jit_compile=jit_compile,
+        # Run up to 32 batches per call into the compiled train function; with a model
+        # this small the per-step Python overhead is otherwise as large as the step
+        steps_per_execution=32
     )
     
     return model
 
 
+def get_prepared_cache_dir(dataset_file, min_samples, target_size=(64, 64)):
+    """
+    Directory for the prepared arrays of this version of the dataset file.
+    
+    The name is a hash of the file's size and modification time plus the preparation
+    settings, so any change to the dataset starts a new cache. Caches of other
+    versions are removed.
+    """
+    st = os.stat(dataset_file)
+    source = f"{os.path.abspath(dataset_file)}|{st.st_size}|{st.st_mtime_ns}|{min_samples}|{target_size}"
+    cache_dir = os.path.join(PREPARED_CACHE_ROOT, hashlib.md5(source.encode('utf-8')).hexdigest()[:12])
+    
+    if os.path.isdir(PREPARED_CACHE_ROOT):
+        for name in os.listdir(PREPARED_CACHE_ROOT):
+            path = os.path.join(PREPARED_CACHE_ROOT, name)
+            if path != cache_dir:
+                shutil.rmtree(path, ignore_errors=True)
+    return cache_dir
+
+
 def create_data_augmentation():
     """Create data augmentation pipeline."""
     return keras.Sequential([
@@ -73,7 +115,10 @@ def train_model(dataset_file="handwriting_dataset.json",
                 batch_size=16,
                 validation_split=0.2,
                 min_samples=2,
-                use_augmentation=True):
+                use_augmentation=True,
+                mixed_precision=None,
+                jit_compile=None,
+                use_cache=True):
     """
     Train the handwriting recognition model.
     
@@ -84,12 +129,23 @@ def train_model(dataset_file="handwriting_dataset.json",
         validation_split: Fraction of data for validation
         min_samples: Minimum samples per character
         use_augmentation: Whether to use data augmentation
+        mixed_precision: Compute in float16 with float32 weights; None enables it when
+                         a GPU is available (it is slower on CPU)
+        jit_compile: Compile the training step with XLA; None enables it when a GPU
+                     is available
+        use_cache: Reuse the decoded images from an earlier run on the same dataset file
     
     Returns:
         model, history, char_to_idx, idx_to_char
     """
     print("Loading dataset...")
-    dataset = load_dataset(dataset_file)
+    if ijson is not None:
+        # Stream the file instead of holding every encoded image in memory
+        if not os.path.exists(dataset_file):
+            raise FileNotFoundError(f"Dataset file not found: {dataset_file}")
+        dataset = dataset_file
+    else:
+        dataset = load_dataset(dataset_file)
     
     # Show statistics
     stats = get_dataset_stats(dataset)
@@ -101,46 +157,93 @@ def train_model(dataset_file="handwriting_dataset.json",
         print("Recommended: At least 10-20 samples per character, 50+ total.")
     
     # Prepare data
-    print("Preparing training data...")
-    X, y, char_to_idx, idx_to_char = prepare_training_data(
-        dataset, 
-        target_size=(64, 64),
-        min_samples=min_samples
-    )
+    cache_dir = get_prepared_cache_dir(dataset_file, min_samples) if use_cache else None
+    if cache_dir and os.path.exists(os.path.join(cache_dir, 'meta.json')):
+        print(f"Using prepared training data from {cache_dir}")
+        X, y, char_to_idx, idx_to_char = load_prepared_data(cache_dir)
+    else:
+        print("Preparing training data...")
+        X, y, char_to_idx, idx_to_char = prepare_training_data(
+            dataset, 
+            target_size=(64, 64),
+            min_samples=min_samples,
+            cache_dir=cache_dir
+        )
     
     num_classes = len(char_to_idx)
     
     if num_classes < 2:
         raise ValueError("Need at least 2 different characters to train!")
     
-    # Split data
-    X_train, X_val, y_train, y_val = train_test_split(
-        X, y, test_size=validation_split, random_state=42, stratify=y
+    # Split sample indices only; images are read from X a batch at a time, so X can stay a
+    # disk-backed memmap (as it is when it comes from the prepared-data cache)
+    train_idx, val_idx = train_test_split(
+        np.arange(len(y)), test_size=validation_split, random_state=42, stratify=y
     )
     
-    print(f"\nTraining samples: {len(X_train)}")
-    print(f"Validation samples: {len(X_val)}")
+    print(f"\nTraining samples: {len(train_idx)}")
+    print(f"Validation samples: {len(val_idx)}")
+    
+    # Mixed precision runs convs and matmuls on Tensor Cores; Keras adds loss scaling
+    # to the optimizer when the model is compiled under this policy
+    has_gpu = bool(tf.config.list_physical_devices('GPU'))
+    if mixed_precision is None:
+        mixed_precision = has_gpu
+    keras.mixed_precision.set_global_policy('mixed_float16' if mixed_precision else 'float32')
+    if mixed_precision:
+        print("\nUsing mixed precision (float16)")
+    
+    # With several GPUs each one trains on a slice of every batch and gradients are
+    # all-reduced over NCCL; batch_size stays the per-GPU batch size
+    strategy = tf.distribute.get_strategy()
+    if len(tf.config.list_physical_devices('GPU')) > 1:
+        strategy = tf.distribute.MirroredStrategy()
+        print(f"\nTraining on {strategy.num_replicas_in_sync} GPUs")
+    batch_size *= strategy.num_replicas_in_sync
+    
+    # XLA fuses the small elementwise ops between layers; it pays off on GPU
+    if jit_compile is None:
+        jit_compile = has_gpu
     
     # Create model
     print(f"\nCreating model for {num_classes} classes...")
-    model = create_model(num_classes, input_shape=(64, 64, 1))
-    model.summary()
-    
-    # Create data augmentation
     if use_augmentation:
         print("\nUsing data augmentation")
-        data_augmentation = create_data_augmentation()
-        
-        # Apply augmentation to training data
-        X_train_aug = data_augmentation(X_train, training=True)
-    else:
-        X_train_aug = X_train
+    with strategy.scope():
+        model = create_model(num_classes, input_shape=(64, 64, 1), use_augmentation=use_augmentation,
+                             jit_compile=jit_compile)
+    model.summary()
+    
+    # Gather a batch of samples from X and y; sorted indices read the memmap in file order
+    def gather_batch(indices):
+        indices = np.sort(indices)
+        return X[indices], y[indices]
+    
+    def load_batch(indices):
+        images, labels = tf.numpy_function(gather_batch, [indices], [tf.as_dtype(X.dtype), tf.int32])
+        images.set_shape((None, *X.shape[1:]))
+        labels.set_shape((None,))
+        return images, labels
+    
+    # Images are kept as uint8 until a batch is fed to the model, which expects [0, 1]
+    def to_model_input(images, labels):
+        return tf.cast(images, tf.float32) / 255.0, labels
+    
+    # Batches are read and cast on parallel threads and prefetched while the model trains
+    # on the previous one; the validation set never changes, so it is read once and cached
+    train_ds = tf.data.Dataset.from_tensor_slices(train_idx).shuffle(len(train_idx)).batch(batch_size)
+    train_ds = train_ds.map(load_batch, num_parallel_calls=tf.data.AUTOTUNE)
+    train_ds = train_ds.map(to_model_input, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+    val_ds = tf.data.Dataset.from_tensor_slices(val_idx).batch(batch_size)
+    val_ds = val_ds.map(load_batch, num_parallel_calls=tf.data.AUTOTUNE).cache()
+    val_ds = val_ds.map(to_model_input, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
     
     # Callbacks
     callbacks = [
         keras.callbacks.EarlyStopping(
             monitor='val_loss',
             patience=15,
+            min_delta=1e-3,
             restore_best_weights=True
         ),
         keras.callbacks.ReduceLROnPlateau(
@@ -162,10 +265,9 @@ def train_model(dataset_file="handwriting_dataset.json",
     print("This may take 5-15 minutes depending on your hardware.\n")
     
     history = model.fit(
-        X_train_aug, y_train,
-        validation_data=(X_val, y_val),
+        train_ds,
+        validation_data=val_ds,
         epochs=epochs,
-        batch_size=batch_size,
         callbacks=callbacks,
         verbose=1
     )
@@ -175,7 +277,7 @@ def train_model(dataset_file="handwriting_dataset.json",
     print("TRAINING COMPLETE")
     print("="*60)
     
-    val_loss, val_accuracy = model.evaluate(X_val, y_val, verbose=0)
+    val_loss, val_accuracy = model.evaluate(val_ds, verbose=0)
     print(f"Final Validation Loss: {val_loss:.4f}")
     print(f"Final Validation Accuracy: {val_accuracy*100:.2f}%")
     
@@ -187,6 +289,11 @@ def train_model(dataset_file="handwriting_dataset.json",
     model.save(model_file)
     print(f"\nModel saved to: {model_file}")
     
+    # A few hundred training images let model_server.py calibrate an int8 version of the model
+    calib_file = f"handwriting_model_{timestamp}.calib.npy"
+    np.save(calib_file, X[np.sort(train_idx[:300])])
+    print(f"Calibration images saved to: {calib_file}")
+    
     with open(mapping_file, 'w', encoding='utf-8') as f:
         json.dump({
             'char_to_idx': char_to_idx,
@@ -219,10 +326,12 @@ def test_prediction(model, dataset, char_to_idx, idx_to_char, character=None):
     
     # Predict
     img_batch = np.expand_dims(img_array, axis=0)
-    predictions = model.predict(img_batch, verbose=0)[0]
+    predictions = model(img_batch, training=False).numpy()[0]
     
-    # Get top 5 predictions
-    top_indices = np.argsort(predictions)[-5:][::-1]
+    # Get top 5 predictions; argpartition avoids sorting every class
+    top_k = min(5, len(predictions))
+    top_indices = np.argpartition(predictions, -top_k)[-top_k:]
+    top_indices = top_indices[np.argsort(predictions[top_indices])[::-1]]
     
     print(f"\nPredictions for character '{character}':")
     print("-" * 40)
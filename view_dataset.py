@@ -6,8 +6,17 @@ Displays collected handwriting samples from handwriting_dataset.json
 import json
 import base64
 from io import BytesIO
+import numpy as np
 from PIL import Image
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+# Optional: parses the dataset file several times faster than the json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 DATASET_FILE = "handwriting_dataset.json"
 
@@ -18,18 +27,25 @@ def load_dataset():
         print(f"Dataset file not found: {DATASET_FILE}")
         return {}
     
+    if orjson is not None:
+        with open(DATASET_FILE, 'rb') as f:
+            return orjson.loads(f.read())
     with open(DATASET_FILE, 'r', encoding='utf-8') as f:
         return json.load(f)
 
 
-def decode_image(base64_string):
-    """Decode base64 image string to PIL Image."""
+def decode_image_bytes(base64_string):
+    """Decode base64 image string to the encoded image file bytes."""
     # Remove data URL prefix if present
     if ',' in base64_string:
         base64_string = base64_string.split(',', 1)[1]
     
-    image_data = base64.b64decode(base64_string)
-    return Image.open(BytesIO(image_data))
+    return base64.b64decode(base64_string)
+
+
+def decode_image(base64_string):
+    """Decode base64 image string to PIL Image."""
+    return Image.open(BytesIO(decode_image_bytes(base64_string)))
 
 
 def display_dataset_summary(dataset):
@@ -38,7 +54,8 @@ def display_dataset_summary(dataset):
     print("HANDWRITING DATASET SUMMARY")
     print("="*60)
     
-    total_samples = sum(len(samples) for samples in dataset.values())
+    counts = {char: len(samples) for char, samples in dataset.items()}
+    total_samples = sum(counts.values())
     print(f"\nTotal Characters: {len(dataset)}")
     print(f"Total Samples: {total_samples}")
     print(f"Average Samples per Character: {total_samples / len(dataset):.1f}" if dataset else 0)
@@ -47,11 +64,9 @@ def display_dataset_summary(dataset):
     print("Samples per Character:")
     print("-"*60)
     
-    # Sort by number of samples (descending)
-    sorted_chars = sorted(dataset.items(), key=lambda x: len(x[1]), reverse=True)
-    
-    for char, samples in sorted_chars:
-        print(f"  {char}: {len(samples)} samples")
+    # Sort by number of samples (descending), written out in one call
+    sorted_chars = sorted(counts.items(), key=lambda x: x[1], reverse=True)
+    sys.stdout.write("".join(f"  {char}: {count} samples\n" for char, count in sorted_chars))
     
     print("="*60)
 
@@ -78,19 +93,25 @@ def view_character_samples(dataset, character):
         
         # Decode and display image
         try:
-            img = decode_image(sample['image'])
+            image_data = decode_image_bytes(sample['image'])
+            # Opening only parses the header; pixels are decoded if the image is re-encoded
+            img = Image.open(BytesIO(image_data))
             print(f"  Image Size: {img.size}")
             
-            # Save to sample folder
+            # Save to sample folder; PNG samples are written out as stored
             sample_file = os.path.join(sample_dir, f"sample_{i}.png")
-            img.save(sample_file)
+            if img.format == 'PNG':
+                with open(sample_file, 'wb') as f:
+                    f.write(image_data)
+            else:
+                img.save(sample_file)
             print(f"  Saved to: {sample_file}")
             
         except Exception as e:
             print(f"  Error displaying image: {e}")
 
 
-def create_character_grid(dataset, character, output_file=None):
+def create_character_grid(dataset, character, output_file=None, open_file=True):
     """Create a grid image showing all samples for a character."""
     if character not in dataset:
         print(f"\nNo samples found for character: {character}")
@@ -107,10 +128,10 @@ def create_character_grid(dataset, character, output_file=None):
     sample_size = 300  # Original size
     padding = 10
     
-    # Create grid image
+    # Create grid image; samples are copied into a white pixel array with slice writes
     grid_width = cols * (sample_size + padding) + padding
     grid_height = rows * (sample_size + padding) + padding
-    grid = Image.new('RGB', (grid_width, grid_height), 'white')
+    grid = np.full((grid_height, grid_width, 3), 255, dtype=np.uint8)
     
     print(f"\nCreating grid for '{character}' ({num_samples} samples)...")
     print(f"Grid size: {cols}x{rows}")
@@ -118,6 +139,9 @@ def create_character_grid(dataset, character, output_file=None):
     for i, sample in enumerate(samples):
         try:
             img = decode_image(sample['image'])
+            if img.mode != 'RGB':
+                img = img.convert('RGB')
+            pixels = np.asarray(img)[:sample_size, :sample_size]
             
             # Calculate position
             row = i // cols
@@ -126,7 +150,7 @@ def create_character_grid(dataset, character, output_file=None):
             y = padding + row * (sample_size + padding)
             
             # Paste image
-            grid.paste(img, (x, y))
+            grid[y:y + pixels.shape[0], x:x + pixels.shape[1]] = pixels
             
         except Exception as e:
             print(f"Error processing sample {i+1}: {e}")
@@ -135,27 +159,37 @@ def create_character_grid(dataset, character, output_file=None):
     if output_file is None:
         output_file = f"grid_{character}.png"
     
-    grid.save(output_file)
+    # Fast, light compression: these are preview images
+    Image.fromarray(grid).save(output_file, compress_level=1)
     print(f"Grid saved to: {output_file}")
     
     # Try to open
-    try:
-        os.startfile(output_file)
-    except:
-        print("(Could not auto-open grid)")
+    if open_file:
+        try:
+            os.startfile(output_file)
+        except:
+            print("(Could not auto-open grid)")
     
     return output_file
 
 
+def _export_grid(item):
+    """Create one character's grid in a worker process; only that character's samples are sent."""
+    character, samples = item
+    try:
+        create_character_grid({character: samples}, character, open_file=False)
+    except Exception as e:
+        print(f"Error creating grid for '{character}': {e}")
+
+
 def export_all_grids(dataset):
     """Export grid images for all characters."""
     print("\nExporting grids for all characters...")
     
-    for character in dataset.keys():
-        try:
-            create_character_grid(dataset, character)
-        except Exception as e:
-            print(f"Error creating grid for '{character}': {e}")
+    # PNG decoding and encoding are CPU-bound, so characters are spread over processes
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for _ in executor.map(_export_grid, dataset.items()):
+            pass
     
     print("\nAll grids exported!")
 
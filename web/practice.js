@@ -0,0 +1,1369 @@
+// Initialize undo/redo functionality
+window.undoHistory = [];
+window.updateUndoRedoButtons = function() {
+    var undoBtn = document.getElementById('undo-btn');
+    var redoBtn = document.getElementById('redo-btn');
+    if (undoBtn) undoBtn.disabled = !window.currentStrokes || window.currentStrokes.length === 0;
+    if (redoBtn) redoBtn.disabled = !window.undoHistory || window.undoHistory.length === 0;
+};
+
+window.undoStroke = function() {
+    if (!window.currentStrokes || window.currentStrokes.length === 0) return;
+
+    // Remove last stroke and add to redo history
+    var lastStroke = window.currentStrokes.pop();
+    window.undoHistory.push(lastStroke);
+
+    // Update stroke index if in dictionary mode
+    if (window.dictionaryMode && window.currentStrokeIndex > 0) {
+        window.currentStrokeIndex--;
+    }
+
+    window.updateUndoRedoButtons();
+    if (window.redrawCanvas) window.redrawCanvas();
+};
+
+window.redoStroke = function() {
+    if (window.undoHistory.length === 0) return;
+
+    // Restore last undone stroke
+    var stroke = window.undoHistory.pop();
+    window.currentStrokes.push(stroke);
+
+    // Update stroke index if in dictionary mode
+    if (window.dictionaryMode && window.currentStrokeIndex < window.ghostStrokes.length) {
+        window.currentStrokeIndex++;
+    }
+
+    window.updateUndoRedoButtons();
+    if (window.redrawCanvas) window.redrawCanvas();
+};
+
+// Path2D for each committed stroke ({x, y} point list), built once and
+// reused whenever the stroke is painted again (layer repaint, OCR, samples)
+var strokePathCache = new WeakMap();
+window.getStrokePath = function(stroke) {
+    var path = strokePathCache.get(stroke);
+    if (!path) {
+        path = new Path2D();
+        path.moveTo(stroke[0].x, stroke[0].y);
+        for (var j = 1; j < stroke.length; j++) {
+            path.lineTo(stroke[j].x, stroke[j].y);
+        }
+        strokePathCache.set(stroke, path);
+    }
+    return path;
+};
+
+// Initialize canvas on page load
+(function() {
+    function initCanvas() {
+        var container = document.getElementById('canvas-container');
+        if (!container) {
+            console.error('Canvas container not found');
+            return;
+        }
+
+        // Two stacked canvases: the grid is painted once on the background,
+        // so redraws and clears only touch the drawing canvas on top
+        var stack = document.createElement('div');
+        stack.style.position = 'relative';
+        stack.style.display = 'inline-block';
+        container.appendChild(stack);
+
+        var bgCanvas = document.createElement('canvas');
+        bgCanvas.id = 'bg-canvas';
+        bgCanvas.width = 300;
+        bgCanvas.height = 300;
+        bgCanvas.style.position = 'absolute';
+        bgCanvas.style.left = '0';
+        bgCanvas.style.top = '0';
+        bgCanvas.style.zIndex = '0';
+        bgCanvas.style.border = '2px solid transparent';
+        bgCanvas.style.pointerEvents = 'none';
+        stack.appendChild(bgCanvas);
+
+        // Create canvas
+        var canvas = document.createElement('canvas');
+        canvas.id = 'drawing-canvas';
+        canvas.width = 300;
+        canvas.height = 300;
+        canvas.style.position = 'relative';
+        canvas.style.zIndex = '1';
+        canvas.style.border = '2px solid #333';
+        canvas.style.cursor = 'crosshair';
+        canvas.style.touchAction = 'none';
+        stack.appendChild(canvas);
+
+        window.bgCtx = bgCanvas.getContext('2d');
+        window.ctx = canvas.getContext('2d');
+
+        // Base context state is the user stroke style; drawGhostStrokes
+        // wraps its own styles in save/restore
+        window.ctx.strokeStyle = '#000';
+        window.ctx.lineWidth = 3;
+        window.ctx.lineCap = 'round';
+        window.ctx.lineJoin = 'round';
+        window.isDrawing = false;
+        window.currentStrokes = [];
+        window.currentStroke = null;
+        window.currentStrokeIndex = 0;
+        window.ghostStrokes = [];
+        window.dictionaryMode = false;
+
+        // Animation variables (copied from card view)
+        window.drawProgress = 0;
+        window.repeatProgress = 0;
+        window.previousStrokeIndex = 0;
+        window.lastAnimTime = null;
+        window.drawDuration = 12000;
+        window.repeatDuration = 1600;
+        window.dashLength = 1000;
+
+        // Set up event listeners for drawing
+        canvas.addEventListener('pointerdown', window.startDrawing);
+        canvas.addEventListener('pointermove', window.draw);
+        canvas.addEventListener('pointerup', window.endDrawing);
+        canvas.addEventListener('pointercancel', window.endDrawing);
+
+        // Draw the grid once on the background layer
+        window.drawGrid();
+
+        // Initialize undo/redo button states
+        window.updateUndoRedoButtons();
+
+        // Start animation loop for dictionary mode (copied from card view)
+        function animate(timestamp) {
+            if (!window.lastAnimTime) window.lastAnimTime = timestamp;
+            var dt = timestamp - window.lastAnimTime;
+            window.lastAnimTime = timestamp;
+
+            if (window.dictionaryMode && window.ghostStrokes && window.ghostStrokes.length > 0) {
+                // Reset animation if current stroke changed
+                if (window.currentStrokeIndex !== window.previousStrokeIndex) {
+                    window.drawProgress = 0;
+                    window.repeatProgress = 0;
+                    window.previousStrokeIndex = window.currentStrokeIndex;
+                }
+
+                // Update animation progress
+                window.drawProgress += dt / window.drawDuration;
+                if (window.drawProgress > 1) window.drawProgress = 1;
+
+                window.repeatProgress += dt / window.repeatDuration;
+                if (window.repeatProgress >= 1) {
+                    window.repeatProgress = 0;
+                    window.drawProgress = 0;
+                }
+
+                window.redrawCanvas();
+            }
+            requestAnimationFrame(animate);
+        }
+        requestAnimationFrame(animate);
+
+        console.log('Canvas initialized');
+    }
+
+    // Canvas position, measured once per stroke in startDrawing so pointer
+    // moves during the stroke do not force a layout
+    var canvasRect = null;
+
+    // Drawing helper functions
+    function getPos(evt) {
+        var rect = canvasRect;
+        if (!rect) return {x: 0, y: 0};
+        var cx, cy;
+        if (evt.touches && evt.touches.length > 0) {
+            cx = evt.touches[0].clientX;
+            cy = evt.touches[0].clientY;
+        } else {
+            cx = evt.clientX;
+            cy = evt.clientY;
+        }
+        return { x: cx - rect.left, y: cy - rect.top };
+    }
+
+    // Offscreen canvas for stroke validation
+    // OffscreenCanvas keeps it out of the DOM; willReadFrequently keeps the
+    // bitmap in CPU memory so getImageData does not stall on a GPU readback
+    var offscreenCanvas;
+    if (typeof OffscreenCanvas !== 'undefined') {
+        offscreenCanvas = new OffscreenCanvas(109, 109);
+    } else {
+        offscreenCanvas = document.createElement('canvas');
+        offscreenCanvas.width = 109;
+        offscreenCanvas.height = 109;
+    }
+    var offctx = offscreenCanvas.getContext('2d', { willReadFrequently: true });
+
+    // Rasterized canonical strokes, keyed by their Path2D (dropped with the kanji's ghost strokes)
+    var canonicalRasterCache = new WeakMap();
+
+    // Render a canonical stroke corridor once and keep a one-bit-per-pixel
+    // corridor mask (372 uint32s for 109x109) plus its bounding box
+    window.getCanonicalRaster = function(canonicalPath) {
+        var cached = canonicalRasterCache.get(canonicalPath);
+        if (cached !== undefined) return cached;
+
+        var W = 109, H = 109;
+        var CORRIDOR_WIDTH = 10;
+
+        // Render canonical stroke
+        offctx.clearRect(0, 0, W, H);
+        offctx.save();
+        offctx.lineWidth = CORRIDOR_WIDTH;
+        offctx.lineCap = 'round';
+        offctx.strokeStyle = '#ffffff';
+        offctx.setLineDash([]);
+        offctx.stroke(canonicalPath);
+        offctx.restore();
+
+        // One 32-bit word per RGBA pixel; on the little-endian platforms Anki
+        // runs on, the alpha byte is the top 8 bits of the word
+        var pixels = new Uint32Array(offctx.getImageData(0, 0, W, H).data.buffer);
+
+        // Fold the alpha channel into the corridor bitmask and mark occupied
+        // rows/columns in the same pass; the bounding box is the first/last mark
+        var mask = new Uint32Array((W * H + 31) >> 5);
+        var rowHas = new Uint8Array(H), colHas = new Uint8Array(W);
+        for (var y = 0, p = 0; y < H; y++) {
+            for (var x = 0; x < W; x++, p++) {
+                if (pixels[p] >>> 24) {
+                    mask[p >> 5] |= 1 << (p & 31);
+                    rowHas[y] = 1;
+                    colHas[x] = 1;
+                }
+            }
+        }
+        var minCX = colHas.indexOf(1), maxCX = colHas.lastIndexOf(1);
+        var minCY = rowHas.indexOf(1), maxCY = rowHas.lastIndexOf(1);
+
+        var raster = null;
+        if (minCX >= 0 && minCY >= 0) {
+            var canonW = maxCX - minCX + 1;
+            var canonH = maxCY - minCY + 1;
+            // Canonical metrics and size-dependent thresholds depend only on
+            // the stroke, not on the attempt
+            var mainIsWidth = canonW >= canonH;
+            var canonDiag = Math.hypot(canonW, canonH);
+            var SMALL_DIAG = 20, LARGE_DIAG = 80;
+            var t = canonDiag <= SMALL_DIAG ? 0 : (canonDiag >= LARGE_DIAG ? 1 : (canonDiag - SMALL_DIAG) / (LARGE_DIAG - SMALL_DIAG));
+            raster = {
+                mask: mask,
+                canonDiag: canonDiag,
+                mainIsWidth: mainIsWidth,
+                canonMain: mainIsWidth ? canonW : canonH,
+                minLengthFrac: 0.50 + t * (0.85 - 0.50),
+                minMainFrac: 0.50 + t * (0.80 - 0.50),
+                minAbsLength: 5 + t * (10 - 5)
+            };
+        }
+        canonicalRasterCache.set(canonicalPath, raster);
+        return raster;
+    };
+
+    // svgStroke is {xs, ys, length} in 109-unit SVG coordinates (see toSvgStroke)
+    window.isStrokeCloseEnough = function(svgStroke, canonicalPath) {
+        if (!canonicalPath || !svgStroke || svgStroke.length < 5) {
+            return false;
+        }
+        var xs = svgStroke.xs, ys = svgStroke.ys, n = svgStroke.length;
+
+        var W = 109, H = 109;
+        var HIT_RATIO = 0.6;
+
+        var raster = window.getCanonicalRaster(canonicalPath);
+        if (!raster) return false;
+        var mask = raster.mask;
+        var canonDiag = raster.canonDiag;
+
+        // Get user stroke metrics in one pass; Math.sqrt on the squared segment
+        // length skips Math.hypot's overflow handling, which these small values never need
+        var px = xs[0], py = ys[0];
+        var userLen = 0;
+        var minUX = px, maxUX = px, minUY = py, maxUY = py;
+        for (var i = 1; i < n; i++) {
+            var x = xs[i], y = ys[i];
+            var dx = x - px, dy = y - py;
+            userLen += Math.sqrt(dx * dx + dy * dy);
+            if (x < minUX) minUX = x; else if (x > maxUX) maxUX = x;
+            if (y < minUY) minUY = y; else if (y > maxUY) maxUY = y;
+            px = x;
+            py = y;
+        }
+        if (!isFinite(minUX) || !isFinite(minUY)) return false;
+
+        var userW = maxUX - minUX;
+        var userH = maxUY - minUY;
+
+        // Cheap length/extent gates first, so rejected strokes skip the corridor scan
+        var hasEnoughLength = userLen >= raster.minAbsLength && (canonDiag <= 0 || userLen / canonDiag >= raster.minLengthFrac);
+        if (!hasEnoughLength) return false;
+        var canonMain = raster.canonMain;
+        var userMain = raster.mainIsWidth ? userW : userH;
+        var mainFrac = canonMain > 0 ? userMain / canonMain : 1;
+        if (mainFrac < raster.minMainFrac) return false;
+
+        // Check corridor hit ratio
+        var hits = 0, total = 0;
+        var step = (n / 40) | 0 || 1;
+        for (var i = 0; i < n; i += step) {
+            // Round to the nearest pixel with integer ops; negative coordinates
+            // (which round toward zero here) are out of bounds either way
+            var sx = xs[i], sy = ys[i];
+            if (sx < -0.5 || sy < -0.5) continue;
+            var x = (sx + 0.5) | 0;
+            var y = (sy + 0.5) | 0;
+            if (x >= W || y >= H) continue;
+            total++;
+            var bit = y * W + x;
+            hits += (mask[bit >> 5] >>> (bit & 31)) & 1;
+        }
+        if (total === 0) return false;
+
+        return hits / total >= HIT_RATIO;
+    };
+
+    window.isDirectionCorrect = function(svgStroke, strokeMeta) {
+        if (!strokeMeta || !svgStroke || svgStroke.length < 2) return true;
+        var sx = strokeMeta.start_x, sy = strokeMeta.start_y;
+        var ex = strokeMeta.end_x, ey = strokeMeta.end_y;
+        if (sx == null || sy == null || ex == null || ey == null) return true;
+
+        var last = svgStroke.length - 1;
+        var ux = svgStroke.xs[last] - svgStroke.xs[0], uy = svgStroke.ys[last] - svgStroke.ys[0];
+        var ulen2 = ux * ux + uy * uy;
+        if (ulen2 < 25) return true;  // User stroke shorter than 5 units
+
+        var cx = ex - sx, cy = ey - sy;
+        var clen2 = cx * cx + cy * cy;
+        if (clen2 < 1) return true;
+
+        // cos(angle) >= 0.3, compared squared so no square roots or division are needed
+        var dot = ux * cx + uy * cy;
+        return dot > 0 && dot * dot >= 0.09 * ulen2 * clen2;
+    };
+
+    window.drawGrid = function() {
+        if (!window.bgCtx) return;
+        var ctx = window.bgCtx;
+
+        ctx.clearRect(0, 0, 300, 300);
+        ctx.save();
+        ctx.scale(300 / 109, 300 / 109);
+
+        var W = 109, H = 109;
+
+        ctx.strokeStyle = 'rgba(0, 0, 0, 0.15)';
+        ctx.lineWidth = 2;
+        ctx.setLineDash([]);
+        ctx.strokeRect(0, 0, W, H);
+
+        ctx.lineWidth = 1;
+        ctx.strokeStyle = 'rgba(0, 0, 0, 0.15)';
+        ctx.setLineDash([3, 4]);
+
+        ctx.beginPath();
+        ctx.moveTo(W / 2, 0);
+        ctx.lineTo(W / 2, H);
+        ctx.stroke();
+
+        ctx.beginPath();
+        ctx.moveTo(0, H / 2);
+        ctx.lineTo(W, H / 2);
+        ctx.stroke();
+
+        ctx.restore();
+    }
+
+    // Committed user strokes are rasterized once onto this layer, so a redraw
+    // blits one image instead of re-stroking every point of every stroke
+    var committedCanvas;
+    if (typeof OffscreenCanvas !== 'undefined') {
+        committedCanvas = new OffscreenCanvas(300, 300);
+    } else {
+        committedCanvas = document.createElement('canvas');
+        committedCanvas.width = 300;
+        committedCanvas.height = 300;
+    }
+    var committedCtx = committedCanvas.getContext('2d');
+    committedCtx.strokeStyle = '#000';
+    committedCtx.lineWidth = 3;
+    committedCtx.lineCap = 'round';
+    committedCtx.lineJoin = 'round';
+
+    // What the layer currently shows: the strokes array, how many of its strokes, and the last one
+    var committedStrokes = null, committedCount = 0, committedLast = null;
+
+    // Bring the layer up to date with window.currentStrokes. Appended strokes are
+    // drawn incrementally; anything else (undo, clear, new array) repaints the layer.
+    function syncCommittedLayer() {
+        var strokes = window.currentStrokes || [];
+        var count = strokes.length;
+        var start = 0;
+        if (strokes === committedStrokes && count >= committedCount &&
+                (committedCount === 0 || strokes[committedCount - 1] === committedLast)) {
+            start = committedCount;
+        } else {
+            committedCtx.clearRect(0, 0, 300, 300);
+        }
+
+        for (var i = start; i < count; i++) {
+            var stroke = strokes[i];
+            if (!stroke || stroke.length < 2) continue;
+            committedCtx.stroke(window.getStrokePath(stroke));
+        }
+
+        committedStrokes = strokes;
+        committedCount = count;
+        committedLast = count > 0 ? strokes[count - 1] : null;
+    }
+
+    window.redrawCanvas = function() {
+        if (!window.ctx) return;
+        var ctx = window.ctx;
+
+        // Grid lives on the background canvas, so only this layer is cleared
+        ctx.clearRect(0, 0, 300, 300);
+
+        // Draw ghost strokes if in dictionary mode
+        if (window.dictionaryMode && window.ghostStrokes && window.ghostStrokes.length > 0) {
+            window.drawGhostStrokes();
+        }
+
+        // Draw committed user strokes from the layer
+        syncCommittedLayer();
+        ctx.drawImage(committedCanvas, 0, 0);
+
+        // Draw current stroke being drawn (user stroke style is the context's
+        // base state, set in initCanvas; ghosts save/restore around theirs)
+        var cs = window.currentStroke;
+        if (cs && cs.length > 1) {
+            ctx.stroke(cs.path);
+        }
+    }
+
+    window.drawGhostStrokes = function() {
+        // Draw ghost strokes for dictionary mode
+        if (!window.ghostStrokes || window.ghostStrokes.length === 0) return;
+
+        var ctx = window.ctx;
+
+        ctx.save();
+        ctx.scale(300 / 109, 300 / 109);
+
+        ctx.lineWidth = 4;
+        ctx.lineCap = 'round';
+        ctx.lineJoin = 'round';
+        ctx.setLineDash([]);
+
+        // Draw all ghost strokes
+        for (var i = 0; i < window.ghostStrokes.length; i++) {
+            var s = window.ghostStrokes[i];
+
+            // Current stroke is less transparent
+            if (i === window.currentStrokeIndex) {
+                ctx.strokeStyle = 'rgba(255, 255, 255, 0.18)';
+            } else {
+                ctx.strokeStyle = 'rgba(255, 255, 255, 0.05)';
+            }
+
+            ctx.stroke(s.path);
+
+            // Draw stroke numbers
+            if (s.label_x != null) {
+                if (i === window.currentStrokeIndex) {
+                    ctx.fillStyle = 'rgba(255, 0, 0, 0.75)';
+                } else {
+                    ctx.fillStyle = 'rgba(255, 0, 0, 0.20)';
+                }
+                ctx.font = '8px sans-serif';
+                ctx.fillText(String(s.index), s.label_x, s.label_y);
+            }
+        }
+
+        // Draw animated stroke for current expected stroke (copied from card view)
+        if (window.currentStrokeIndex < window.ghostStrokes.length) {
+            var currentStroke = window.ghostStrokes[window.currentStrokeIndex];
+            if (currentStroke && currentStroke.path) {
+                ctx.lineWidth = 5;
+                ctx.lineCap = 'round';
+                ctx.lineJoin = 'round';
+                ctx.strokeStyle = 'rgba(0, 0, 0, 0.25)';
+
+                // Use the same dash animation as card view
+                ctx.setLineDash([window.dashLength, window.dashLength]);
+                ctx.lineDashOffset = -window.dashLength * window.drawProgress;
+
+                ctx.stroke(currentStroke.path);
+            }
+        }
+
+        ctx.restore();
+    };
+
+    // The in-progress stroke is kept as parallel Float32Arrays ({xs, ys, length}),
+    // reused between strokes and grown by doubling, so pointer moves allocate nothing.
+    // It becomes the {x, y} point list stored in window.currentStrokes when committed.
+    // Its Path2D is extended one segment per point, so a redraw strokes it in one call
+    // and the committed point list inherits it instead of rebuilding it.
+    var strokeXs = new Float32Array(1024), strokeYs = new Float32Array(1024);
+
+    function beginStroke(x, y) {
+        strokeXs[0] = x;
+        strokeYs[0] = y;
+        var path = new Path2D();
+        path.moveTo(x, y);
+        return { xs: strokeXs, ys: strokeYs, length: 1, path: path };
+    }
+
+    function appendPoint(stroke, x, y) {
+        var n = stroke.length;
+        if (n === stroke.xs.length) {
+            var xs = new Float32Array(n * 2), ys = new Float32Array(n * 2);
+            xs.set(stroke.xs);
+            ys.set(stroke.ys);
+            strokeXs = stroke.xs = xs;
+            strokeYs = stroke.ys = ys;
+        }
+        stroke.xs[n] = x;
+        stroke.ys[n] = y;
+        stroke.length = n + 1;
+        stroke.path.lineTo(x, y);
+    }
+
+    // Canvas (300px) to SVG (109 units) coordinates, scaled into reused scratch arrays
+    var SVG_SCALE = 109 / 300;
+    var svgXs = new Float32Array(1024), svgYs = new Float32Array(1024);
+
+    function toSvgStroke(stroke) {
+        var n = stroke.length;
+        if (svgXs.length < n) {
+            svgXs = new Float32Array(stroke.xs.length);
+            svgYs = new Float32Array(stroke.ys.length);
+        }
+        var xs = stroke.xs, ys = stroke.ys;
+        for (var i = 0; i < n; i++) {
+            svgXs[i] = xs[i] * SVG_SCALE;
+            svgYs[i] = ys[i] * SVG_SCALE;
+        }
+        return { xs: svgXs, ys: svgYs, length: n };
+    }
+
+    function strokeToPoints(stroke) {
+        var points = new Array(stroke.length);
+        for (var i = 0; i < stroke.length; i++) {
+            points[i] = { x: stroke.xs[i], y: stroke.ys[i] };
+        }
+        strokePathCache.set(points, stroke.path);
+        return points;
+    }
+
+    // Pointer events can arrive faster than the display refreshes; redraw at most once per frame
+    var redrawPending = false;
+
+    function scheduleRedraw() {
+        if (redrawPending) return;
+        redrawPending = true;
+        requestAnimationFrame(function() {
+            redrawPending = false;
+            window.redrawCanvas();
+        });
+    }
+
+    window.startDrawing = function(evt) {
+        evt.preventDefault();
+        canvasRect = evt.currentTarget.getBoundingClientRect();
+        var pos = getPos(evt);
+        window.isDrawing = true;
+        window.currentStroke = beginStroke(pos.x, pos.y);
+    };
+
+    // Pointer samples closer than this (squared canvas pixels) to the previous
+    // point are dropped; high-rate pointers report many co-located samples
+    var MIN_POINTER_STEP_SQ = 1;
+
+    window.draw = function(evt) {
+        if (!window.isDrawing) return;
+        evt.preventDefault();
+        var pos = getPos(evt);
+        var stroke = window.currentStroke;
+        if (stroke) {
+            var last = stroke.length - 1;
+            var dx = pos.x - stroke.xs[last], dy = pos.y - stroke.ys[last];
+            if (dx * dx + dy * dy < MIN_POINTER_STEP_SQ) return;
+            appendPoint(stroke, pos.x, pos.y);
+            scheduleRedraw();
+        }
+    };
+
+    window.endDrawing = function(evt) {
+        if (!window.isDrawing) return;
+        evt.preventDefault();
+        window.isDrawing = false;
+
+        if (!window.currentStroke || window.currentStroke.length < 2) {
+            window.currentStroke = null;
+            return;
+        }
+
+        // Clear redo history when a new stroke is added
+        window.undoHistory = [];
+
+        var points = strokeToPoints(window.currentStroke);
+
+        // In dictionary mode, validate stroke against ghost strokes
+        if (window.dictionaryMode && window.ghostStrokes && window.ghostStrokes.length > 0) {
+            // Convert current stroke to SVG coordinates
+            var svgStroke = toSvgStroke(window.currentStroke);
+
+            // Check if stroke matches current expected stroke using proper validation
+            var expectedStroke = window.ghostStrokes[window.currentStrokeIndex];
+            if (expectedStroke) {
+                var okShape = window.isStrokeCloseEnough(svgStroke, expectedStroke.path);
+                var okDirection = window.isDirectionCorrect(svgStroke, expectedStroke);
+
+                console.log('[Dictionary] Validating stroke', window.currentStrokeIndex, 'shape:', okShape, 'direction:', okDirection);
+
+                if (okShape && okDirection) {
+                    // Valid stroke - keep it and move to next
+                    window.currentStrokes.push(points);
+                    window.currentStrokeIndex++;
+                    window.updateUndoRedoButtons();
+
+                    // Check if current character is complete
+                    if (window.currentStrokeIndex >= window.ghostStrokes.length) {
+                        console.log('[Dictionary] Character complete:', window.currentKanjiChar);
+
+                        // Add completed character to answer box
+                        var answerBox = document.getElementById('japanese-input');
+                        if (answerBox) {
+                            answerBox.value += window.currentKanjiChar;
+                        }
+
+                        // Move to next character if available
+                        if (window.kanjiCharList && window.currentKanjiCharIndex < window.kanjiCharList.length - 1) {
+                            window.currentKanjiCharIndex++;
+                            var nextChar = window.kanjiCharList[window.currentKanjiCharIndex];
+                            console.log('[Dictionary] Loading next character:', nextChar);
+
+                            // Clear user strokes and undo history before loading next character
+                            window.currentStrokes = [];
+                            window.undoHistory = [];
+                            window.updateUndoRedoButtons();
+
+                            pycmd('lookupKanji:' + nextChar);
+                        } else {
+                            // All characters complete - return to free-draw mode
+                            console.log('[Dictionary] All characters complete - returning to free-draw mode');
+
+                            // Clear ghost strokes and reset dictionary mode
+                            window.ghostStrokes = [];
+                            window.dictionaryMode = false;
+                            window.currentKanjiChar = '';
+                            window.kanjiCharList = [];
+                            window.currentKanjiCharIndex = 0;
+
+                            // Clear user strokes and undo history
+                            window.currentStrokes = [];
+                            window.undoHistory = [];
+                            window.updateUndoRedoButtons();
+
+                            // Update info display
+                            var info = document.getElementById('canvas-info');
+                            if (info) {
+                                info.textContent = 'All characters completed! Free drawing mode resumed.';
+                                info.style.color = '#4CAF50';
+
+                                // Reset to normal message after 3 seconds
+                                setTimeout(function() {
+                                    info.textContent = 'Free drawing mode - draw any character';
+                                    info.style.color = '';
+                                }, 3000);
+                            }
+
+                            // Clear the canvas and redraw grid
+                            window.redrawCanvas();
+                        }
+                    } else {
+                        // Update progress for current character
+                        var info = document.getElementById('canvas-info');
+                        if (info) {
+                            info.textContent = 'Dictionary Mode: Drawing ' + window.currentKanjiChar + 
+                                              ' (stroke ' + (window.currentStrokeIndex + 1) + 
+                                              ' of ' + window.ghostStrokes.length + ')';
+                        }
+                    }
+                } else {
+                    // Invalid stroke - don't keep it
+                    console.log('[Dictionary] Stroke validation failed');
+                }
+            }
+
+            window.currentStroke = null;
+            window.redrawCanvas();
+        } else {
+            // Normal mode - just add stroke
+            window.currentStrokes.push(points);
+            window.updateUndoRedoButtons();
+            window.currentStroke = null;
+            window.redrawCanvas();
+        }
+    };
+
+    var startDrawing = window.startDrawing;
+    var draw = window.draw;
+    var endDrawing = window.endDrawing;
+
+    // Initialize when DOM is ready
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', initCanvas);
+    } else {
+        initCanvas();
+    }
+})();
+
+// Show another card in this page without reloading it (called from Python on
+// card navigation). Resets everything the page sets up per card.
+window.showCard = function(card) {
+    window.cardEnglish = card.english;
+    window.cardJapanese = card.japanese;
+    window.cardOriginalKanji = card.originalKanji;
+    window.currentCardIndex = card.index;
+    window.totalCards = card.total;
+    window.answeredCards = card.answeredCards;
+    window.feedbackBuffer = '';
+
+    document.querySelector('.progress').textContent = 'Card ' + (card.index + 1) + ' of ' + card.total;
+    document.querySelector('.english').innerHTML = card.english;
+    document.getElementById('dict-search').value = '';
+
+    // Restore cached answer and feedback for this card
+    var cache = card.cache || {};
+    var input = document.getElementById('japanese-input');
+    var result = document.getElementById('result');
+    input.value = cache.answer || '';
+    if (cache.feedback) {
+        result.innerHTML = cache.feedback;
+        result.className = cache.feedbackClass || 'result';
+        result.style.display = 'block';
+    } else {
+        result.innerHTML = '';
+        result.className = 'result';
+        result.style.display = '';
+    }
+
+    // Back to free drawing mode with an empty canvas
+    window.dictionaryMode = false;
+    window.ghostStrokes = [];
+    window.currentKanjiChar = '';
+    window.kanjiCharList = [];
+    window.currentKanjiCharIndex = 0;
+    var info = document.getElementById('canvas-info');
+    if (info) {
+        info.textContent = 'Free drawing mode - draw any character';
+        info.style.color = '';
+        info.style.fontWeight = '';
+    }
+    window.clearCanvas();
+
+    document.getElementById('prev-button').disabled = card.index === 0;
+    var nextButton = document.getElementById('next-button');
+    nextButton.textContent = 'Next Card';
+    nextButton.className = '';
+    nextButton.onclick = function() { pycmd('nextCard'); };
+    nextButton.disabled = card.index >= card.total - 1;
+    window.updateNextButton();
+
+    window.scrollTo(0, 0);
+};
+
+// Send this card's answer/feedback to the Python cache, skipping payloads
+// identical to the last one sent (repeated submits of the same answer)
+window.lastSavedCache = null;
+window.saveCache = function(answer, feedback, feedbackClass) {
+    var last = window.lastSavedCache;
+    if (last && last.cardIndex === window.currentCardIndex && last.answer === answer &&
+            last.feedback === feedback && last.feedbackClass === feedbackClass) {
+        return;
+    }
+    window.lastSavedCache = {
+        cardIndex: window.currentCardIndex,
+        answer: answer,
+        feedback: feedback,
+        feedbackClass: feedbackClass
+    };
+    pycmd('saveCache:' + JSON.stringify(window.lastSavedCache));
+};
+
+window.submitAnswer = function() {
+    var input = document.getElementById('japanese-input');
+    var result = document.getElementById('result');
+    var submittedAnswer = input.value.trim();
+    var acceptedAnswer = (window.cardJapanese || '').trim();
+
+    // Cache the answer (an exact match caches it together with its feedback below)
+    if (!submittedAnswer || submittedAnswer !== acceptedAnswer) {
+        window.saveCache(input.value, '', '');
+    }
+
+    if (!submittedAnswer) {
+        result.innerHTML = '⚠️ Please enter an answer first.';
+        result.className = 'result incorrect';
+        result.style.display = 'block';
+        return;
+    }
+
+    // Show loading state
+    result.innerHTML = '🔍 Checking your answer...';
+    result.className = 'result';
+    result.style.display = 'block';
+
+    // Check for exact match
+    if (submittedAnswer === acceptedAnswer) {
+        result.innerHTML = '<h2>✅ Correct</h2>';
+        result.className = 'result correct';
+
+        // Cache the feedback via pycmd
+        window.saveCache(input.value, result.innerHTML, 'result correct');
+
+        return;
+    }
+
+    // Request AI feedback for incorrect answer
+    var feedbackRequest = {
+        english: window.cardEnglish || '',
+        accepted: acceptedAnswer,
+        submitted: submittedAnswer,
+        originalKanji: window.cardOriginalKanji || ''
+    };
+
+    window.feedbackBuffer = '';
+    pycmd('getFeedback:' + JSON.stringify(feedbackRequest));
+};
+
+// Handler for streamed AI feedback - show raw text until the final feedback arrives
+window.feedbackBuffer = '';
+window.appendFeedback = function(text) {
+    var result = document.getElementById('result');
+    if (!result) return;
+    window.feedbackBuffer += text;
+    result.textContent = window.feedbackBuffer;
+    result.className = 'result incorrect';
+    result.style.display = 'block';
+};
+
+// Handler for AI feedback response
+window.handleFeedback = function(feedback) {
+    var result = document.getElementById('result');
+    window.feedbackBuffer = '';
+    if (!feedback) {
+        result.innerHTML = '❌ Error getting feedback. Please try again.';
+        result.className = 'result incorrect';
+        return;
+    }
+
+    // Render markdown feedback
+    result.innerHTML = window.renderMarkdown(feedback);
+
+    // Check if feedback indicates correct answer
+    if (feedback.includes('✅ Correct') || feedback.includes('✅Correct')) {
+        result.className = 'result correct';
+    } else {
+        result.className = 'result incorrect';
+    }
+
+    result.style.display = 'block';
+
+    // Cache the feedback via pycmd
+    var input = document.getElementById('japanese-input');
+    window.saveCache(input ? input.value : '', result.innerHTML, result.className);
+
+    // Update answered cards tracking
+    if (!window.answeredCards.includes(window.currentCardIndex)) {
+        window.answeredCards.push(window.currentCardIndex);
+    }
+
+    // Update Next/Finish button
+    window.updateNextButton();
+};
+
+// Markdown patterns, compiled once and shared by every render
+var MD_FURIGANA = /([一-龯ぁ-ゔァ-ヴー々〆〤]+)\[([ぁ-んァ-ヴー]+)\]/g;
+var MD_CODE_BLOCK = /```([\s\S]*?)```/g;
+var MD_HEADER = /^(#{1,3}) (.*)$/gm;
+var MD_BOLD = /\*\*([^*]+)\*\*|__([^_]+)__/g;
+var MD_ITALIC = /\*([^*]+)\*|_([^_]+)_/g;
+var MD_INLINE_CODE = /`([^`]+)`/g;
+var MD_PARAGRAPH = /\n\n/g;
+
+// Simple markdown renderer with furigana support
+window.renderMarkdown = function(text) {
+    if (!text) return '';
+
+    var html = text;
+
+    // Handle furigana format: 漢字[かんじ] -> <ruby>漢字<rt>かんじ</rt></ruby>
+    html = html.replace(MD_FURIGANA, '<ruby>$1<rt>$2</rt></ruby>');
+
+    // Handle code blocks first
+    html = html.replace(MD_CODE_BLOCK, '<pre><code>$1</code></pre>');
+
+    // Headers (#, ## and ### in one pass)
+    html = html.replace(MD_HEADER, function(match, hashes, content) {
+        var tag = 'h' + hashes.length;
+        return '<' + tag + '>' + content + '</' + tag + '>';
+    });
+
+    // Bold (** and __ in one pass)
+    html = html.replace(MD_BOLD, function(match, stars, underscores) {
+        return '<strong>' + (stars !== undefined ? stars : underscores) + '</strong>';
+    });
+
+    // Italic (* and _ in one pass)
+    html = html.replace(MD_ITALIC, function(match, stars, underscores) {
+        return '<em>' + (stars !== undefined ? stars : underscores) + '</em>';
+    });
+
+    // Inline code
+    html = html.replace(MD_INLINE_CODE, '<code>$1</code>');
+
+    // Lists - process line by line
+    var lines = html.split('\n');
+    var inList = false;
+    var result = [];
+    for (var i = 0; i < lines.length; i++) {
+        var line = lines[i];
+        var first = line.charAt(0);
+        if ((first === '*' || first === '-') && line.charAt(1) === ' ') {
+            if (!inList) {
+                result.push('<ul>');
+                inList = true;
+            }
+            result.push('<li>' + line.substring(2) + '</li>');
+        } else {
+            if (inList) {
+                result.push('</ul>');
+                inList = false;
+            }
+            result.push(line);
+        }
+    }
+    if (inList) result.push('</ul>');
+    html = result.join('\n');
+
+    // Line breaks
+    html = html.replace(MD_PARAGRAPH, '</p><p>');
+    html = '<p>' + html + '</p>';
+
+    return html;
+};
+
+window.skipCard = function() {
+    pycmd('nextCard');
+};
+
+window.lookupDictionary = function() {
+    console.log('lookupDictionary called');
+    var searchInput = document.getElementById('dict-search');
+    console.log('Search input:', searchInput);
+    var kanji = searchInput ? searchInput.value.trim() : '';
+    console.log('Kanji value:', kanji);
+
+    // Show status immediately
+    var status = document.getElementById('status');
+    if (status) {
+        status.textContent = 'Looking up: ' + (kanji || '(no input)');
+        status.style.backgroundColor = '#2196F3';
+        status.style.color = 'white';
+        status.style.display = 'block';
+    }
+
+    if (kanji) {
+        console.log('Calling pycmd with:', 'lookupKanji:' + kanji);
+        pycmd('lookupKanji:' + kanji);
+    } else {
+        console.log('No kanji entered');
+        if (status) {
+            status.textContent = '⚠ Please enter a character to look up';
+            status.style.backgroundColor = '#f44336';
+        }
+    }
+};
+
+// Add Enter key support for dictionary lookup
+var dictSearch = document.getElementById('dict-search');
+if (dictSearch) {
+    dictSearch.addEventListener('keypress', function(event) {
+        if (event.key === 'Enter') {
+            event.preventDefault();
+            window.lookupDictionary();
+        }
+    });
+};
+
+var answerInput = document.getElementById('japanese-input');
+if (answerInput) {
+    answerInput.addEventListener('keypress', function(event) {
+        if (event.key === 'Enter') {
+            event.preventDefault();
+            window.submitAnswer();
+        }
+    });
+};
+
+window.undoStroke = function() {
+    if (window.currentStrokes.length === 0) return;
+
+    // Remove last stroke and add to redo history
+    var lastStroke = window.currentStrokes.pop();
+    window.undoHistory.push(lastStroke);
+
+    // Update stroke index if in dictionary mode
+    if (window.dictionaryMode && window.currentStrokeIndex > 0) {
+        window.currentStrokeIndex--;
+    }
+
+    window.updateUndoRedoButtons();
+    window.redrawCanvas();
+};
+
+window.redoStroke = function() {
+    if (window.undoHistory.length === 0) return;
+
+    // Restore last undone stroke
+    var stroke = window.undoHistory.pop();
+    window.currentStrokes.push(stroke);
+
+    // Update stroke index if in dictionary mode
+    if (window.dictionaryMode && window.currentStrokeIndex < window.ghostStrokes.length) {
+        window.currentStrokeIndex++;
+    }
+
+    window.updateUndoRedoButtons();
+    window.redrawCanvas();
+};
+
+// Add keyboard shortcuts for undo/redo
+document.addEventListener('keydown', function(e) {
+    // Only handle if no input/textarea is focused
+    var activeElement = document.activeElement;
+    if (activeElement && (activeElement.tagName === 'INPUT' || activeElement.tagName === 'TEXTAREA')) {
+        return;
+    }
+
+    // Ctrl+Z for undo (without shift)
+    if (e.ctrlKey && e.key === 'z' && !e.shiftKey) {
+        e.preventDefault();
+        window.undoStroke();
+    }
+    // Ctrl+Y or Ctrl+Shift+Z for redo
+    else if (e.ctrlKey && (e.key === 'y' || (e.key === 'z' && e.shiftKey))) {
+        e.preventDefault();
+        window.redoStroke();
+    }
+});
+
+window.submitDrawing = function() {
+    // In free draw mode, try to recognize character using OpenRouter API
+    if (!window.currentStrokes || window.currentStrokes.length === 0) {
+        var status = document.getElementById('status');
+        if (status) {
+            status.textContent = '⚠ Draw something first before submitting';
+            status.style.backgroundColor = '#f44336';
+            status.style.color = 'white';
+            status.style.display = 'block';
+        }
+        return;
+    }
+
+    var status = document.getElementById('status');
+    if (status) {
+        status.textContent = '🔍 Recognizing... (using AI)';
+        status.style.backgroundColor = '#2196F3';
+        status.style.color = 'white';
+        status.style.display = 'block';
+    }
+
+    // Get canvas image data
+    var canvas = document.getElementById('drawing-canvas');
+    if (!canvas) {
+        console.error('[OCR] Canvas not found');
+        if (status) {
+            status.textContent = '❌ Error: Canvas not found';
+            status.style.backgroundColor = '#f44336';
+        }
+        return;
+    }
+
+    try {
+        // Create a clean image for OCR: white background with black strokes.
+        // Recognizers use at most 224px (the model server downsizes to 64px),
+        // so render at that size rather than encoding the full canvas
+        var OCR_IMAGE_SIZE = 224;
+        var tempCanvas = document.createElement('canvas');
+        tempCanvas.width = OCR_IMAGE_SIZE;
+        tempCanvas.height = OCR_IMAGE_SIZE;
+        var tempCtx = tempCanvas.getContext('2d');
+
+        // Fill with white background
+        tempCtx.fillStyle = '#FFFFFF';
+        tempCtx.fillRect(0, 0, tempCanvas.width, tempCanvas.height);
+
+        // Strokes stay in canvas coordinates; the transform scales them down
+        tempCtx.scale(OCR_IMAGE_SIZE / canvas.width, OCR_IMAGE_SIZE / canvas.height);
+
+        // Draw user strokes in black
+        tempCtx.strokeStyle = '#000000';
+        tempCtx.lineWidth = 3;
+        tempCtx.lineCap = 'round';
+        tempCtx.lineJoin = 'round';
+
+        for (var i = 0; i < window.currentStrokes.length; i++) {
+            var stroke = window.currentStrokes[i];
+            if (!stroke || stroke.length < 2) continue;
+            tempCtx.stroke(window.getStrokePath(stroke));
+        }
+
+        // Encode the PNG asynchronously (toDataURL would block the page while
+        // encoding), then base64 it for the pycmd bridge
+        tempCanvas.toBlob(function(blob) {
+            if (!blob) {
+                console.error('[OCR] Could not encode canvas');
+                if (status) {
+                    status.textContent = '❌ Error: Could not capture drawing';
+                    status.style.backgroundColor = '#f44336';
+                }
+                return;
+            }
+            var reader = new FileReader();
+            reader.onload = function() {
+                // Send to Python backend for OCR processing
+                console.log('[OCR] Sending image to OpenRouter API...');
+                pycmd('recognizeDrawing:' + reader.result);
+            };
+            reader.readAsDataURL(blob);
+        }, 'image/png');
+    } catch (error) {
+        console.error('[OCR] Error capturing canvas:', error);
+        if (status) {
+            status.textContent = '❌ Error: ' + error.message;
+            status.style.backgroundColor = '#f44336';
+        }
+    }
+};
+
+// Handler for OCR results from Python
+window.handleOCRResult = function(result) {
+    var status = document.getElementById('status');
+    var answerBox = document.getElementById('japanese-input');
+
+    if (!result) {
+        // No character recognized
+        console.log('[OCR] No character recognized');
+        if (status) {
+            status.textContent = '❌ Could not recognize character. Try drawing more clearly.';
+            status.style.backgroundColor = '#f44336';
+            status.style.color = 'white';
+        }
+        return;
+    }
+
+    var recognized = result.text;
+    var confidence = result.confidence;
+    var alternatives = result.alternatives || [];
+
+    console.log('[OCR] Recognized:', recognized, 'Confidence:', confidence);
+
+    // Add to answer box
+    if (answerBox) {
+        answerBox.value += recognized;
+    }
+
+    // Save successful handwriting sample for training
+    window.saveHandwritingSample(recognized, true);
+
+    // Send recognition event
+    pycmd('charRecognized:' + recognized);
+
+    // Show success message with alternatives
+    if (status) {
+        var altText = '';
+        if (alternatives.length > 1) {
+            var altChars = alternatives.slice(1, 6).map(function(a) { return a.text; }).join(', ');
+            if (altChars) {
+                altText = ' | Also: ' + altChars;
+            }
+        }
+
+        var confPercent = (confidence * 100).toFixed(0);
+        status.textContent = '✓ Recognized: ' + recognized + ' (' + confPercent + '% confident)' + altText;
+        status.style.backgroundColor = '#4CAF50';
+        status.style.color = 'white';
+        status.style.display = 'block';
+    }
+
+    // Clear canvas after recognition
+    window.currentStrokes = [];
+    window.redrawCanvas();
+};
+
+// Fallback recognition using stroke count (if OCR fails).
+// Candidates are keyed by a feature string "<stroke count>:<direction of each
+// stroke>" (e.g. "2:RD"); keys may stop early, and the longest key that is a
+// prefix of the drawing's features wins, so direction-specific entries can be
+// added later without touching the lookup.
+var FALLBACK_CANDIDATES = Object.freeze({
+    '1:': Object.freeze(['一', 'の', 'つ', 'し', 'ー']),
+    '2:': Object.freeze(['二', '十', '人', '入', 'リ', 'ニ']),
+    '3:': Object.freeze(['三', '山', '川', '女', '大', '子', '小', '口'])
+});
+var NO_CANDIDATES = Object.freeze([]);
+
+// Character trie over the keys above, built once: each node is {next: {ch: node}, candidates}
+var FALLBACK_TRIE = (function() {
+    var root = { next: {}, candidates: null };
+    Object.keys(FALLBACK_CANDIDATES).forEach(function(key) {
+        var node = root;
+        for (var i = 0; i < key.length; i++) {
+            var ch = key.charAt(i);
+            node = node.next[ch] || (node.next[ch] = { next: {}, candidates: null });
+        }
+        node.candidates = FALLBACK_CANDIDATES[key];
+    });
+    return root;
+})();
+
+// Dominant direction of each stroke, start to end: R(ight), L(eft), D(own), U(p)
+function strokeFeatureKey(strokes) {
+    var key = strokes.length + ':';
+    for (var i = 0; i < strokes.length; i++) {
+        var stroke = strokes[i];
+        if (!stroke || stroke.length < 2) {
+            key += '.';
+            continue;
+        }
+        var dx = stroke[stroke.length - 1].x - stroke[0].x;
+        var dy = stroke[stroke.length - 1].y - stroke[0].y;
+        if (Math.abs(dx) >= Math.abs(dy)) {
+            key += dx >= 0 ? 'R' : 'L';
+        } else {
+            key += dy >= 0 ? 'D' : 'U';
+        }
+    }
+    return key;
+}
+
+// One walk down the trie; returns the candidates of the deepest matching key
+function lookupFallbackCandidates(key) {
+    var node = FALLBACK_TRIE;
+    var best = NO_CANDIDATES;
+    for (var i = 0; i < key.length; i++) {
+        node = node.next[key.charAt(i)];
+        if (!node) break;
+        if (node.candidates) best = node.candidates;
+    }
+    return best;
+}
+
+window.fallbackRecognition = function() {
+    if (!window.currentStrokes || window.currentStrokes.length === 0) {
+        return null;
+    }
+
+    var strokeCount = window.currentStrokes.length;
+    var candidates = lookupFallbackCandidates(strokeFeatureKey(window.currentStrokes));
+
+    if (candidates.length > 0) {
+        return candidates[0];
+    } else {
+        console.log('[Recognition] No match for', strokeCount, 'strokes');
+        var status = document.getElementById('status');
+        if (status) {
+            status.textContent = '⚠ No character recognized with ' + strokeCount + ' stroke(s). Use dictionary lookup for accurate results.';
+            status.style.backgroundColor = '#ff9800';
+            status.style.color = 'white';
+            status.style.display = 'block';
+        }
+        return null;
+    }
+};
+
+// Save handwriting sample for training
+window.saveHandwritingSample = function(character, success) {
+    if (!window.currentStrokes || window.currentStrokes.length === 0) {
+        console.log('[Dataset] No strokes to save');
+        return;
+    }
+
+    try {
+        // Create a temporary canvas to capture the drawing
+        var tempCanvas = document.createElement('canvas');
+        tempCanvas.width = 300;
+        tempCanvas.height = 300;
+        var tempCtx = tempCanvas.getContext('2d');
+
+        // Fill with white background
+        tempCtx.fillStyle = 'white';
+        tempCtx.fillRect(0, 0, 300, 300);
+
+        // Draw all strokes in black
+        tempCtx.strokeStyle = 'black';
+        tempCtx.lineWidth = 3;
+        tempCtx.lineCap = 'round';
+        tempCtx.lineJoin = 'round';
+
+        for (var i = 0; i < window.currentStrokes.length; i++) {
+            var stroke = window.currentStrokes[i];
+            if (stroke.length === 0) continue;
+
+            tempCtx.stroke(window.getStrokePath(stroke));
+        }
+
+        // Convert to base64 image
+        var imageData = tempCanvas.toDataURL('image/png');
+
+        // Prepare data to send
+        var sampleData = {
+            character: character,
+            image: imageData,
+            strokes: window.currentStrokes,  // Include stroke data for potential fine-tuning
+            success: success
+        };
+
+        // Send to Python backend for storage
+        console.log('[Dataset] Saving handwriting sample for:', character, 'Success:', success);
+        pycmd('saveHandwritingSample:' + JSON.stringify(sampleData));
+    } catch (error) {
+        console.error('[Dataset] Error saving handwriting sample:', error);
+    }
+};
+
+window.clearCanvas = function() {
+    if (!window.ctx) return;
+
+    // Clear canvas
+    window.ctx.clearRect(0, 0, 300, 300);
+
+    // Reset drawing state
+    window.currentStrokes = [];
+    window.currentStroke = null;
+    window.currentStrokeIndex = 0;
+    window.animationStartTime = null;
+    window.undoHistory = [];
+
+    // Update undo/redo button states
+    window.updateUndoRedoButtons();
+
+    // The grid stays on the background canvas; redraw ghost strokes if in dictionary mode
+    if (window.dictionaryMode && window.ghostStrokes && window.ghostStrokes.length > 0) {
+        window.redrawCanvas();
+    }
+
+    // Hide status message
+    var status = document.getElementById('status');
+    if (status) {
+        status.style.display = 'none';
+    }
+};